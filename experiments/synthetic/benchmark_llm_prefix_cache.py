@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Measures SemanticAnalyzer time-to-first-token with and without the cached few-shot prefix."""
+from __future__ import annotations
+
+import argparse
+import csv
+import statistics
+import sys
+import time
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+import torch
+
+from experiments.synthetic.benchmark_llm_batch_inference import _synthetic_tasks
+from src.agents.llm_analyzer import SemanticAnalyzer
+
+
+def _time_to_first_token(analyzer: SemanticAnalyzer, task, context) -> float:
+    """Seconds from prompt tokenization to the first generated token."""
+    start = time.perf_counter()
+    inputs = analyzer._model_inputs([task], [context])
+    with torch.no_grad():
+        analyzer.model.generate(**inputs, max_new_tokens=1, do_sample=False, pad_token_id=analyzer.tokenizer.pad_token_id)
+    return time.perf_counter() - start
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model-name", default="TinyLlama/TinyLlama-1.1B-Chat-v1.0")
+    parser.add_argument("--device", default=None)
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output-csv", default="results/raw/synthetic/llm_batching/llm_prefix_cache_ttft.csv")
+    args = parser.parse_args()
+
+    analyzer = SemanticAnalyzer(use_llm=True, model_name=args.model_name, device=args.device)
+    if not analyzer.use_llm:
+        print("[ERROR] LLM could not be loaded; nothing to benchmark.")
+        return 1
+
+    tasks, contexts = _synthetic_tasks(args.tasks, args.seed)
+    prefix_tokens = int(analyzer.tokenizer(analyzer._prompt_prefix(), return_tensors="pt").input_ids.shape[1])
+    rows = []
+    for use_prefix_cache in (False, True):
+        analyzer.use_prefix_cache = use_prefix_cache
+        analyzer._prefix_state = None
+        start = time.perf_counter()
+        if use_prefix_cache:
+            analyzer._encode_prefix()
+        setup = time.perf_counter() - start
+        timings = [_time_to_first_token(analyzer, task, context) for task, context in zip(tasks, contexts)]
+        rows.append({
+            "prefix_cache": "yes" if use_prefix_cache else "no",
+            "prefix_tokens": prefix_tokens,
+            "tasks": len(tasks),
+            "setup_ms": round(setup * 1000.0, 2),
+            "ttft_median_ms": round(statistics.median(timings) * 1000.0, 2),
+            "ttft_mean_ms": round(statistics.fmean(timings) * 1000.0, 2),
+            "ttft_max_ms": round(max(timings) * 1000.0, 2),
+        })
+        print(f"[INFO] prefix cache {rows[-1]['prefix_cache']:>3}: TTFT median {rows[-1]['ttft_median_ms']:.1f} ms (setup {rows[-1]['setup_ms']:.1f} ms)")
+
+    output_csv = Path(args.output_csv)
+    output_csv.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_csv, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"[INFO] TTFT CSV: {output_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
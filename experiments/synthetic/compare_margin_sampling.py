@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Supervised pretraining with and without margin curriculum sampling, same seeds and data.
+
+Both variants of a seed start from the same policy initialization: the global
+random, NumPy and torch RNGs are reseeded before every run.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import pandas as pd
+import yaml
+from stable_baselines3.common.utils import set_random_seed
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.training.pretrain_policy import run_supervised_pretraining
+
+DEFAULT_MARGIN_SAMPLING = {"enabled": True, "num_buckets": 10, "hard_ratio_start": 8.0, "hard_ratio_end": 2.0, "anneal_epochs": 20}
+
+
+def _write_yaml(path: Path, payload: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", encoding="utf-8") as handle:
+        yaml.safe_dump(payload, handle, sort_keys=False, allow_unicode=True)
+
+
+def _epochs_to(metrics: pd.DataFrame, target: float) -> int:
+    reached = metrics.index[metrics["val_accuracy"] >= target]
+    return int(metrics.loc[reached[0], "epoch"]) if len(reached) else -1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare epochs-to-best validation accuracy with uniform vs margin curriculum sampling.")
+    parser.add_argument("--config", default="configs/synthetic/supervised_pretraining.yaml")
+    parser.add_argument("--output-root", default="results/raw/synthetic/margin_sampling_comparison")
+    parser.add_argument("--tolerance", type=float, default=0.005, help="Accuracy slack when counting epochs to the baseline's best")
+    parser.add_argument("--seeds", type=int, nargs="+", default=[42, 43, 44])
+    args = parser.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as handle:
+        base_cfg = yaml.safe_load(handle)
+    output_root = Path(args.output_root)
+    margin_cfg = {**DEFAULT_MARGIN_SAMPLING, **(base_cfg.get("dataset", {}).get("margin_sampling") or {}), "enabled": True}
+
+    rows = []
+    for seed in args.seeds:
+        results = {}
+        for variant, sampling in (("uniform", {"enabled": False}), ("margin_curriculum", margin_cfg)):
+            cfg = yaml.safe_load(yaml.safe_dump(base_cfg))
+            cfg["seed"] = seed
+            cfg.setdefault("dataset", {})["margin_sampling"] = sampling
+            run_root = output_root / f"seed_{seed}" / variant
+            cfg["output"] = {
+                "checkpoint_path": str(run_root / "ppo_pretrained"),
+                "metrics_csv": str(run_root / "supervised_pretraining_metrics.csv"),
+                "report_path": None,
+            }
+            config_path = run_root / "supervised_pretraining.yaml"
+            _write_yaml(config_path, cfg)
+            set_random_seed(seed)
+            results[variant] = run_supervised_pretraining(str(config_path))
+
+        metrics = {variant: pd.read_csv(result["metrics_csv"]) for variant, result in results.items()}
+        baseline_best = float(metrics["uniform"]["val_accuracy"].max())
+        for variant, result in results.items():
+            rows.append({
+                "seed": seed,
+                "variant": variant,
+                "best_epoch": int(result["best_epoch"]),
+                "best_val_accuracy": float(metrics[variant]["val_accuracy"].max()),
+                "epochs_to_uniform_best": _epochs_to(metrics[variant], baseline_best - args.tolerance),
+                "executed_epochs": int(result["executed_epochs"]),
+                "test_accuracy": float(result["test_accuracy"]) / 100.0,
+            })
+    summary = pd.DataFrame(rows)
+    summary_path = output_root / "margin_sampling_comparison.csv"
+    summary.to_csv(summary_path, index=False)
+    print(summary.to_string(index=False))
+    print(f"[INFO] Comparison CSV: {summary_path}")
@@ -122,6 +122,7 @@ def run_policy_evaluation():
     seeds = evaluation_cfg.get("seeds", [42, 43, 44])
     max_steps = evaluation_cfg.get("max_steps", 50)
     csv_path = output_cfg.get("csv_path", "results/raw/synthetic_policy_evaluation.csv")
+    reward_terms_dir = output_cfg.get("reward_terms_dir")
     batch_id = datetime.now().strftime("policy_eval_%Y%m%d_%H%M%S")
     policy_names = evaluation_cfg_file.get("policies", {}).get("heuristic", []) + evaluation_cfg_file.get("policies", {}).get("rl", [])
 
@@ -139,6 +140,7 @@ def run_policy_evaluation():
                     semantic_mode="action_prior",
                     config_seed=seed,
                     csv_path=csv_path,
+                    reward_terms_path=os.path.join(reward_terms_dir, f"{policy_name}_seed{seed}.npz") if reward_terms_dir else None,
                     extra_fields={
                         "config_batch_id": batch_id,
                         "config_eval_group": "synthetic_policy_evaluation",
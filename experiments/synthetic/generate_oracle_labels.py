@@ -1,4 +1,5 @@
-﻿from pathlib import Path
+﻿import argparse
+from pathlib import Path
 import sys
 
 SCRIPT_DIR = Path(__file__).resolve().parent
@@ -10,7 +11,13 @@ from src.training.pretrain_policy import generate_oracle_dataset
 
 
 if __name__ == "__main__":
-    result = generate_oracle_dataset("configs/synthetic/oracle_labeling.yaml")
+    parser = argparse.ArgumentParser(description="Generate the synthetic oracle label dataset.")
+    parser.add_argument("--config", default="configs/synthetic/oracle_labeling.yaml")
+    parser.add_argument("--workers", type=int, default=None, help="Process count (default: dataset.workers)")
+    args = parser.parse_args()
+
+    result = generate_oracle_dataset(args.config, workers=args.workers)
     print(f"[INFO] Oracle dataset CSV: {result['csv_path']}")
+    print(f"[INFO] Oracle columnar store: {result['store_path']}")
     print(f"[INFO] Oracle summary report: {result['report_path']}")
     print(f"[INFO] Total rows: {result['num_rows']}")
@@ -0,0 +1,61 @@
+import argparse
+import glob
+from pathlib import Path
+import sys
+import time
+
+import pandas as pd
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.config import load_config
+from src.core.reward_rescoring import load_recording, rescore_rewards, summarize_rescoring, weight_grid, without_reward_shaping
+
+
+def build_settings(settings_cfg):
+    settings = []
+    if settings_cfg.get("include_recorded", True):
+        settings.append({})
+    if settings_cfg.get("include_without_shaping", False):
+        settings.append(without_reward_shaping())
+    grid = settings_cfg.get("grid") or {}
+    if grid:
+        settings.extend(weight_grid(**grid))
+    return settings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score recorded rollouts under alternative reward weights.")
+    parser.add_argument("--config", default="configs/synthetic/reward_rescoring.yaml")
+    parser.add_argument("--recording", action="append", default=None, help="Recording .npz (or glob); overrides the config list")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    patterns = args.recording or config.get("recordings", [])
+    recording_paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not recording_paths:
+        raise FileNotFoundError(f"No reward recordings match: {patterns}")
+    settings = build_settings(config.get("settings", {}))
+
+    frames = []
+    started = time.perf_counter()
+    total_steps = 0
+    for path in recording_paths:
+        records, episode_index = load_recording(path)
+        if len(records) == 0:
+            continue
+        total_steps += len(records)
+        summary = summarize_rescoring(records, episode_index, settings, rescore_rewards(records, settings))
+        summary.insert(0, "recording", Path(path).stem)
+        frames.append(summary)
+    elapsed = time.perf_counter() - started
+
+    csv_path = Path(config.get("output", {}).get("csv_path", "results/raw/synthetic/reward_rescoring/reward_weight_sweep.csv"))
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    result = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    result.to_csv(csv_path, index=False)
+    print(f"[INFO] Re-scored {total_steps} recorded steps x {len(settings)} weight settings in {elapsed:.2f}s")
+    print(f"[INFO] Sweep CSV: {csv_path}")
@@ -0,0 +1,26 @@
+import argparse
+from pathlib import Path
+import sys
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.training.dagger import run_dagger_relabeling
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Relabel learner-visited states with the teacher and update the pretrained policy (DAgger).")
+    parser.add_argument("--config", default="configs/synthetic/dagger_relabeling.yaml")
+    parser.add_argument("--workers", type=int, default=None, help="Rollout process count (default: dagger.workers)")
+    args = parser.parse_args()
+
+    result = run_dagger_relabeling(args.config, workers=args.workers)
+    print(f"[INFO] Iteration metrics CSV: {result['metrics_csv']}")
+    print(f"[INFO] DAgger oracle store (copy): {result['store_path']}")
+    print(f"[INFO] Env steps vs staged training CSV: {result['comparison_csv']}")
+    print(f"[INFO] Final checkpoint: {result['checkpoint_path']}")
+    print(f"[INFO] Iterations: {result['iterations']}")
+    print(f"[INFO] Environment steps: {result['env_steps']}")
+    print(f"[INFO] Success threshold reached: {result['reached_threshold']}")
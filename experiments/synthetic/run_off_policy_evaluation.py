@@ -0,0 +1,112 @@
+import argparse
+import glob
+from pathlib import Path
+import sys
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from stable_baselines3 import A2C, DQN, PPO
+
+from src.agents.baselines import (
+    CloudOnlyPolicy,
+    EdgeOnlyPolicy,
+    GeneticAlgorithmPolicy,
+    GreedyLatencyPolicy,
+    LocalOnlyPolicy,
+    RandomPolicy,
+)
+from src.core.config import load_config
+from src.core.off_policy import collect_decision_log, concat_decision_logs, evaluate_candidates, load_decision_log, save_decision_log
+from src.training.train_agent import build_training_env
+
+MODEL_CLASSES = {"PPO": PPO, "A2C": A2C, "DQN": DQN}
+BASELINES = {
+    "LocalOnly": LocalOnlyPolicy,
+    "EdgeOnly": EdgeOnlyPolicy,
+    "CloudOnly": CloudOnlyPolicy,
+    "Random": RandomPolicy,
+    "GreedyLatency": GreedyLatencyPolicy,
+    "GeneticAlgorithm": lambda: GeneticAlgorithmPolicy(population_size=10, generations=5),
+}
+
+
+def load_models(spec, device):
+    """{name: model} for one candidate/behavior entry of the config."""
+    if "baseline" in spec:
+        if spec["baseline"] not in BASELINES:
+            raise ValueError(f"Unknown baseline: {spec['baseline']}")
+        return {spec.get("name", spec["baseline"]): BASELINES[spec["baseline"]]()}
+
+    model_class = MODEL_CLASSES[str(spec.get("model_class", "PPO"))]
+    if "checkpoint_glob" in spec:
+        paths = sorted(glob.glob(spec["checkpoint_glob"]))
+        name = spec.get("name", "checkpoint")
+        return {f"{name}:{Path(path).parent.name}/{Path(path).stem}": model_class.load(path, device=device) for path in paths}
+    if not Path(spec["checkpoint"]).exists():
+        raise FileNotFoundError(spec["checkpoint"])
+    return {spec.get("name", Path(spec["checkpoint"]).stem): model_class.load(spec["checkpoint"], device=device)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score candidate policies on logged decisions with off-policy estimators (IS/WIS/DR).")
+    parser.add_argument("--config", default="configs/synthetic/off_policy_evaluation.yaml")
+    parser.add_argument("--log", action="append", default=None, help="Decision log .npz (or glob); overrides logging.log_paths")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    logging_cfg = config.get("logging", {})
+    estimator_cfg = config.get("estimator", {})
+    env_cfg = config.get("env", {})
+    device = str(estimator_cfg.get("device", "cpu"))
+
+    patterns = args.log or logging_cfg.get("log_paths", [])
+    log_paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not log_paths:
+        if not patterns:
+            raise ValueError("No decision log path configured (logging.log_paths)")
+        behavior = next(iter(load_models(logging_cfg.get("behavior", {"baseline": "Random"}), device).values()))
+        env = build_training_env(
+            seed=int(config.get("seed", 42)),
+            max_steps=int(env_cfg.get("max_steps", 50)),
+            num_edge_servers=int(env_cfg.get("num_edge_servers", 3)),
+            num_devices=int(env_cfg.get("num_devices", 5)),
+        )
+        log = collect_decision_log(
+            env,
+            behavior,
+            num_episodes=int(logging_cfg.get("num_episodes", 50)),
+            epsilon=float(logging_cfg.get("epsilon", 0.2)),
+            seed=int(config.get("seed", 42)),
+        )
+        Path(patterns[0]).parent.mkdir(parents=True, exist_ok=True)
+        save_decision_log(patterns[0], log)
+        print(f"[INFO] Collected {len(log)} behavior decisions: {patterns[0]}")
+        log_paths = [patterns[0]]
+    log = concat_decision_logs([load_decision_log(path) for path in log_paths])
+
+    candidates = {}
+    for spec in config.get("candidates", []):
+        try:
+            candidates.update(load_models(spec, device))
+        except FileNotFoundError as exc:
+            print(f"[WARN] Candidate skipped, checkpoint not found: {exc}")
+
+    max_ratio = estimator_cfg.get("max_ratio")
+    result = evaluate_candidates(
+        log,
+        candidates,
+        gamma=float(estimator_cfg.get("gamma", 1.0)),
+        max_ratio=float(max_ratio) if max_ratio is not None else None,
+        ridge=float(estimator_cfg.get("reward_model_ridge", 1.0)),
+        batch_size=int(estimator_cfg.get("batch_size", 4096)),
+    )
+
+    csv_path = Path(config.get("output", {}).get("csv_path", "results/raw/synthetic/off_policy_evaluation/ope_estimates.csv"))
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    result.to_csv(csv_path, index=False)
+    print(result[["policy", "ope_is", "ope_wis", "ope_dr", "ope_ess"]].to_string(index=False))
+    print(f"[INFO] {len(candidates)} candidates scored on {len(log)} logged decisions ({len(log_paths)} logs)")
+    print(f"[INFO] OPE CSV: {csv_path}")
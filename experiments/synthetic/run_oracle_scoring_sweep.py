@@ -0,0 +1,22 @@
+import argparse
+from pathlib import Path
+import sys
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.training.oracle_sweep import run_scoring_sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Label one shared trajectory under many oracle scoring configurations at once.")
+    parser.add_argument("--config", default="configs/synthetic/oracle_scoring_sweep.yaml")
+    args = parser.parse_args()
+
+    result = run_scoring_sweep(args.config)
+    print(f"[INFO] Sweep summary CSV: {result['csv_path']}")
+    print(f"[INFO] Agreement matrix CSV: {result['agreement_csv']}")
+    print(f"[INFO] Configurations: {result['configurations']}")
+    print(f"[INFO] States: {result['states']} ({result['episodes']} episodes)")
@@ -22,6 +22,7 @@ from experiments.synthetic.run_staged_training_comparison import (
     _prepare_final_df,
     run_staged_training_comparison,
 )
+from src.training.multi_teacher_pretraining import run_multi_teacher_pretraining
 from src.training.pretrain_policy import run_supervised_pretraining
 
 ACTION_ORDER = ["local", "edge_25", "edge_50", "edge_75", "edge_100", "cloud"]
@@ -295,10 +296,35 @@ def _write_markdown(report_path: Path, rows: List[Dict[str, object]]) -> None:
     report_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
 
 
+def _teacher_pretrain_config(pretrain_base: dict, teacher_policy: str, slug: str) -> dict:
+    pretrain_cfg = yaml.safe_load(yaml.safe_dump(pretrain_base))
+    pretrain_cfg.setdefault("dataset", {})["teacher_policy"] = teacher_policy
+    pretrain_cfg.setdefault("output", {})["checkpoint_path"] = f"models/ppo/teacher_policy_pretrained/{slug}/ppo_pretrained"
+    pretrain_cfg["output"]["metrics_csv"] = f"results/raw/synthetic/teacher_policy_sensitivity/{slug}/supervised_pretraining_metrics.csv"
+    pretrain_cfg["output"]["report_path"] = None
+    return pretrain_cfg
+
+
+def _run_multi_head_pretraining(pretrain_base: dict, teacher_policies: List[str], config_root: Path) -> Dict[str, Dict[str, str]]:
+    """Pretrain all pending teachers in one batched run (see src.training.multi_teacher_pretraining)."""
+    if not teacher_policies:
+        return {}
+    multi_cfg = yaml.safe_load(yaml.safe_dump(pretrain_base))
+    multi_cfg["multi_teacher"] = {
+        "teacher_policies": list(teacher_policies),
+        "checkpoint_path": "models/ppo/teacher_policy_pretrained/{slug}/ppo_pretrained",
+        "metrics_csv": "results/raw/synthetic/teacher_policy_sensitivity/{slug}/supervised_pretraining_metrics.csv",
+    }
+    multi_tmp = config_root / "supervised_pretraining_multi_teacher.yaml"
+    _write_yaml(multi_tmp, multi_cfg)
+    return run_multi_teacher_pretraining(str(multi_tmp))
+
+
 def run_teacher_policy_sensitivity(
     pretrain_config_path: str = "configs/synthetic/supervised_pretraining.yaml",
     staged_config_path: str = "configs/synthetic/staged_training_comparison.yaml",
     dataset_csv_path: str = "results/raw/synthetic/pretraining/oracle_label_dataset.csv",
+    multi_head_pretraining: bool = False,
 ) -> Dict[str, str]:
     pretrain_base = _load_yaml(Path(pretrain_config_path))
     staged_base = _load_yaml(Path(staged_config_path))
@@ -310,6 +336,10 @@ def run_teacher_policy_sensitivity(
     config_root.mkdir(parents=True, exist_ok=True)
 
     summary_rows: List[Dict[str, object]] = []
+    multi_head_results: Dict[str, Dict[str, str]] = {}
+    if multi_head_pretraining:
+        pending = [teacher for teacher in TEACHER_POLICIES if not _teacher_run_complete(result_root, doc_root, _teacher_slug(teacher))]
+        multi_head_results = _run_multi_head_pretraining(pretrain_base, pending, config_root)
 
     for teacher_policy in TEACHER_POLICIES:
         slug = _teacher_slug(teacher_policy)
@@ -336,14 +366,13 @@ def run_teacher_policy_sensitivity(
             if cached_summary is not None:
                 pretrain_result["test_accuracy"] = float(cached_summary.get("pretrain_test_accuracy", 0.0))
         else:
-            pretrain_cfg = yaml.safe_load(yaml.safe_dump(pretrain_base))
-            pretrain_cfg.setdefault("dataset", {})["teacher_policy"] = teacher_policy
-            pretrain_cfg.setdefault("output", {})["checkpoint_path"] = f"models/ppo/teacher_policy_pretrained/{slug}/ppo_pretrained"
-            pretrain_cfg["output"]["metrics_csv"] = f"results/raw/synthetic/teacher_policy_sensitivity/{slug}/supervised_pretraining_metrics.csv"
-            pretrain_cfg["output"]["report_path"] = None
+            pretrain_cfg = _teacher_pretrain_config(pretrain_base, teacher_policy, slug)
             pretrain_tmp = config_root / f"supervised_pretraining_{slug}.yaml"
             _write_yaml(pretrain_tmp, pretrain_cfg)
-            pretrain_result = run_supervised_pretraining(str(pretrain_tmp))
+            if teacher_policy in multi_head_results:
+                pretrain_result = multi_head_results[teacher_policy]
+            else:
+                pretrain_result = run_supervised_pretraining(str(pretrain_tmp))
 
             staged_cfg = yaml.safe_load(yaml.safe_dump(staged_base))
             staged_cfg.setdefault("pretraining", {})["checkpoint_path"] = pretrain_result["checkpoint_path"]
@@ -414,12 +443,14 @@ if __name__ == "__main__":
     parser.add_argument("--pretrain-config", default="configs/synthetic/supervised_pretraining.yaml")
     parser.add_argument("--staged-config", default="configs/synthetic/staged_training_comparison.yaml")
     parser.add_argument("--dataset-csv", default="results/raw/synthetic/pretraining/oracle_label_dataset.csv")
+    parser.add_argument("--multi-head-pretraining", action="store_true", help="Pretrain all teachers in one batched run instead of one run per teacher")
     args = parser.parse_args()
 
     result = run_teacher_policy_sensitivity(
         pretrain_config_path=args.pretrain_config,
         staged_config_path=args.staged_config,
         dataset_csv_path=args.dataset_csv,
+        multi_head_pretraining=args.multi_head_pretraining,
     )
     print(f"[INFO] Summary CSV: {result['summary_csv']}")
     print(f"[INFO] Report: {result['report_path']}")
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Checks the batched oracle engine against the scalar choose_oracle_action path."""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.config import load_config
+from src.training.oracle_engine import (
+    effective_actions,
+    oracle_state_from_env,
+    predict_action_outcomes,
+    score_outcomes,
+    select_greedy_actions,
+    stack_oracle_states,
+)
+from src.training.pretrain_policy import choose_oracle_action, normalize_teacher_policy_name, resolve_teacher_policy_mode
+from src.training.train_agent import build_training_env
+
+
+class _PinnedChannel:
+    """Replays one datarate draw per (device, edge) until `release` is called.
+
+    The scalar oracle queries the channel once per action; pinning the draw
+    keeps both paths on identical inputs when the channel is stochastic.
+    """
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._cache = {}
+
+    def calculate_datarate(self, device, edge):
+        key = (id(device), id(edge))
+        if key not in self._cache:
+            self._cache[key] = self._channel.calculate_datarate(device, edge)
+        return self._cache[key]
+
+    def release(self):
+        self._cache.clear()
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--config", default="configs/synthetic/oracle_labeling.yaml")
+    parser.add_argument("--episodes", type=int, default=5)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    env_cfg = config.get("env", {})
+    # Greedy labels only: coverage-aware selection depends on the label history.
+    scoring_cfg = {key: value for key, value in config.get("scoring", {}).items() if key != "coverage_aware_selection"}
+    teachers = [normalize_teacher_policy_name(name) for name in config.get("teacher_policies", [])]
+    seed = int(config.get("seed", 42))
+
+    env = build_training_env(
+        seed=seed,
+        max_steps=int(env_cfg.get("max_steps", 50)),
+        num_edge_servers=int(env_cfg.get("num_edge_servers", 3)),
+        num_devices=int(env_cfg.get("num_devices", 5)),
+    )
+    channel = _PinnedChannel(env.channel)
+    env.channel = channel
+
+    states, scalar = [], {teacher: [] for teacher in teachers}
+    scalar_seconds = 0.0
+    for episode_idx in range(args.episodes):
+        env.reset(seed=seed + episode_idx)
+        done = False
+        while not done:
+            states.append(oracle_state_from_env(env))
+            if effective_actions(env) != [0, 1, 2, 3, 4, 5]:
+                raise SystemExit("verification expects the full action space")
+            started = time.perf_counter()
+            decisions = {teacher: choose_oracle_action(env, teacher, scoring_cfg) for teacher in teachers}
+            scalar_seconds += time.perf_counter() - started
+            for teacher, decision in decisions.items():
+                scalar[teacher].append((decision.action, decision.score_margin, decision.predicted_reward))
+            channel.release()
+            _, _, done, _, _ = env.step(decisions[teachers[0]].action)
+
+    batch = stack_oracle_states(states)
+    started = time.perf_counter()
+    outcomes = predict_action_outcomes(
+        batch,
+        success_bonus=getattr(env, "success_bonus", 0.0),
+        disable_mobility_features=env.ablation_flags.get("disable_mobility_features", False),
+    )
+    labels = {}
+    for teacher in teachers:
+        scores = score_outcomes(outcomes, batch, resolve_teacher_policy_mode(teacher), scoring_cfg)
+        labels[teacher] = select_greedy_actions(scores, outcomes)
+    batched_seconds = time.perf_counter() - started
+
+    failures = 0
+    for teacher in teachers:
+        expected = np.asarray(scalar[teacher], dtype=np.float64)
+        actions, margins = labels[teacher]
+        rows = np.arange(len(batch))
+        rewards = outcomes.reward[rows, actions]
+        label_mismatch = int((actions != expected[:, 0]).sum())
+        margin_error = float(np.max(np.abs(margins - expected[:, 1])))
+        reward_error = float(np.max(np.abs(rewards - expected[:, 2])))
+        failures += label_mismatch
+        print(f"{teacher}: {len(batch)} states, label mismatches={label_mismatch}, max |margin diff|={margin_error:.3e}, max |reward diff|={reward_error:.3e}")
+
+    print(f"scalar oracle: {scalar_seconds:.3f}s, batched oracle: {batched_seconds:.3f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
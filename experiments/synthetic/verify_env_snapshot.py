@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""Checks that env snapshot/restore leaves no trace of lookahead rollouts on the real trajectory."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.config import load_config
+from src.training.env_snapshot import restore_env, simulated_rollout, snapshot_env
+from src.training.train_agent import build_training_env
+
+
+def _same(left, right) -> bool:
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(_same(left[key], right[key]) for key in left)
+    if isinstance(left, (list, tuple)) and isinstance(right, (list, tuple)):
+        return len(left) == len(right) and all(_same(a, b) for a, b in zip(left, right))
+    if isinstance(left, (np.ndarray, float, int, np.generic)) and isinstance(right, (np.ndarray, float, int, np.generic)):
+        return np.array_equal(np.asarray(left), np.asarray(right), equal_nan=True)
+    return left == right
+
+
+def _build_env(config, seed: int):
+    env_cfg = config.get("env", {})
+    return build_training_env(
+        seed=seed,
+        max_steps=int(env_cfg.get("max_steps", 50)),
+        num_edge_servers=int(env_cfg.get("num_edge_servers", 3)),
+        num_devices=int(env_cfg.get("num_devices", 5)),
+    )
+
+
+def _run(config, args, probe: bool):
+    """One trajectory with fixed actions; with `probe`, every step is preceded by
+    discarded rollouts and a step -> restore -> step replay."""
+    seed = int(config.get("seed", 42))
+    extra_env_fields = tuple((config.get("lookahead", {}) or {}).get("extra_env_fields", ()) or ())
+    env = _build_env(config, seed)
+    actions = np.random.default_rng(seed)
+    probes = np.random.default_rng(seed + 1)
+    trajectory, replay_failures = [], 0
+    for episode_idx in range(args.episodes):
+        env.reset(seed=seed + episode_idx)
+        done = False
+        while not done:
+            action = int(actions.integers(0, 6))
+            if probe:
+                for _ in range(args.rollouts):
+                    with simulated_rollout(env, extra_env_fields):
+                        for _ in range(args.horizon):
+                            _, _, terminated, truncated, _ = env.step(int(probes.integers(0, 6)))
+                            if terminated or truncated:
+                                break
+                snapshot = snapshot_env(env, extra_env_fields)
+                first = env.step(action)
+                restore_env(env, snapshot)
+                result = env.step(action)
+                if not _same(first, result):
+                    replay_failures += 1
+            else:
+                result = env.step(action)
+            trajectory.append(result)
+            done = bool(result[2] or result[3])
+    return trajectory, replay_failures
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--config", default="configs/synthetic/oracle_labeling.yaml")
+    parser.add_argument("--episodes", type=int, default=5)
+    parser.add_argument("--rollouts", type=int, default=3)
+    parser.add_argument("--horizon", type=int, default=3)
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    reference, _ = _run(config, args, probe=False)
+    probed, replay_failures = _run(config, args, probe=True)
+
+    if len(reference) != len(probed):
+        print(f"trajectory length differs: reference {len(reference)} steps, probed {len(probed)} steps")
+        return 1
+    diverged = [index for index, (left, right) in enumerate(zip(reference, probed)) if not _same(left, right)]
+    print(f"{len(reference)} steps: step -> restore -> step mismatches={replay_failures}, "
+          f"steps diverging from the un-probed trajectory={len(diverged)}"
+          + (f" (first at step {diverged[0]})" if diverged else ""))
+    return 1 if replay_failures or diverged else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""Checks calculate_reward_batch against a frozen copy of the original scalar reward over the whole action space."""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+REPO_ROOT = SCRIPT_DIR.parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from src.core.reward import calculate_reward_batch
+
+SEMANTIC_TARGETS = np.array(["local", "edge", "cloud", "unknown"])
+
+
+def _reference_calculate_reward(
+    action,
+    delay,
+    energy,
+    task,
+    device,
+    local_energy_pred,
+    edge_energy_ratio=None,
+    edge_energy_cost=0.0,
+    success_bonus=0.0,
+):
+    """Scalar calculate_reward as it was before the batched formula; kept frozen as the reference."""
+    reward = 100.0
+    reward -= (delay * 35.0)
+    reward -= (energy * 5.0)
+    reward -= edge_energy_cost * 1.5
+
+    semantic = task.semantic_analysis
+    llm_rec = semantic.get('recommended_target', 'edge') if semantic else 'edge'
+    llm_confidence = semantic.get('confidence', 0.5) if semantic else 0.5
+    conf_factor = llm_confidence if llm_confidence > 0.7 else llm_confidence * 0.4
+
+    if llm_rec == 'local' and action == 0:
+        reward += 20.0 * conf_factor
+    elif llm_rec == 'edge' and 1 <= action <= 4:
+        reward += 15.0 * conf_factor
+    elif llm_rec == 'cloud' and action == 5:
+        reward += 15.0 * conf_factor
+    else:
+        reward -= 12.0 * conf_factor
+
+    priority_score = semantic.get('priority_score', 0.5) if semantic else 0.5
+    size_norm = min(1.0, getattr(task, 'size_bits', 0.0) / 1e7)
+
+    cloud_cost = 30.0 + 18.0 * size_norm
+    if action == 5:
+        reward -= cloud_cost
+        if llm_rec == 'edge':
+            reward -= (14.0 + 8.0 * size_norm) * conf_factor
+    partial_preference = 0.35 + 0.35 * size_norm + 0.30 * priority_score
+
+    deadline = max(0.1, task.deadline)
+    task_success = delay <= deadline
+    if not task_success:
+        reward -= 75.0 * priority_score
+    else:
+        slack_ratio = max(0.0, (deadline - delay) / deadline)
+        reward += 18.0 * slack_ratio * priority_score
+        reward += float(success_bonus)
+
+    battery_pct = (device.battery / 10000.0) * 100.0 if hasattr(device, 'battery') else 100.0
+    if battery_pct < 25.0:
+        severity = (25.0 - battery_pct) / 25.0
+        if action != 0:
+            reward -= 40.0 * (severity ** 2)
+        else:
+            reward += 10.0 * severity
+
+    if 1 <= action <= 4 and edge_energy_ratio is not None and edge_energy_ratio < 0.25:
+        severity = (0.25 - edge_energy_ratio) / 0.25
+        reward -= 35.0 * (severity ** 2)
+
+    if 1 <= action <= 4:
+        local_delay_only = task.cpu_cycles / 1e9
+        if delay < local_delay_only:
+            reward += 12.0 * ((local_delay_only - delay) / local_delay_only)
+
+        reward += 5.0 * (1.0 - energy / max(1e-5, local_energy_pred))
+
+        if llm_rec == 'edge':
+            if action in (1, 2, 3):
+                reward += 10.0 * conf_factor * partial_preference
+                if task_success:
+                    reward += 6.0 * partial_preference
+                if action == 3:
+                    reward += 2.5 * conf_factor
+            elif action == 4:
+                reward += 4.0 * conf_factor * (0.4 + 0.6 * priority_score)
+                reward -= 2.0 * size_norm
+
+    if action == 0 and delay <= deadline:
+        reward += 4.0
+
+    return reward
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    n = args.samples
+    # Every decision is evaluated under all six actions.
+    actions = np.tile(np.arange(6), n)
+    delays = np.repeat(rng.uniform(0.0, 5.0, n), 6)
+    energies = np.repeat(rng.uniform(0.0, 5.0, n), 6)
+    deadlines = np.repeat(rng.choice([0.05, 1.0, 2.5], n), 6)
+    size_bits = np.repeat(rng.uniform(0.0, 3e7, n), 6)
+    cpu_cycles = np.repeat(rng.uniform(1e6, 2e10, n), 6)
+    targets = np.repeat(SEMANTIC_TARGETS[rng.integers(0, len(SEMANTIC_TARGETS), n)], 6)
+    confidences = np.repeat(rng.uniform(0.0, 1.0, n), 6)
+    priority_scores = np.repeat(rng.uniform(0.0, 1.0, n), 6)
+    battery_levels = np.repeat(rng.uniform(0.0, 10000.0, n), 6)
+    local_energy_preds = np.repeat(rng.uniform(0.0, 3.0, n), 6)
+    edge_energy_ratios = np.repeat(rng.uniform(0.0, 1.0, n), 6)
+    edge_energy_costs = np.repeat(rng.uniform(0.0, 2.0, n), 6)
+
+    batched = calculate_reward_batch(
+        actions, delays, energies, deadlines, size_bits, cpu_cycles, targets, confidences, priority_scores,
+        battery_levels, local_energy_preds, edge_energy_ratios=edge_energy_ratios, edge_energy_costs=edge_energy_costs,
+        success_bonus=2.5,
+    )
+    scalar = np.empty_like(batched)
+    for i in range(len(actions)):
+        task = SimpleNamespace(
+            size_bits=size_bits[i],
+            cpu_cycles=cpu_cycles[i],
+            deadline=deadlines[i],
+            semantic_analysis={"recommended_target": str(targets[i]), "confidence": confidences[i], "priority_score": priority_scores[i]},
+        )
+        device = SimpleNamespace(battery=battery_levels[i])
+        scalar[i] = _reference_calculate_reward(
+            int(actions[i]), delays[i], energies[i], task, device, local_energy_preds[i],
+            edge_energy_ratio=edge_energy_ratios[i], edge_energy_cost=edge_energy_costs[i], success_bonus=2.5,
+        )
+
+    for action in range(6):
+        mask = actions == action
+        print(f"action {action}: max |reference - batched| = {np.max(np.abs(scalar[mask] - batched[mask])):.3e}")
+    return 0 if np.array_equal(scalar, batched) else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,181 @@
+"""
+Two-tier cache for SemanticAnalyzer results.
+
+Tier 1 is an in-memory LRU (OrderedDict) of at most `capacity` entries;
+tier 2 is a SQLite file under results/cache that survives across runs, so
+repeated training runs and evaluation seeds reuse earlier LLM analyses.
+A tier-2 hit is promoted into the LRU; an entry evicted from the LRU stays
+on disk.
+
+Keys are built by quantizing every analyze_task input into buckets:
+
+    (task_type, size_mb // 0.5, cpu_ghz // 0.25, deadline_s // 0.1,
+     battery_pct // 5, network_pct // 5, edge_load_pct // 5, cloud_latency_s // 0.05)
+
+with the bucket widths configurable per input (0 keeps the exact value) and
+missing context values kept as None. Tasks in the same bucket share the
+analysis of the first one computed, including its raw_stats. Entries are
+namespaced by backend ("rule_based" or "llm:<model>") so the two never mix;
+rule-based fallbacks for failed LLM generations are not stored under llm:<model>.
+All operations hold one lock, so a cache can be shared with a worker thread.
+"""
+
+import copy
+import json
+import math
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = "results/cache/semantic_analysis.sqlite"
+
+# Bucket width per key input (same units as the prompt: MB, GHz, seconds, percent)
+DEFAULT_BUCKETS = {
+    "size_mb": 0.5,
+    "cpu_ghz": 0.25,
+    "deadline_s": 0.1,
+    "battery_pct": 5.0,
+    "network_pct": 5.0,
+    "edge_load_pct": 5.0,
+    "cloud_latency_s": 0.05,
+}
+
+
+def _bucket(value, width):
+    if value is None:
+        return None
+    value = float(value)
+    if not width:
+        return value
+    return int(math.floor(value / float(width)))
+
+
+class SemanticAnalysisCache:
+    """
+    In-memory LRU backed by a persistent SQLite table.
+
+    Counters: memory_hits, disk_hits, misses, evictions (see stats()).
+    """
+
+    def __init__(self, capacity=4096, path=DEFAULT_CACHE_PATH, buckets=None):
+        """
+        Args:
+            capacity: Maximum number of entries kept in memory
+            path: SQLite file of the persistent tier (None = memory only)
+            buckets: Overrides of DEFAULT_BUCKETS (bucket width per input)
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be >= 1, got {capacity}")
+        unknown = set(buckets or {}) - set(DEFAULT_BUCKETS)
+        if unknown:
+            raise ValueError(f"Unknown cache bucket(s): {sorted(unknown)}")
+        self.capacity = int(capacity)
+        self.buckets = dict(DEFAULT_BUCKETS, **(buckets or {}))
+        self.path = Path(path) if path is not None else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._db = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS analyses ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+            self._db.commit()
+
+    def make_key(self, task, device_battery_pct=None, network_quality_pct=None,
+                 edge_load_pct=None, cloud_latency=None):
+        """Quantized key of one analyze_task call."""
+        task_type = getattr(getattr(task, "task_type", None), "name", str(getattr(task, "task_type", "UNKNOWN")))
+        return json.dumps([
+            task_type,
+            _bucket(task.size_bits / 1e6, self.buckets["size_mb"]),
+            _bucket(task.cpu_cycles / 1e9, self.buckets["cpu_ghz"]),
+            _bucket(task.deadline, self.buckets["deadline_s"]),
+            _bucket(device_battery_pct, self.buckets["battery_pct"]),
+            _bucket(network_quality_pct, self.buckets["network_pct"]),
+            _bucket(edge_load_pct, self.buckets["edge_load_pct"]),
+            _bucket(cloud_latency, self.buckets["cloud_latency_s"]),
+        ])
+
+    def get(self, namespace, key):
+        """Cached analysis (a copy) or None."""
+        with self._lock:
+            return self._get(namespace, key)
+
+    def _get(self, namespace, key):
+        memory_key = (namespace, key)
+        if memory_key in self._memory:
+            self._memory.move_to_end(memory_key)
+            self.memory_hits += 1
+            return copy.deepcopy(self._memory[memory_key])
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT value FROM analyses WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            if row is not None:
+                self.disk_hits += 1
+                value = json.loads(row[0])
+                self._remember(memory_key, value)
+                return copy.deepcopy(value)
+        self.misses += 1
+        return None
+
+    def put(self, namespace, key, value):
+        """Store an analysis in both tiers."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._remember((namespace, key), value)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO analyses (namespace, key, value) VALUES (?, ?, ?)",
+                    (namespace, key, json.dumps(value)),
+                )
+                self._db.commit()
+
+    def _remember(self, memory_key, value):
+        self._memory[memory_key] = value
+        self._memory.move_to_end(memory_key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit/miss/eviction counters and tier sizes."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        with self._lock:
+            disk_entries = self._db.execute("SELECT COUNT(*) FROM analyses").fetchone()[0] if self._db is not None else 0
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": int(disk_entries),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def build_analysis_cache(cache_cfg):
+    """SemanticAnalysisCache from a config dict (enabled, capacity, path, buckets), or None."""
+    if not cache_cfg or not cache_cfg.get("enabled", True):
+        return None
+    return SemanticAnalysisCache(
+        capacity=int(cache_cfg.get("capacity", 4096)),
+        path=cache_cfg.get("path", DEFAULT_CACHE_PATH),
+        buckets=cache_cfg.get("buckets"),
+    )
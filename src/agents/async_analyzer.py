@@ -0,0 +1,182 @@
+"""
+Asynchronous front end for SemanticAnalyzer.
+
+With use_llm=True, SemanticAnalyzer.analyze_task blocks the caller for the
+whole generation. AsyncSemanticAnalyzer hands requests to one worker thread
+that owns the model instead: submit() returns a Future at once, and the
+worker drains the queue in batches of up to `batch_size` requests through
+SemanticAnalyzer.analyze_tasks (one generate call per batch, see
+llm_analyzer).
+
+analyze_task() waits at most `timeout_s` for the LLM result and otherwise
+returns the rule-based analysis. The LLM request keeps running; with an
+analysis cache on the analyzer (see analysis_cache) the late result is stored
+there, so the next request in the same bucket is served without the model.
+Requests already cached complete immediately, and a request whose cache key
+is already in flight shares that request's Future.
+
+stats() exposes the queue depth, timeout rate and LLM latency percentiles.
+"""
+
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+_STOP = object()
+
+
+class AsyncSemanticAnalyzer:
+    """
+    Worker-thread wrapper around a SemanticAnalyzer with a deadline-bounded fallback.
+    """
+
+    def __init__(self, analyzer, timeout_s=0.25, batch_size=8, latency_window=1000):
+        """
+        Args:
+            analyzer: SemanticAnalyzer (typically use_llm=True, with a cache)
+            timeout_s: Default time analyze_task waits for the LLM result
+            batch_size: Maximum number of queued requests per generate call
+            latency_window: Number of recent LLM latencies kept for percentiles
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        self.analyzer = analyzer
+        self.timeout_s = float(timeout_s)
+        self.batch_size = int(batch_size)
+        self.submitted = 0
+        self.cache_hits = 0
+        self.completed = 0
+        self.waited = 0
+        self.timeouts = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=int(latency_window))
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name="semantic-analyzer", daemon=True)
+        self._worker.start()
+
+    def submit(self, task, device_battery_pct=None, network_quality_pct=None,
+               edge_load_pct=None, cloud_latency=None):
+        """Queue one analysis; returns a Future of the analysis dict."""
+        context = {
+            "device_battery_pct": device_battery_pct,
+            "network_quality_pct": network_quality_pct,
+            "edge_load_pct": edge_load_pct,
+            "cloud_latency": cloud_latency,
+        }
+        cache = self.analyzer.cache
+        key = None
+        with self._lock:
+            self.submitted += 1
+            if cache is not None:
+                key = cache.make_key(task, **context)
+                if key in self._in_flight:
+                    return self._in_flight[key]
+                cached = cache.get(self.analyzer._cache_namespace(), key)
+                if cached is not None:
+                    self.cache_hits += 1
+                    future = Future()
+                    future.set_result(cached)
+                    return future
+            future = Future()
+            if key is not None:
+                self._in_flight[key] = future
+        self._queue.put((task, context, key, future, time.perf_counter()))
+        return future
+
+    def analyze_task(self, task, device_battery_pct=None, network_quality_pct=None,
+                     edge_load_pct=None, cloud_latency=None, timeout_s=None):
+        """
+        LLM analysis if it arrives within timeout_s (default self.timeout_s),
+        otherwise the rule-based analysis; the LLM request is not cancelled.
+        """
+        context = {
+            "device_battery_pct": device_battery_pct,
+            "network_quality_pct": network_quality_pct,
+            "edge_load_pct": edge_load_pct,
+            "cloud_latency": cloud_latency,
+        }
+        future = self.submit(task, **context)
+        with self._lock:
+            self.waited += 1
+        try:
+            return future.result(timeout=self.timeout_s if timeout_s is None else timeout_s)
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            method = "Rule-Based Analysis (LLM deadline)"
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            method = "Rule-Based Analysis (LLM error)"
+        result = self.analyzer._rule_based_analyze(task, **context)
+        result["analysis_method"] = method
+        return result
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(item)
+            self._process(batch)
+
+    def _process(self, batch):
+        try:
+            results = self.analyzer.analyze_tasks(
+                [task for task, _, _, _, _ in batch],
+                [context for _, context, _, _, _ in batch],
+                batch_size=self.batch_size,
+                cache_checked=self.analyzer.cache is not None,
+            )
+        except Exception as e:
+            results = [e] * len(batch)
+        finished = time.perf_counter()
+        with self._lock:
+            for (_, _, key, future, submitted_at), result in zip(batch, results):
+                if key is not None:
+                    self._in_flight.pop(key, None)
+                self._latencies.append(finished - submitted_at)
+                self.completed += 1
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def stats(self):
+        """Queue depth, timeout rate and LLM latency percentiles (seconds)."""
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            stats = {
+                "queue_depth": self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "submitted": self.submitted,
+                "cache_hits": self.cache_hits,
+                "completed": self.completed,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+                "timeout_rate": round(self.timeouts / self.waited, 4) if self.waited else 0.0,
+            }
+        for percentile in (50, 95, 99):
+            stats[f"latency_p{percentile}_s"] = round(float(np.percentile(latencies, percentile)), 4) if len(latencies) else 0.0
+        return stats
+
+    def close(self, wait=True):
+        """Stop the worker (after the queued requests when wait=True)."""
+        self._queue.put(_STOP)
+        if wait:
+            self._worker.join()
@@ -9,9 +9,13 @@ Features:
 4. Priority scoring (0-1 scale)
 """
 
+import copy
 import random
 from enum import Enum
 
+from src.agents.analysis_cache import SemanticAnalysisCache, build_analysis_cache
+from src.agents.rule_based_batch import rule_based_analyze_batch
+
 # Optional: Try to import transformers for LLM support
 try:
     from transformers import pipeline, AutoTokenizer, AutoModelForCausalLM
@@ -31,22 +35,51 @@ class TaskPriority(Enum):
     LOW = 0.25          # Best-effort, delay tolerant
 
 
+def _expand_past(past_key_values, batch_size):
+    """
+    Independent copy of a batch-1 key/value cache, repeated to batch_size rows.
+    
+    generate() appends to the cache it is given, so the stored prefix cache is
+    never passed in directly. Handles Cache objects and legacy tuples.
+    """
+    past = copy.deepcopy(past_key_values)
+    if hasattr(past, "batch_repeat_interleave"):
+        if batch_size > 1:
+            past.batch_repeat_interleave(batch_size)
+        return past
+    return tuple(
+        tuple(tensor.repeat_interleave(batch_size, dim=0) for tensor in layer)
+        for layer in past
+    )
+
+
 class SemanticAnalyzer:
     """
     Analyzes tasks semantically to determine priority, complexity, and resource requirements.
     """
     
-    def __init__(self, use_llm=False, model_name="TinyLlama/TinyLlama-1.1B-Chat-v1.0", device=None):
+    def __init__(self, use_llm=False, model_name="TinyLlama/TinyLlama-1.1B-Chat-v1.0", device=None,
+                 cache=None, use_prefix_cache=True, debug=False):
         """
         Initialize the analyzer.
         
         Args:
             use_llm: Whether to use LLM-based analysis (requires transformers)
             model_name: Hugging Face model to use (default: TinyLlama - instruction-tuned and fast)
+            cache: Optional SemanticAnalysisCache, or a config dict for
+                build_analysis_cache (enabled, capacity, path, buckets)
+            use_prefix_cache: Encode the static few-shot prefix once and reuse
+                its key/value cache, so each call only runs the task suffix
+            debug: Print a [DEBUG] line for every analyze_task call
         """
         self.use_llm = use_llm and LLM_AVAILABLE
+        self.model_name = model_name
+        self.cache = cache if cache is None or isinstance(cache, SemanticAnalysisCache) else build_analysis_cache(cache)
         self.model = None
         self.tokenizer = None
+        self.use_prefix_cache = use_prefix_cache
+        self.debug = debug
+        self._prefix_state = None
         self.llm_success_count = 0
         self.rule_based_fallback_count = 0
 
@@ -97,23 +130,126 @@ class SemanticAnalyzer:
                 - recommended_target: str ("local", "edge", "cloud")
                 - confidence: float (0-1, LLM confidence in recommendation)
         """
-
+        
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(task, device_battery_pct, network_quality_pct,
+                                            edge_load_pct, cloud_latency)
+            cached = self.cache.get(self._cache_namespace(), cache_key)
+            if cached is not None:
+                return cached
+        return self._analyze_uncached(task, cache_key, device_battery_pct, network_quality_pct,
+                                      edge_load_pct, cloud_latency)
+    
+    def _analyze_uncached(self, task, cache_key, device_battery_pct=None, network_quality_pct=None,
+                          edge_load_pct=None, cloud_latency=None):
+        """analyze_task after a cache miss: compute and, when cache_key is set, cache the result."""
         # ✅ Track which method is used
         if self.use_llm:
-            print(f"[DEBUG] Using LLM for Task {task.id}")
-            result = self._llm_analyze(task, device_battery_pct, network_quality_pct, 
-                                     edge_load_pct, cloud_latency)
+            if self.debug:
+                print(f"[DEBUG] Using LLM for Task {task.id}")
+            result, parsed = self._llm_analyze(task, device_battery_pct, network_quality_pct, 
+                                               edge_load_pct, cloud_latency)
+            if not parsed:
+                # Fallbacks are not cached: the llm:<model> namespace only holds model output
+                result["analysis_method"] = "Rule-Based Analysis (LLM fallback)"
+                return result
             result["analysis_method"] = "LLM-Based Analysis"  # Analiz yöntemini ekliyoruz
         else:
-            print(f"[DEBUG] Using Rule-Based for Task {task.id}")
+            if self.debug:
+                print(f"[DEBUG] Using Rule-Based for Task {task.id}")
             result = self._rule_based_analyze(task, device_battery_pct, network_quality_pct, 
                                            edge_load_pct, cloud_latency)
             # Increment rule-based counter
             self.rule_based_fallback_count += 1
             result["analysis_method"] = "Rule-Based Analysis"  # Analiz yöntemini ekliyoruz
         
+        if cache_key is not None:
+            self.cache.put(self._cache_namespace(), cache_key, result)
         return result
     
+    def analyze_tasks(self, tasks, contexts=None, batch_size=8, cache_checked=False):
+        """
+        Analyze several tasks; with the LLM, prompts are generated in batches.
+        
+        Each batch of prompts is left-padded and sent to model.generate in one
+        call, then every output is parsed on its own. A task whose output fails
+        to parse (or whose batch raises) gets the rule-based analysis, which is
+        not cached.
+        
+        Args:
+            tasks: List of Task objects (see analyze_task)
+            contexts: Optional list of dicts, one per task, with analyze_task's
+                context keywords (device_battery_pct, network_quality_pct,
+                edge_load_pct, cloud_latency)
+            batch_size: Number of prompts per model.generate call
+            cache_checked: The caller already looked every task up in the
+                cache and missed; skip the lookup so each miss is counted once
+                (results are still cached)
+        
+        Returns:
+            list of analysis dicts (as analyze_task), in task order
+        """
+        tasks = list(tasks)
+        contexts = [dict(context or {}) for context in contexts] if contexts is not None else [{} for _ in tasks]
+        if len(contexts) != len(tasks):
+            raise ValueError(f"Expected {len(tasks)} contexts, got {len(contexts)}")
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        
+        if not self.use_llm:
+            if cache_checked:
+                return [self._analyze_uncached(task, self.cache.make_key(task, **context) if self.cache is not None else None, **context)
+                        for task, context in zip(tasks, contexts)]
+            return [self.analyze_task(task, **context) for task, context in zip(tasks, contexts)]
+        
+        # Cache hits are served directly; of several misses with one key only the first is generated
+        results = [None] * len(tasks)
+        pending = {}
+        for index, (task, context) in enumerate(zip(tasks, contexts)):
+            key = self.cache.make_key(task, **context) if self.cache is not None else index
+            if self.cache is not None and not cache_checked and key not in pending:
+                results[index] = self.cache.get(self._cache_namespace(), key)
+            if results[index] is None:
+                pending.setdefault(key, []).append(index)
+        
+        keys = list(pending)
+        for start in range(0, len(keys), batch_size):
+            batch_keys = keys[start:start + batch_size]
+            firsts = [pending[key][0] for key in batch_keys]
+            analyses = self._llm_analyze_batch([tasks[index] for index in firsts],
+                                               [contexts[index] for index in firsts])
+            for key, (result, parsed) in zip(batch_keys, analyses):
+                if parsed:
+                    result["analysis_method"] = "LLM-Based Analysis"
+                    if self.cache is not None:
+                        self.cache.put(self._cache_namespace(), key, result)
+                else:
+                    result["analysis_method"] = "Rule-Based Analysis (LLM fallback)"
+                for position, index in enumerate(pending[key]):
+                    results[index] = result if position == 0 else copy.deepcopy(result)
+        return results
+    
+    def analyze_task_arrays(self, task_types, size_bits, cpu_cycles, deadlines,
+                            device_battery_pct=None, network_quality_pct=None, edge_load_pct=None):
+        """
+        Rule-based analysis of N tasks given as arrays (no LLM, no per-task dicts).
+        
+        See rule_based_batch.rule_based_analyze_batch for the returned arrays;
+        rule_based_batch.rule_based_reasons builds reason strings on demand.
+        """
+        analysis = rule_based_analyze_batch(task_types, size_bits, cpu_cycles, deadlines,
+                                            device_battery_pct, network_quality_pct, edge_load_pct)
+        self.rule_based_fallback_count += len(analysis["rule"])
+        return analysis
+    
+    def _cache_namespace(self):
+        return f"llm:{self.model_name}" if self.use_llm else "rule_based"
+    
+    def cache_stats(self):
+        """Hit/miss/eviction counters of the analysis cache (empty without a cache)."""
+        return self.cache.stats() if self.cache is not None else {}
+    
     def _rule_based_analyze(self, task, device_battery_pct=None, network_quality_pct=None, 
                            edge_load_pct=None, cloud_latency=None):
         """
@@ -210,14 +346,14 @@ class SemanticAnalyzer:
             }
         }
     
-    def _llm_analyze(self, task, device_battery_pct=None, network_quality_pct=None, 
-                    edge_load_pct=None, cloud_latency=None):
-        """
-        LLM-based semantic analysis using Few-Shot Prompting (instruction-tuned model).
-        Now with context-aware decision making (OPTION B).
-        
-        Few-Shot Examples help the model understand the expected format and reasoning.
-        """
+    def _build_prompt(self, task, device_battery_pct=None, network_quality_pct=None,
+                      edge_load_pct=None, cloud_latency=None):
+        """Few-shot prompt for one task and its context (ends with "Analysis:")."""
+        return self._prompt_prefix() + self._prompt_suffix(task, device_battery_pct, network_quality_pct,
+                                                           edge_load_pct, cloud_latency)
+    
+    def _prompt_prefix(self):
+        """Static part of the prompt (instruction + few-shot examples), identical for every task."""
         
         # Few-Shot Examples (talimat izletme örnekleri) - Now with context
         few_shot_examples = """
@@ -258,6 +394,19 @@ Analysis:
 - Reason: Trivial computational load BUT battery critically low (8%). Must use LOCAL to preserve device power. Freeing network resources not a concern here.
 """
         
+        # Construct few-shot prompt for TinyLlama (instruction-tuned)
+        return f"""You are an IoT Task Offloading Analyzer. Your job is to analyze tasks and recommend where they should execute (local, edge, or cloud).
+You can output your analysis in standard format, but prefer providing a valid JSON object block containing the keys: "priority_score", "urgency", "complexity", "bandwidth_need", "recommended_target", "confidence", "reason".
+
+{few_shot_examples}
+
+[NEW TASK TO ANALYZE]
+"""
+    
+    def _prompt_suffix(self, task, device_battery_pct=None, network_quality_pct=None,
+                       edge_load_pct=None, cloud_latency=None):
+        """Task-specific part of the prompt, appended to _prompt_prefix()."""
+        
         # ✅ OPTION B: Context-aware prompt
         context_str = ""
         if device_battery_pct is not None:
@@ -271,39 +420,34 @@ Analysis:
         
         context_str = context_str.rstrip(", ") if context_str else "Standard conditions"
         
-        # Construct few-shot prompt for TinyLlama (instruction-tuned)
-        prompt = f"""You are an IoT Task Offloading Analyzer. Your job is to analyze tasks and recommend where they should execute (local, edge, or cloud).
-You can output your analysis in standard format, but prefer providing a valid JSON object block containing the keys: "priority_score", "urgency", "complexity", "bandwidth_need", "recommended_target", "confidence", "reason".
-
-{few_shot_examples}
-
-[NEW TASK TO ANALYZE]
-Input: Task Type: {task.task_type.name}, Size: {task.size_bits / 1e6:.2f} MB, CPU: {task.cpu_cycles / 1e9:.2f} GHz, Deadline: {task.deadline:.2f} seconds
+        prompt = f"""Input: Task Type: {task.task_type.name}, Size: {task.size_bits / 1e6:.2f} MB, CPU: {task.cpu_cycles / 1e9:.2f} GHz, Deadline: {task.deadline:.2f} seconds
 Context: {context_str}
 
 Analysis:"""
+        return prompt
+
+    def _llm_analyze(self, task, device_battery_pct=None, network_quality_pct=None, 
+                    edge_load_pct=None, cloud_latency=None):
+        """
+        LLM-based semantic analysis using Few-Shot Prompting (instruction-tuned model).
+        Now with context-aware decision making (OPTION B).
+        
+        Few-Shot Examples help the model understand the expected format and reasoning.
+        
+        Returns:
+            (analysis, parsed): parsed is False when generation or parsing failed
+            and analysis is the rule-based fallback
+        """
+        context = {
+            "device_battery_pct": device_battery_pct,
+            "network_quality_pct": network_quality_pct,
+            "edge_load_pct": edge_load_pct,
+            "cloud_latency": cloud_latency,
+        }
         
         try:
-            # Tokenize with attention to max_length
-            inputs = self.tokenizer(
-                prompt, 
-                return_tensors="pt", 
-                max_length=1500, 
-                truncation=True,
-                padding=True
-            ).to(self.device) # <--- .to(self.device) ekleyerek veriyi GPU'ya taşıyoruz.
-            
-            with torch.no_grad():
-                # Ayrıca sadece input_ids yerine **inputs kullanarak 
-                # attention_mask gibi diğer gerekli verileri de modele iletmek daha sağlıklıdır.
-                outputs = self.model.generate(
-                    **inputs, # input_ids yerine tüm sözlüğü (unpacked) gönderiyoruz
-                    max_new_tokens=150,  # Increased for full analysis
-                    temperature=0.3,      # Lower temperature for consistency
-                    top_p=0.9,
-                    do_sample=True,
-                    eos_token_id=self.tokenizer.eos_token_id
-                )
+            # Tokenized prompt (or task suffix + cached prefix), already on self.device
+            outputs = self._generate([task], [context])
 
             
             # Neden **inputs kullanmalısınız?
@@ -328,19 +472,160 @@ Analysis:"""
             if parsed:
                 self.llm_success_count += 1
                 print(f"[LLM] ✓ Successful analysis for Task {task.id}")
-                return parsed
+                return parsed, True
             else:
                 # Parsing failed, use rule-based fallback
                 self.rule_based_fallback_count += 1
                 print(f"[LLM] ✗ Parsing failed for Task {task.id}, using rule-based fallback")
                 return self._rule_based_analyze(task, device_battery_pct, network_quality_pct, 
-                                               edge_load_pct, cloud_latency)
+                                               edge_load_pct, cloud_latency), False
             
         except Exception as e:
             self.rule_based_fallback_count += 1
             print(f"[LLM] Exception during analysis: {e}. Using rule-based fallback.")
             return self._rule_based_analyze(task, device_battery_pct, network_quality_pct, 
-                                           edge_load_pct, cloud_latency)
+                                           edge_load_pct, cloud_latency), False
+    
+    def _generation_kwargs(self):
+        """Sampling settings shared by single and batched generation."""
+        return {
+            "max_new_tokens": 150,  # Increased for full analysis
+            "temperature": 0.3,     # Lower temperature for consistency
+            "top_p": 0.9,
+            "do_sample": True,
+            "eos_token_id": self.tokenizer.eos_token_id,
+            "pad_token_id": self.tokenizer.pad_token_id,
+        }
+    
+    def _generate(self, tasks, contexts):
+        """
+        model.generate over a batch of tasks.
+        
+        If a call with the prefix cache raises (e.g. a transformers version or
+        model that does not accept past_key_values), the prefix cache is turned
+        off for good and the batch is retried once with full prompts.
+        """
+        inputs = self._model_inputs(tasks, contexts)
+        try:
+            with torch.no_grad():
+                # Ayrıca sadece input_ids yerine **inputs kullanarak 
+                # attention_mask gibi diğer gerekli verileri de modele iletmek daha sağlıklıdır.
+                return self.model.generate(
+                    **inputs, # input_ids yerine tüm sözlüğü (unpacked) gönderiyoruz
+                    **self._generation_kwargs()
+                )
+        except Exception as e:
+            if "past_key_values" not in inputs:
+                raise
+            print(f"[LLM] Generation with the prefix cache failed: {e}. Encoding full prompts.")
+            self.use_prefix_cache = False
+            self._prefix_state = None
+        
+        inputs = self._model_inputs(tasks, contexts)
+        with torch.no_grad():
+            return self.model.generate(**inputs, **self._generation_kwargs())
+    
+    def _model_inputs(self, tasks, contexts):
+        """
+        generate() inputs for a batch of tasks, on self.device.
+        
+        With the prefix cache, only the task suffixes are tokenized and the
+        cached prefix key/values are passed as past_key_values, so the model
+        runs over the suffix tokens alone. Otherwise the full prompts are
+        tokenized and left-padded; the attention mask hides the padding.
+        """
+        if self.use_prefix_cache:
+            try:
+                return self._prefix_cached_inputs(tasks, contexts)
+            except Exception as e:
+                print(f"[LLM] Prefix cache unavailable: {e}. Encoding full prompts.")
+                self.use_prefix_cache = False
+                self._prefix_state = None
+        
+        prompts = [self._build_prompt(task, **context) for task, context in zip(tasks, contexts)]
+        padding_side = self.tokenizer.padding_side
+        self.tokenizer.padding_side = "left"
+        try:
+            inputs = self.tokenizer(
+                prompts,
+                return_tensors="pt",
+                max_length=1500,
+                truncation=True,
+                padding=True
+            )
+        finally:
+            self.tokenizer.padding_side = padding_side
+        return dict(inputs.to(self.device))
+    
+    def _encode_prefix(self):
+        """Token ids and past key/values of the static prompt prefix (computed once)."""
+        if self._prefix_state is None:
+            prefix_ids = self.tokenizer(self._prompt_prefix(), return_tensors="pt").input_ids.to(self.device)
+            with torch.no_grad():
+                past = self.model(input_ids=prefix_ids, use_cache=True).past_key_values
+            self._prefix_state = (prefix_ids, past)
+        return self._prefix_state
+    
+    def _prefix_cached_inputs(self, tasks, contexts):
+        """
+        [prefix | padding | suffix] rows with a copy of the prefix cache per row.
+        
+        The padding sits between the shared prefix and each suffix, masked out,
+        so every row can reuse the same prefix key/values; position ids follow
+        the attention mask, so each suffix continues right after the prefix.
+        """
+        prefix_ids, past = self._encode_prefix()
+        suffixes = [
+            self.tokenizer(self._prompt_suffix(task, **context), add_special_tokens=False).input_ids
+            for task, context in zip(tasks, contexts)
+        ]
+        width = max(len(ids) for ids in suffixes)
+        pad_id = self.tokenizer.pad_token_id
+        suffix_ids = torch.tensor([[pad_id] * (width - len(ids)) + list(ids) for ids in suffixes], dtype=torch.long)
+        suffix_mask = torch.tensor([[0] * (width - len(ids)) + [1] * len(ids) for ids in suffixes], dtype=torch.long)
+        batch = len(suffixes)
+        input_ids = torch.cat([prefix_ids.expand(batch, -1), suffix_ids.to(self.device)], dim=1)
+        attention_mask = torch.cat([torch.ones_like(prefix_ids).expand(batch, -1), suffix_mask.to(self.device)], dim=1)
+        return {
+            "input_ids": input_ids,
+            "attention_mask": attention_mask,
+            "past_key_values": _expand_past(past, batch),
+        }
+    
+    def _llm_analyze_batch(self, tasks, contexts):
+        """
+        One model.generate call for a batch of tasks.
+        
+        Decoder-only models continue from the last position of every row, so the
+        prompts are padded on the left (see _model_inputs).
+        
+        Returns:
+            list of (analysis, parsed) per task, as _llm_analyze
+        """
+        try:
+            outputs = self._generate(tasks, contexts)
+            responses = self.tokenizer.batch_decode(outputs, skip_special_tokens=True)
+        except Exception as e:
+            print(f"[LLM] Exception during batch analysis: {e}. Using rule-based fallback.")
+            responses = [None] * len(tasks)
+        
+        results = []
+        parsed_count = 0
+        for task, context, response in zip(tasks, contexts, responses):
+            parsed = None
+            if response is not None:
+                analysis_text = response.split("Analysis:")[-1] if "Analysis:" in response else response
+                parsed = self._parse_llm_response(analysis_text, task)
+            if parsed:
+                self.llm_success_count += 1
+                parsed_count += 1
+                results.append((parsed, True))
+            else:
+                self.rule_based_fallback_count += 1
+                results.append((self._rule_based_analyze(task, **context), False))
+        
+        print(f"[LLM] Batch of {len(tasks)}: {parsed_count} parsed, {len(tasks) - parsed_count} rule-based fallback")
+        return results
     
     def _parse_llm_response(self, analysis_text, task):
         """
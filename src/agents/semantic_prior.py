@@ -1,18 +1,19 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+
 import numpy as np
 
-def generate_action_prior(semantic_analysis):
+from src.utils.explanation_bank import ExplanationBankWriter
+
+PRIOR_CONFIDENCE_STEPS = 100  # confidence quantized to 0.01
+PRIOR_TARGET_INDEX = {'local': 0, 'edge': 1, 'cloud': 2}  # any other target uses the edge row
+
+def _compute_action_prior(target, conf):
     """
-    Converts semantic analysis (recommendation and confidence) into a 6D probability distribution over actions.
+    Converts a recommendation and confidence into a 6D probability distribution over actions.
     Indices: [Local, Edge_25, Edge_50, Edge_75, Edge_100, Cloud]
-    This replaces the naive one-hot encoding, providing the RL agent with a 'Semantic Prior' distribution.
     """
-    # Default uniform distribution if no analysis
-    if not semantic_analysis:
-        return np.ones(6) / 6.0
-        
-    target = semantic_analysis.get('recommended_target', 'edge')
-    conf = semantic_analysis.get('confidence', 0.5)
-    
     # Extract structural constraints safely
     conf = max(0.0, min(1.0, conf)) # clamp 0-1
     
@@ -37,18 +38,95 @@ def generate_action_prior(semantic_analysis):
     prior = prior / np.sum(prior)
     return prior.astype(np.float32)
 
+def _build_prior_table():
+    table = np.empty((len(PRIOR_TARGET_INDEX), PRIOR_CONFIDENCE_STEPS + 1, 6), dtype=np.float32)
+    for target, row in PRIOR_TARGET_INDEX.items():
+        for step in range(PRIOR_CONFIDENCE_STEPS + 1):
+            table[row, step] = _compute_action_prior(target, step / PRIOR_CONFIDENCE_STEPS)
+    table.setflags(write=False)
+    return table
+
+# (target, quantized confidence) -> prior; rows are shared and read-only
+ACTION_PRIOR_TABLE = _build_prior_table()
+UNIFORM_PRIOR = np.ones(6) / 6.0
+UNIFORM_PRIOR.setflags(write=False)
+
+def generate_action_prior(semantic_analysis):
+    """
+    Converts semantic analysis (recommendation and confidence) into a 6D probability distribution over actions.
+    Indices: [Local, Edge_25, Edge_50, Edge_75, Edge_100, Cloud]
+    This replaces the naive one-hot encoding, providing the RL agent with a 'Semantic Prior' distribution.
+    Looked up from ACTION_PRIOR_TABLE; the returned array is a read-only view.
+    """
+    # Default uniform distribution if no analysis
+    if not semantic_analysis:
+        return UNIFORM_PRIOR
+        
+    target = semantic_analysis.get('recommended_target', 'edge')
+    conf = max(0.0, min(1.0, semantic_analysis.get('confidence', 0.5)))
+    return ACTION_PRIOR_TABLE[PRIOR_TARGET_INDEX.get(target, 1), int(round(conf * PRIOR_CONFIDENCE_STEPS))]
+
+def generate_action_priors(targets, confidences):
+    """
+    Batched generate_action_prior: arrays of targets and confidences -> (N, 6) float32 prior matrix.
+    targets may hold 'local'/'edge'/'cloud' strings or integer codes (0 local, 2 cloud, anything else edge).
+    """
+    targets = np.asarray(targets)
+    if targets.dtype.kind in ('i', 'u'):
+        rows = np.where(targets == 0, 0, np.where(targets == 2, 2, 1))
+    else:
+        rows = np.where(targets == 'local', 0, np.where(targets == 'cloud', 2, 1))
+    steps = np.rint(np.clip(np.asarray(confidences, dtype=np.float64), 0.0, 1.0) * PRIOR_CONFIDENCE_STEPS).astype(np.intp)
+    return ACTION_PRIOR_TABLE[rows, steps]
+
+_EXPLANATION_BANK = None
+_EXPLANATION_BANK_PID = None
+_EXPLANATION_BANK_KWARGS = {}
+_EXPLANATION_LOGGING_SUSPENDED = 0
+
+def configure_explanation_bank(**kwargs):
+    """
+    Sets ExplanationBankWriter options (buffer_size, flush_interval, sample_rate,
+    max_bytes, backup_count, compress, background_flush, ...) for later logging.
+    """
+    global _EXPLANATION_BANK
+    if _EXPLANATION_BANK is not None and _EXPLANATION_BANK_PID == os.getpid():
+        _EXPLANATION_BANK.close()
+    _EXPLANATION_BANK = None
+    _EXPLANATION_BANK_KWARGS.clear()
+    _EXPLANATION_BANK_KWARGS.update(kwargs)
+
+def get_explanation_bank():
+    """Process-local writer; a forked worker gets its own instead of the parent's buffer."""
+    global _EXPLANATION_BANK, _EXPLANATION_BANK_PID
+    if _EXPLANATION_BANK is None or _EXPLANATION_BANK_PID != os.getpid():
+        _EXPLANATION_BANK = ExplanationBankWriter(**_EXPLANATION_BANK_KWARGS)
+        _EXPLANATION_BANK_PID = os.getpid()
+    return _EXPLANATION_BANK
+
+def flush_explanation_bank():
+    """Flushes buffered explanations; call at episode end."""
+    if _EXPLANATION_BANK is not None and _EXPLANATION_BANK_PID == os.getpid():
+        _EXPLANATION_BANK.flush()
+
+@contextmanager
+def suspend_explanation_logging():
+    """Drops log_semantic_explanation calls inside the block (simulated env steps)."""
+    global _EXPLANATION_LOGGING_SUSPENDED
+    _EXPLANATION_LOGGING_SUSPENDED += 1
+    try:
+        yield
+    finally:
+        _EXPLANATION_LOGGING_SUSPENDED -= 1
+
 def log_semantic_explanation(task, action, prior):
     """
     Creates a detailed explanation log of the task, LLM prior, and chosen action.
     This builds an Experience Bank for Phase 10 reflection or analysis.
+    Entries go through the buffered, rotating writer from get_explanation_bank().
     """
-    import json
-    import os
-    from datetime import datetime
-    
-    log_dir = "phase_reports/semantic_logs"
-    os.makedirs(log_dir, exist_ok=True)
-    
+    if _EXPLANATION_LOGGING_SUSPENDED:
+        return
     semantic = task.semantic_analysis if task.semantic_analysis else {}
     log_entry = {
         "timestamp": datetime.now().isoformat(),
@@ -60,7 +138,4 @@ def log_semantic_explanation(task, action, prior):
         "produced_prior": [round(float(p), 4) for p in prior],
         "final_action_taken": int(action)
     }
-    
-    log_path = os.path.join(log_dir, "explanation_bank.jsonl")
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry) + "\n")
+    get_explanation_bank().write(log_entry)
@@ -10,10 +10,12 @@ class DataLoader:
     """
     
     @staticmethod
-    def load_google_cluster_trace(filepath=None, num_tasks=1000):
+    def load_google_cluster_trace(filepath=None, num_tasks=1000, workload_model_path=None):
         """
         Loads task attributes from Google Cluster Trace CSV.
         If filepath is None or file doesn't exist, generates mock data.
+        With workload_model_path, mock data is sampled from a fitted
+        WorkloadModel instead of the hand-picked distributions.
         
         Expected CSV format:
         timestamp,task_id,cpu_request,memory_request,task_type
@@ -39,12 +41,32 @@ class DataLoader:
                 if 'cpu_request' in df.columns:
                     df['cpu_request'] = df['cpu_request'] * 1e9  # Convert to cycles
                 
+                # The trace names the RAM column memory_request
+                if 'ram_request' not in df.columns and 'memory_request' in df.columns:
+                    df['ram_request'] = df['memory_request']
+                
                 print(f"Loaded {len(df)} real tasks from CSV")
                 return df
                 
             except Exception as e:
                 print(f"Error loading CSV: {e}. Falling back to mock data.")
         
+        if workload_model_path and os.path.exists(workload_model_path):
+            from src.core.workload_model import WorkloadModel
+
+            print(f"Sampling Google Cluster Trace from workload model ({num_tasks} tasks)...")
+            columns = WorkloadModel.load(workload_model_path).sample_arrays(num_tasks)
+            priority_to_type = np.array(['IOT_SENSING', 'VIDEO_TRANSCODE', 'AI_INFERENCE', 'CRITICAL_HEALTH'])
+            return pd.DataFrame({
+                'task_id': columns['task_id'],
+                'submit_time': columns['arrival_time'],
+                'cpu_request': columns['cpu_cycles'].astype(np.float64),
+                'ram_request': columns['data_size'].astype(np.float64),
+                'task_type': priority_to_type[columns['priority']],
+                'deadline': columns['deadline'],
+                'priority': columns['priority'],
+            })
+
         # Fallback to Mock Data
         print(f"Generating MOCK Google Cluster Trace ({num_tasks} tasks)...")
         
@@ -130,9 +152,76 @@ class DataLoader:
                 path.append((x, y))
             
             mobility_traces[user_id] = path
-            
+
         return mobility_traces
-    
+
+    @staticmethod
+    def load_didi_gaia_mobility_frame(filepath=None, num_users=20, duration=1000):
+        """
+        Loads Didi Gaia mobility as a long, time-indexed DataFrame.
+        Unlike load_didi_gaia_mobility, timestamps are kept so that trajectories
+        can be joined against task submit times.
+
+        Returns: pandas DataFrame with columns:
+        - user_id: Trajectory owner (used as device_id in the join)
+        - timestamp: Fix time (seconds, shifted so the earliest fix is 0)
+        - x, y: Position in the 0-1000 simulation space
+        """
+
+        if filepath and os.path.exists(filepath):
+            print(f"Loading REAL Didi Gaia Mobility frame from: {filepath}")
+            try:
+                df = pd.read_csv(filepath, usecols=['user_id', 'timestamp', 'latitude', 'longitude'])
+
+                users = df['user_id'].drop_duplicates().iloc[:num_users]
+                df = df[df['user_id'].isin(users)]
+
+                # Same per-user normalization as load_didi_gaia_mobility, vectorized
+                grouped = df.groupby('user_id', sort=False)
+                lat_min = grouped['latitude'].transform('min')
+                lat_span = (grouped['latitude'].transform('max') - lat_min).replace(0, np.nan)
+                lon_min = grouped['longitude'].transform('min')
+                lon_span = (grouped['longitude'].transform('max') - lon_min).replace(0, np.nan)
+
+                frame = pd.DataFrame({
+                    'user_id': df['user_id'].to_numpy(),
+                    'timestamp': (df['timestamp'] - df['timestamp'].min()).to_numpy(dtype=np.float64),
+                    'x': ((df['latitude'] - lat_min) / lat_span * 1000).fillna(500.0).to_numpy(),
+                    'y': ((df['longitude'] - lon_min) / lon_span * 1000).fillna(500.0).to_numpy(),
+                })
+                print(f"Loaded {len(frame)} mobility fixes for {frame['user_id'].nunique()} users")
+                return frame
+
+            except Exception as e:
+                print(f"Error loading CSV: {e}. Falling back to mock data.")
+
+        # Mock trajectories are sampled once per simulated second
+        mobility_traces = DataLoader.load_didi_gaia_mobility(num_users=num_users, duration=duration)
+        return DataLoader.mobility_traces_to_frame(mobility_traces)
+
+    @staticmethod
+    def mobility_traces_to_frame(mobility_traces, step_seconds=1.0):
+        """
+        Converts the UserID -> [(x, y), ...] mapping returned by
+        load_didi_gaia_mobility into the long frame used by the trace join.
+        Point i of every path is stamped with i * step_seconds.
+        """
+        user_ids = list(mobility_traces.keys())
+        lengths = np.array([len(mobility_traces[user_id]) for user_id in user_ids], dtype=np.int64)
+        if lengths.sum() == 0:
+            return pd.DataFrame({'user_id': [], 'timestamp': [], 'x': [], 'y': []})
+
+        points = np.concatenate([np.asarray(mobility_traces[user_id], dtype=np.float64).reshape(-1, 2) for user_id in user_ids])
+        offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+        steps = np.arange(int(lengths.sum()), dtype=np.int64) - offsets
+
+        return pd.DataFrame({
+            'user_id': np.repeat(np.asarray(user_ids), lengths),
+            'timestamp': steps * float(step_seconds),
+            'x': points[:, 0],
+            'y': points[:, 1],
+        })
+
     @staticmethod
     def save_sample_csv_format():
         """
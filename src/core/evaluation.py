@@ -1,11 +1,14 @@
 ﻿import csv
 import os
 import uuid
+from contextlib import nullcontext
 from datetime import datetime
 
 import numpy as np
 import pandas as pd
 
+from src.core.reward import RewardTermRecorder
+
 
 EXPERIMENT_LOG_COLUMNS = [
     "run_id",
@@ -62,27 +65,8 @@ def normalize_experiment_csv(csv_path="results/raw/experiment_results.csv"):
         writer.writerows(rows)
 
 
-def evaluate_policy(
-    env,
-    model,
-    num_episodes=5,
-    run_name="Baseline",
-    semantic_mode="None",
-    config_seed=42,
-    extra_fields=None,
-    csv_path="results/raw/experiment_results.csv",
-):
-    print(f"[EVAL] Starting evaluation: {run_name} ({num_episodes} episodes)")
-
-    is_sb3 = _is_sb3_model(model)
-    if is_sb3:
-        print(f"[EVAL] SB3 model detected: {run_name}")
-    else:
-        print(f"[EVAL] Custom baseline model detected: {run_name}")
-
+def _run_evaluation_episodes(env, model, num_episodes, is_sb3, action_counts, recorder=None):
     results = []
-    action_counts = {index: 0 for index in range(6)}
-
     for _ in range(num_episodes):
         obs, _ = env.reset()
         done = False
@@ -115,6 +99,9 @@ def evaluate_policy(
         success_rate = episode_successes / max(1, step_count)
         qoe = 100.0 * success_rate - (p95_latency * 5.0)
 
+        if recorder is not None:
+            recorder.end_episode()
+
         results.append(
             {
                 "reward": float(episode_reward),
@@ -126,6 +113,45 @@ def evaluate_policy(
             }
         )
 
+    return results
+
+
+def evaluate_policy(
+    env,
+    model,
+    num_episodes=5,
+    run_name="Baseline",
+    semantic_mode="None",
+    config_seed=42,
+    extra_fields=None,
+    csv_path="results/raw/experiment_results.csv",
+    reward_terms_path=None,
+):
+    """
+    Runs the policy for num_episodes and appends one summary row to csv_path.
+    With reward_terms_path, the reward terms of every env step are recorded
+    (see src.core.reward.RewardTermRecorder) and saved there as one
+    structured array per episode.
+    """
+    print(f"[EVAL] Starting evaluation: {run_name} ({num_episodes} episodes)")
+
+    recorder = RewardTermRecorder() if reward_terms_path else None
+    recorder_context = recorder.active() if recorder is not None else nullcontext()
+
+    is_sb3 = _is_sb3_model(model)
+    if is_sb3:
+        print(f"[EVAL] SB3 model detected: {run_name}")
+    else:
+        print(f"[EVAL] Custom baseline model detected: {run_name}")
+
+    action_counts = {index: 0 for index in range(6)}
+
+    with recorder_context:
+        results = _run_evaluation_episodes(env, model, num_episodes, is_sb3, action_counts, recorder)
+    if recorder is not None:
+        recorder.save(reward_terms_path)
+        print(f"[EVAL] Reward terms saved: {reward_terms_path}")
+
     avg_reward = float(np.mean([row["reward"] for row in results]))
     avg_success = float(np.mean([row["success_rate"] for row in results]))
     avg_p95_latency = float(np.mean([row["p95_latency"] for row in results]))
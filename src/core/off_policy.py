@@ -0,0 +1,281 @@
+"""
+Off-policy evaluation (OPE) of candidate policies from logged decisions.
+
+A decision log holds, for every env step of a behavior policy, the observation,
+the executed action, the reward and the probability the behavior policy gave
+that action. collect_decision_log writes such logs from any SB3 model or
+baseline, mixed with epsilon-uniform exploration so every action has support.
+
+Candidates (SB3 checkpoints or baselines) are scored without new rollouts.
+Their action probabilities on the logged observations are stacked into one
+(M, N, A) tensor and all M candidates are estimated in the same pass:
+
+    trajectory:  is (per-decision importance sampling), wis (weighted
+                 per-decision IS), dr (per-decision doubly robust)
+    step:        step_is / step_wis / step_dr treat every decision as a
+                 contextual bandit (lower variance, ignores state-distribution
+                 shift; use for ranking only)
+    dm:          direct method with the fitted reward model
+    ess:         effective sample size of the trajectory weights; a small
+                 value means the log says little about that candidate
+
+The reward model for dm/dr is a per-action ridge regression of the immediate
+reward on the observation. Typical use: screen many checkpoints here, then run
+evaluate_policy only on the best few.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Mapping
+
+import numpy as np
+import pandas as pd
+import torch
+
+from src.agents.baselines import RandomPolicy
+from src.core.evaluation import _is_sb3_model
+
+ACTION_DIM = 6
+DECISION_LOG_FIELDS = ("observations", "actions", "rewards", "behavior_probs", "episode_index")
+
+
+@dataclass
+class DecisionLog:
+    observations: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    behavior_probs: np.ndarray
+    episode_index: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+
+def save_decision_log(path, log: DecisionLog) -> None:
+    np.savez_compressed(path, **{name: getattr(log, name) for name in DECISION_LOG_FIELDS})
+
+
+def load_decision_log(path) -> DecisionLog:
+    with np.load(path) as data:
+        missing = [name for name in DECISION_LOG_FIELDS if name not in data.files]
+        if missing:
+            raise ValueError(f"{path} is not a decision log; missing arrays: {missing}")
+        return DecisionLog(**{name: data[name] for name in DECISION_LOG_FIELDS})
+
+
+def concat_decision_logs(logs) -> DecisionLog:
+    """Merge several logs; episode ids are renumbered so they stay distinct."""
+    episode_index, offset = [], 0
+    for log in logs:
+        if len(log):
+            episode_index.append(np.unique(log.episode_index, return_inverse=True)[1] + offset)
+            offset = int(episode_index[-1].max()) + 1
+    logs = [log for log in logs if len(log)]
+    if not logs:
+        raise ValueError("No logged decisions to merge")
+    return DecisionLog(
+        observations=np.concatenate([log.observations for log in logs]),
+        actions=np.concatenate([log.actions for log in logs]),
+        rewards=np.concatenate([log.rewards for log in logs]),
+        behavior_probs=np.concatenate([log.behavior_probs for log in logs]),
+        episode_index=np.concatenate(episode_index),
+    )
+
+
+def action_probabilities(model, observations, batch_size: int = 4096) -> torch.Tensor:
+    """(N, ACTION_DIM) probabilities `model` assigns to each action on `observations`.
+
+    SB3 models with an action distribution (PPO/A2C) give their policy
+    probabilities; other SB3 models and deterministic baselines give the one-hot
+    of predict(..., deterministic=True). RandomPolicy is uniform.
+    """
+    observations = np.asarray(observations, dtype=np.float32)
+    if isinstance(model, RandomPolicy):
+        return torch.full((len(observations), ACTION_DIM), 1.0 / ACTION_DIM)
+
+    if _is_sb3_model(model):
+        chunks = []
+        with torch.no_grad():
+            for start in range(0, len(observations), batch_size):
+                batch = observations[start : start + batch_size]
+                if hasattr(model.policy, "get_distribution"):
+                    obs_tensor = torch.as_tensor(batch, device=model.policy.device)
+                    chunks.append(model.policy.get_distribution(obs_tensor).distribution.probs.float().cpu())
+                else:
+                    actions, _ = model.predict(batch, deterministic=True)
+                    chunks.append(torch.nn.functional.one_hot(torch.as_tensor(np.asarray(actions).reshape(-1), dtype=torch.long), ACTION_DIM).float())
+        return torch.cat(chunks) if chunks else torch.zeros((0, ACTION_DIM))
+
+    actions = [int(model.predict(obs, deterministic=True)[0]) for obs in observations]
+    return torch.nn.functional.one_hot(torch.as_tensor(actions, dtype=torch.long), ACTION_DIM).float().reshape(-1, ACTION_DIM)
+
+
+def behavior_probabilities(model, observations, epsilon: float = 0.0) -> torch.Tensor:
+    """Action probabilities of `model` mixed with epsilon-uniform exploration."""
+    return (1.0 - epsilon) * action_probabilities(model, observations) + epsilon / ACTION_DIM
+
+
+def collect_decision_log(env, model, num_episodes: int = 10, epsilon: float = 0.1, seed: int | None = None) -> DecisionLog:
+    """Roll out `model` (sampling from behavior_probabilities) and log every decision."""
+    rng = np.random.default_rng(seed)
+    observations, actions, rewards, probs, episodes = [], [], [], [], []
+    for episode_idx in range(num_episodes):
+        obs, _ = env.reset()
+        done = False
+        while not done:
+            action_probs = behavior_probabilities(model, obs[np.newaxis, :], epsilon)[0].double().numpy()
+            action = int(rng.choice(ACTION_DIM, p=action_probs / action_probs.sum()))
+            next_obs, reward, done, truncated, _ = env.step(action)
+            done = done or truncated
+            observations.append(np.asarray(obs, dtype=np.float32))
+            actions.append(action)
+            rewards.append(float(reward))
+            probs.append(float(action_probs[action]))
+            episodes.append(episode_idx)
+            obs = next_obs
+
+    return DecisionLog(
+        observations=np.stack(observations) if observations else np.zeros((0, 0), dtype=np.float32),
+        actions=np.asarray(actions, dtype=np.int64),
+        rewards=np.asarray(rewards, dtype=np.float64),
+        behavior_probs=np.asarray(probs, dtype=np.float64),
+        episode_index=np.asarray(episodes, dtype=np.int64),
+    )
+
+
+def _features(observations: torch.Tensor) -> torch.Tensor:
+    return torch.cat([observations, torch.ones((len(observations), 1), dtype=observations.dtype)], dim=1)
+
+
+def fit_reward_model(log: DecisionLog, ridge: float = 1.0) -> Dict[str, torch.Tensor]:
+    """Per-action ridge regression of the immediate reward on the observation.
+
+    All actions are solved in one batched (A, D+1, D+1) system. Rewards are
+    centred first, so actions never taken in the log predict the mean reward.
+    """
+    features = _features(torch.as_tensor(log.observations, dtype=torch.float64))
+    rewards = torch.as_tensor(log.rewards, dtype=torch.float64)
+    mean_reward = rewards.mean() if len(rewards) else torch.tensor(0.0, dtype=torch.float64)
+    one_hot = torch.nn.functional.one_hot(torch.as_tensor(log.actions, dtype=torch.long), ACTION_DIM).double()
+
+    gram = torch.einsum("na,ni,nj->aij", one_hot, features, features)
+    gram = gram + ridge * torch.eye(features.shape[1], dtype=torch.float64)
+    target = torch.einsum("na,ni,n->ai", one_hot, features, rewards - mean_reward)
+    coef = torch.linalg.solve(gram, target.unsqueeze(-1)).squeeze(-1)
+    return {"coef": coef, "mean_reward": mean_reward}
+
+
+def predict_rewards(reward_model: Mapping[str, torch.Tensor], observations) -> torch.Tensor:
+    """(N, ACTION_DIM) predicted immediate reward of every action."""
+    features = _features(torch.as_tensor(np.asarray(observations), dtype=torch.float64))
+    return features @ reward_model["coef"].T + reward_model["mean_reward"]
+
+
+def _pad_episodes(log: DecisionLog):
+    """Row -> (episode, step) positions of a log whose episodes are contiguous blocks."""
+    episode_index = np.asarray(log.episode_index)
+    starts = np.flatnonzero(np.r_[True, episode_index[1:] != episode_index[:-1]])
+    lengths = np.diff(np.r_[starts, len(episode_index)])
+    rows = np.repeat(np.arange(len(starts)), lengths)
+    steps = np.arange(len(episode_index)) - np.repeat(starts, lengths)
+    return torch.as_tensor(rows), torch.as_tensor(steps), len(starts), int(lengths.max())
+
+
+def estimate_policy_values(
+    log: DecisionLog,
+    target_probs: torch.Tensor,
+    gamma: float = 1.0,
+    max_ratio: float | None = None,
+    reward_model: Mapping[str, torch.Tensor] | None = None,
+) -> Dict[str, np.ndarray]:
+    """Estimate the value of M candidates from their (M, N, ACTION_DIM) probabilities.
+
+    Trajectory estimates are discounted episode returns (comparable to the
+    episode reward of evaluate_policy for gamma=1); step estimates are mean
+    rewards per decision. Per-decision ratios are clipped at `max_ratio`.
+    Returns {estimate: (M,) array}.
+    """
+    if len(log) == 0:
+        raise ValueError("Decision log is empty")
+    target_probs = torch.as_tensor(target_probs, dtype=torch.float64)
+    if target_probs.dim() == 2:
+        target_probs = target_probs.unsqueeze(0)
+    if target_probs.shape[1:] != (len(log), ACTION_DIM):
+        raise ValueError(f"target_probs must have shape (M, {len(log)}, {ACTION_DIM}), got {tuple(target_probs.shape)}")
+    if reward_model is None:
+        reward_model = fit_reward_model(log)
+
+    actions = torch.as_tensor(log.actions, dtype=torch.long)
+    rewards = torch.as_tensor(log.rewards, dtype=torch.float64)
+    behavior = torch.as_tensor(log.behavior_probs, dtype=torch.float64).clamp_min(1e-12)
+    num_policies = target_probs.shape[0]
+
+    ratios = target_probs.gather(-1, actions.expand(num_policies, -1).unsqueeze(-1)).squeeze(-1) / behavior
+    if max_ratio is not None:
+        ratios = ratios.clamp_max(float(max_ratio))
+    q_hat = predict_rewards(reward_model, log.observations)
+    q_logged = q_hat.gather(1, actions.unsqueeze(1)).squeeze(1)
+    v_hat = (target_probs * q_hat).sum(-1)
+
+    # (M, E, T) episode tensors; padding keeps ratio 1 and contributes nothing.
+    rows, steps, num_episodes, horizon = _pad_episodes(log)
+
+    def pad(values, fill):
+        padded = torch.full((num_policies, num_episodes, horizon), fill, dtype=torch.float64)
+        padded[:, rows, steps] = values.expand(num_policies, -1)
+        return padded
+
+    mask = pad(torch.ones(len(log), dtype=torch.float64), 0.0)
+    weights = torch.cumprod(pad(ratios, 1.0), dim=-1)
+    prev_weights = torch.cat([torch.ones_like(weights[..., :1]), weights[..., :-1]], dim=-1)
+    padded_rewards = pad(rewards, 0.0)
+    discount = gamma ** torch.arange(horizon, dtype=torch.float64)
+
+    is_value = (discount * weights * padded_rewards).sum(-1).mean(-1)
+    weight_mass = (weights * mask).sum(1)
+    wis_value = (discount * (weights * padded_rewards).sum(1) / weight_mass.clamp_min(1e-12)).sum(-1)
+    dr_terms = weights * padded_rewards - weights * pad(q_logged, 0.0) + prev_weights * pad(v_hat, 0.0)
+    dr_value = (discount * dr_terms * mask).sum(-1).mean(-1)
+    dm_value = (discount * pad(v_hat, 0.0)).sum(-1).mean(-1)
+
+    final_weights = weights[..., -1]
+    ess = final_weights.sum(-1) ** 2 / (final_weights ** 2).sum(-1).clamp_min(1e-12)
+
+    return {
+        "is": is_value.numpy(),
+        "wis": wis_value.numpy(),
+        "dr": dr_value.numpy(),
+        "dm": dm_value.numpy(),
+        "step_is": (ratios * rewards).mean(-1).numpy(),
+        "step_wis": ((ratios * rewards).sum(-1) / ratios.sum(-1).clamp_min(1e-12)).numpy(),
+        "step_dr": (v_hat + ratios * (rewards - q_logged)).mean(-1).numpy(),
+        "ess": ess.numpy(),
+        "mean_ratio": ratios.mean(-1).numpy(),
+    }
+
+
+def evaluate_candidates(
+    log: DecisionLog,
+    candidates: Mapping[str, object],
+    gamma: float = 1.0,
+    max_ratio: float | None = None,
+    ridge: float = 1.0,
+    batch_size: int = 4096,
+) -> pd.DataFrame:
+    """One row of OPE estimates per named candidate model, best DR value first."""
+    if not candidates:
+        raise ValueError("No candidate policies to evaluate")
+    target_probs = torch.stack([action_probabilities(model, log.observations, batch_size) for model in candidates.values()])
+    estimates = estimate_policy_values(log, target_probs, gamma=gamma, max_ratio=max_ratio, reward_model=fit_reward_model(log, ridge))
+
+    _, steps, num_episodes, _ = _pad_episodes(log)
+    logged_returns = pd.Series(log.rewards * gamma ** steps.numpy()).groupby(log.episode_index).sum()
+    frame = pd.DataFrame({"policy": list(candidates)})
+    for name, values in estimates.items():
+        frame[f"ope_{name}"] = values
+    frame["log_episodes"] = num_episodes
+    frame["log_decisions"] = len(log)
+    frame["logged_return"] = float(logged_returns.mean())
+    frame["logged_step_reward"] = float(log.rewards.mean())
+    return frame.sort_values("ope_dr", ascending=False).reset_index(drop=True)
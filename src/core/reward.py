@@ -1,4 +1,383 @@
-﻿def calculate_reward(
+﻿import numpy as np
+
+SEMANTIC_TARGET_CODES = {'local': 0, 'edge': 1, 'cloud': 2}
+SEMANTIC_TARGET_OTHER = 3
+
+# Reward terms in the order calculate_reward_batch applies them; each is the
+# change in reward caused by that step, so base + sum(terms) == reward.
+REWARD_TERMS = (
+    'delay',
+    'energy',
+    'edge_energy',
+    'semantic_alignment',
+    'cloud_cost',
+    'deadline_miss',
+    'slack',
+    'success_bonus',
+    'battery',
+    'edge_energy_risk',
+    'partial_utility',
+    'local_bonus',
+)
+
+# Inputs of calculate_reward_batch kept with every recorded decision, so a
+# recording can be re-scored offline (see src.core.reward_rescoring).
+REWARD_INPUT_DTYPE = [
+    ('deadline', np.float64),
+    ('size_bits', np.float64),
+    ('cpu_cycles', np.float64),
+    ('semantic_target', np.int8),
+    ('confidence', np.float64),
+    ('priority_score', np.float64),
+    ('battery_level', np.float64),
+    ('local_energy_pred', np.float64),
+    ('edge_energy_ratio', np.float64),  # NaN when no edge energy ratio was given
+    ('edge_energy_cost', np.float64),
+    ('success_bonus_input', np.float64),
+]
+
+REWARD_TERM_DTYPE = np.dtype(
+    [('action', np.int8), ('delay_input', np.float64), ('energy_input', np.float64)]
+    + REWARD_INPUT_DTYPE
+    + [(term, np.float64) for term in REWARD_TERMS]
+    + [('reward', np.float64)]
+)
+
+# Coefficients of the reward formula. calculate_reward_batch accepts overrides
+# (scalars or arrays broadcast against the batch) for offline weight sweeps.
+REWARD_WEIGHTS = {
+    'base': 100.0,
+    'delay': 35.0,
+    'energy': 5.0,
+    'edge_energy': 1.5,
+    'semantic_local': 20.0,
+    'semantic_match': 15.0,
+    'semantic_mismatch': 12.0,
+    'cloud': 30.0,
+    'cloud_size': 18.0,
+    'cloud_off_target': 14.0,
+    'cloud_off_target_size': 8.0,
+    'slack': 18.0,
+    'deadline_miss': 75.0,
+    'battery_critical': 40.0,
+    'battery_local': 10.0,
+    'edge_energy_risk': 35.0,
+    'split_gain': 12.0,
+    'partial_energy': 5.0,
+    'split_edge_semantic': 10.0,
+    'split_edge_success': 6.0,
+    'split_edge_75': 2.5,
+    'full_edge_semantic': 4.0,
+    'full_edge_size': 2.0,
+    'local_bonus': 4.0,
+}
+
+_ACTIVE_RECORDER = None
+
+
+class RewardTermRecorder:
+    """
+    Collects per-decision reward terms into preallocated structured arrays
+    (dtype REWARD_TERM_DTYPE), one array per episode.
+    Enable it around the code under study:
+
+        recorder = RewardTermRecorder()
+        with recorder.active():
+            ... env.step(...) ...
+            recorder.end_episode()
+        recorder.save("reward_terms.npz")
+
+    Simulated steps inside `with suspend_reward_recording():` are not recorded.
+    """
+
+    def __init__(self, capacity=1024):
+        self._rows = np.zeros(max(1, int(capacity)), dtype=REWARD_TERM_DTYPE)
+        self._size = 0
+        self.episodes = []
+
+    def record(self, actions, delays, energies, terms, rewards, inputs=None):
+        n = int(np.size(rewards))
+        if self._size + n > len(self._rows):
+            grown = np.zeros(max(2 * len(self._rows), self._size + n), dtype=REWARD_TERM_DTYPE)
+            grown[:self._size] = self._rows[:self._size]
+            self._rows = grown
+        block = self._rows[self._size:self._size + n]
+        block['action'] = np.broadcast_to(actions, (n,))
+        block['delay_input'] = np.broadcast_to(delays, (n,))
+        block['energy_input'] = np.broadcast_to(energies, (n,))
+        for name, values in (inputs or {}).items():
+            block[name] = np.broadcast_to(values, (n,))
+        for term in REWARD_TERMS:
+            block[term] = np.broadcast_to(terms[term], (n,))
+        block['reward'] = np.reshape(rewards, (n,))
+        self._size += n
+
+    def end_episode(self):
+        """Closes the current episode; its rows are kept as a compact copy."""
+        self.episodes.append(self._rows[:self._size].copy())
+        self._size = 0
+
+    def active(self):
+        return _RecorderContext(self)
+
+    def save(self, path):
+        """Writes episode_<i> arrays to an .npz file (an open episode is closed first)."""
+        import os
+        if self._size:
+            self.end_episode()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.savez_compressed(path, **{f"episode_{index}": rows for index, rows in enumerate(self.episodes)})
+        return path
+
+
+def suspend_reward_recording():
+    """Context in which no RewardTermRecorder is active, e.g. for simulated
+    env steps (oracle lookahead rollouts) that must not be recorded as decisions."""
+    return _RecorderContext(None)
+
+
+class _RecorderContext:
+    def __init__(self, recorder):
+        self.recorder = recorder
+        self._previous = None
+
+    def __enter__(self):
+        global _ACTIVE_RECORDER
+        self._previous = _ACTIVE_RECORDER
+        _ACTIVE_RECORDER = self.recorder
+        return self.recorder
+
+    def __exit__(self, exc_type, exc, tb):
+        global _ACTIVE_RECORDER
+        _ACTIVE_RECORDER = self._previous
+        return False
+
+
+def encode_semantic_targets(targets):
+    """Maps recommended_target strings to the integer codes used by calculate_reward_batch."""
+    targets = np.asarray(targets)
+    if targets.dtype.kind in ('i', 'u'):
+        return targets
+    codes = np.full(targets.shape, SEMANTIC_TARGET_OTHER, dtype=np.int8)
+    for name, code in SEMANTIC_TARGET_CODES.items():
+        codes[targets == name] = code
+    return codes
+
+
+class _ArrayOps:
+    where = staticmethod(np.where)
+    maximum = staticmethod(np.maximum)
+    minimum = staticmethod(np.minimum)
+
+
+class _ScalarOps:
+    @staticmethod
+    def where(condition, x, y):
+        return x if condition else y
+
+    maximum = staticmethod(max)
+    minimum = staticmethod(min)
+
+
+def _stage(stages, reward):
+    if stages is not None:
+        stages.append(reward)
+
+
+def _apply_reward_terms(
+    ops,
+    actions,
+    delays,
+    energies,
+    deadlines,
+    size_bits,
+    cpu_cycles,
+    targets,
+    llm_confidence,
+    priority_score,
+    battery_levels,
+    local_energy_preds,
+    edge_energy_ratios,
+    edge_energy_costs,
+    success_bonus,
+    stages,
+    w=REWARD_WEIGHTS,
+):
+    """
+    The reward formula, written once for both call paths: `ops` is _ArrayOps for
+    numpy batches and _ScalarOps for the single decision the env scores per step.
+    `w` holds the REWARD_WEIGHTS coefficients. When `stages` is a list, the
+    running reward after every REWARD_TERMS step is appended to it.
+    Returns (reward, task_success).
+    """
+    where, maximum, minimum = ops.where, ops.maximum, ops.minimum
+    is_local = actions == 0
+    not_local = actions != 0
+    is_partial = (actions >= 1) & (actions <= 4)
+    is_cloud = actions == 5
+    rec_edge = targets == 1
+
+    # 1. Core Objectives: Minimize Delay and Energy (Strengthened based on Phase 5)
+    reward = w['base']
+    _stage(stages, reward)
+    reward = reward - (delays * w['delay'])
+    _stage(stages, reward)
+    reward = reward - (energies * w['energy'])
+    _stage(stages, reward)
+    reward = reward - edge_energy_costs * w['edge_energy']
+    _stage(stages, reward)
+
+    # 2. LLM Semantic Alignment Bonus (With Confidence Thresholding)
+    conf_factor = where(llm_confidence > 0.7, llm_confidence, llm_confidence * 0.4)
+    reward = where(
+        (targets == 0) & is_local,
+        reward + w['semantic_local'] * conf_factor,
+        where(
+            (rec_edge & is_partial) | ((targets == 2) & is_cloud),
+            reward + w['semantic_match'] * conf_factor,
+            reward - w['semantic_mismatch'] * conf_factor,
+        ),
+    )
+    _stage(stages, reward)
+
+    size_norm = minimum(1.0, size_bits / 1e7)
+
+    # 3. Penalize Cloud Cost
+    reward = where(is_cloud, reward - (w['cloud'] + w['cloud_size'] * size_norm), reward)
+    reward = where(is_cloud & rec_edge, reward - (w['cloud_off_target'] + w['cloud_off_target_size'] * size_norm) * conf_factor, reward)
+    _stage(stages, reward)
+    partial_preference = 0.35 + 0.35 * size_norm + 0.30 * priority_score
+
+    # 4. Deadline Miss Penalty (Normalized by priority)
+    deadline = maximum(0.1, deadlines)
+    task_success = delays <= deadline
+    slack_ratio = maximum(0.0, (deadline - delays) / deadline)
+    reward = where(task_success, reward + w['slack'] * slack_ratio * priority_score, reward - w['deadline_miss'] * priority_score)
+    _stage(stages, reward)
+    reward = where(task_success, reward + success_bonus, reward)
+    _stage(stages, reward)
+
+    # 5. Battery Awareness (Exponential Penalty - Calibrated Phase 5)
+    battery_pct = (battery_levels / 10000.0) * 100.0
+    severity = (25.0 - battery_pct) / 25.0
+    battery_critical = battery_pct < 25.0
+    reward = where(battery_critical & not_local, reward - w['battery_critical'] * (severity * severity), reward)
+    reward = where(battery_critical & is_local, reward + w['battery_local'] * severity, reward)
+    _stage(stages, reward)
+
+    if edge_energy_ratios is not None:
+        edge_severity = (0.25 - edge_energy_ratios) / 0.25
+        reward = where(is_partial & (edge_energy_ratios < 0.25), reward - w['edge_energy_risk'] * (edge_severity * edge_severity), reward)
+    _stage(stages, reward)
+
+    # 6. Granular Partial Offloading Utilities (Awareness of splits)
+    local_delay_only = cpu_cycles / 1e9
+    # delays < local_delay_only never holds when local_delay_only is 0, so the
+    # placeholder divisor only keeps the unused branch finite.
+    split_base = where(local_delay_only > 0.0, local_delay_only, 1.0)
+    split_gain = w['split_gain'] * ((local_delay_only - delays) / split_base)
+    reward = where(is_partial & (delays < local_delay_only), reward + split_gain, reward)
+    reward = where(is_partial, reward + w['partial_energy'] * (1.0 - energies / maximum(1e-5, local_energy_preds)), reward)
+
+    # Structural incentive: preserve semantically aligned split-edge behaviour.
+    split_edge = rec_edge & (actions >= 1) & (actions <= 3)
+    full_edge = rec_edge & (actions == 4)
+    reward = where(split_edge, reward + w['split_edge_semantic'] * conf_factor * partial_preference, reward)
+    reward = where(split_edge & task_success, reward + w['split_edge_success'] * partial_preference, reward)
+    reward = where(split_edge & (actions == 3), reward + w['split_edge_75'] * conf_factor, reward)
+    reward = where(full_edge, reward + w['full_edge_semantic'] * conf_factor * (0.4 + 0.6 * priority_score), reward)
+    reward = where(full_edge, reward - w['full_edge_size'] * size_norm, reward)
+    _stage(stages, reward)
+
+    reward = where(is_local & task_success, reward + w['local_bonus'], reward)
+    _stage(stages, reward)
+    return reward, task_success
+
+
+def calculate_reward_batch(
+    actions,
+    delays,
+    energies,
+    deadlines,
+    size_bits,
+    cpu_cycles,
+    semantic_targets,
+    confidences,
+    priority_scores,
+    battery_levels,
+    local_energy_preds,
+    edge_energy_ratios=None,
+    edge_energy_costs=0.0,
+    success_bonus=0.0,
+    record_terms=True,
+    weights=None,
+):
+    """
+    Vectorized calculate_reward: every argument is an array (or a broadcastable
+    scalar) over a batch of decisions. semantic_targets takes strings or the
+    codes from encode_semantic_targets; battery_levels are raw device battery
+    values (capacity 10000). Returns a float64 array of rewards.
+    weights overrides REWARD_WEIGHTS entries; values broadcast against the
+    batch, so (K, 1) weight arrays score K settings at once (shape (K, N)).
+    While a RewardTermRecorder is active (and record_terms is set, with the
+    default weights), the change caused by every REWARD_TERMS step is recorded
+    together with the inputs.
+    """
+    w = resolve_reward_weights(weights)
+    recorder = _ACTIVE_RECORDER if record_terms and weights is None else None
+    actions = np.asarray(actions)
+    delays = np.asarray(delays, dtype=np.float64)
+    energies = np.asarray(energies, dtype=np.float64)
+    inputs = {
+        'deadline': np.asarray(deadlines, dtype=np.float64),
+        'size_bits': np.asarray(size_bits, dtype=np.float64),
+        'cpu_cycles': np.asarray(cpu_cycles, dtype=np.float64),
+        'semantic_target': encode_semantic_targets(semantic_targets),
+        'confidence': np.asarray(confidences, dtype=np.float64),
+        'priority_score': np.asarray(priority_scores, dtype=np.float64),
+        'battery_level': np.asarray(battery_levels, dtype=np.float64),
+        'local_energy_pred': np.asarray(local_energy_preds, dtype=np.float64),
+        'edge_energy_ratio': None if edge_energy_ratios is None else np.asarray(edge_energy_ratios, dtype=np.float64),
+        'edge_energy_cost': np.asarray(edge_energy_costs, dtype=np.float64),
+        'success_bonus_input': np.asarray(success_bonus, dtype=np.float64),
+    }
+    stages = [] if recorder is not None else None
+    reward, task_success = _apply_reward_terms(_ArrayOps, actions, delays, energies, *inputs.values(), stages, w)
+    reward = np.asarray(reward, dtype=np.float64)
+    if stages is not None:
+        _record_stages(recorder, actions, delays, energies, stages, task_success, inputs)
+    return reward
+
+
+def resolve_reward_weights(weights=None):
+    """REWARD_WEIGHTS with the given overrides applied (as float64 arrays)."""
+    if not weights:
+        return REWARD_WEIGHTS
+    unknown = set(weights) - set(REWARD_WEIGHTS)
+    if unknown:
+        raise ValueError(f"Unknown reward weights: {sorted(unknown)}")
+    resolved = dict(REWARD_WEIGHTS)
+    resolved.update({name: np.asarray(value, dtype=np.float64) for name, value in weights.items()})
+    return resolved
+
+
+def _record_stages(recorder, actions, delays, energies, stages, task_success, inputs):
+    deltas = np.diff(np.stack(np.broadcast_arrays(*stages)), axis=0)
+    # stage 6 is the deadline step: a miss penalty or a slack reward
+    terms = dict(zip(
+        ('delay', 'energy', 'edge_energy', 'semantic_alignment', 'cloud_cost', None, 'success_bonus',
+         'battery', 'edge_energy_risk', 'partial_utility', 'local_bonus'),
+        deltas,
+    ))
+    deadline_step = terms.pop(None)
+    terms['deadline_miss'] = np.where(task_success, 0.0, deadline_step)
+    terms['slack'] = np.where(task_success, deadline_step, 0.0)
+    if inputs['edge_energy_ratio'] is None:
+        inputs = dict(inputs, edge_energy_ratio=np.nan)
+    recorder.record(actions, delays, energies, terms, stages[-1], inputs)
+
+
+def calculate_reward(
     action,
     delay,
     energy,
@@ -8,97 +387,35 @@
     edge_energy_ratio=None,
     edge_energy_cost=0.0,
     success_bonus=0.0,
+    record_terms=True,
 ):
     """
     Calculates the reward (or penalty) for an offloading decision made by the RL Agent.
     Calibrated based on Phase 5 findings to reduce over-reliance on semantic shaping.
+    Same formula as calculate_reward_batch, evaluated on Python floats.
     """
-    base_reward = 100.0
-    reward = base_reward
-    
-    # 1. Core Objectives: Minimize Delay and Energy (Strengthened based on Phase 5)
-    # Increased weights to ensure physical reality isn't ignored without shaping
-    reward -= (delay * 35.0)
-    reward -= (energy * 5.0)
-    reward -= edge_energy_cost * 1.5
-    
-    # 2. LLM Semantic Alignment Bonus (With Confidence Thresholding)
     semantic = task.semantic_analysis
     llm_rec = semantic.get('recommended_target', 'edge') if semantic else 'edge'
     llm_confidence = semantic.get('confidence', 0.5) if semantic else 0.5
-    
-    # Apply thresholding: if LLM is not sure (< 0.7), lower the bonus impact
-    conf_factor = llm_confidence if llm_confidence > 0.7 else llm_confidence * 0.4
-    
-    if llm_rec == 'local' and action == 0:
-        reward += 20.0 * conf_factor
-    elif llm_rec == 'edge' and 1 <= action <= 4:
-        reward += 15.0 * conf_factor
-    elif llm_rec == 'cloud' and action == 5:
-        reward += 15.0 * conf_factor
-    else:
-        reward -= 12.0 * conf_factor # Slightly higher penalty for disobeying high-conf rec
-        
     priority_score = semantic.get('priority_score', 0.5) if semantic else 0.5
-    size_norm = min(1.0, getattr(task, 'size_bits', 0.0) / 1e7)
-
-    # 3. Penalize Cloud Cost
-    cloud_cost = 30.0 + 18.0 * size_norm
-    if action == 5:
-        reward -= cloud_cost
-        if llm_rec == 'edge':
-            reward -= (14.0 + 8.0 * size_norm) * conf_factor
-    partial_preference = 0.35 + 0.35 * size_norm + 0.30 * priority_score
-    
-    # 4. Deadline Miss Penalty (Normalized by priority)
-    deadline = max(0.1, task.deadline)
-    task_success = delay <= deadline
-    if not task_success:
-        reward -= 75.0 * priority_score
-    else:
-        slack_ratio = max(0.0, (deadline - delay) / deadline)
-        reward += 18.0 * slack_ratio * priority_score
-        reward += float(success_bonus)
-        
-    # 5. Battery Awareness (Exponential Penalty - Calibrated Phase 5)
-    battery_pct = (device.battery / 10000.0) * 100.0 if hasattr(device, 'battery') else 100.0
-    
-    if battery_pct < 25.0:
-        # Exponential growth for penalty as battery approaches zero
-        severity = (25.0 - battery_pct) / 25.0
-        if action != 0: # Penalize offloading when battery is critical
-            reward -= 40.0 * (severity ** 2)
-        else:
-            reward += 10.0 * severity # Reward local conservation
-
-    if 1 <= action <= 4 and edge_energy_ratio is not None and edge_energy_ratio < 0.25:
-        severity = (0.25 - edge_energy_ratio) / 0.25
-        reward -= 35.0 * (severity ** 2)
-            
-    # 6. Granular Partial Offloading Utilities (Awareness of splits)
-    if 1 <= action <= 4:
-        local_delay_only = task.cpu_cycles / 1e9
-        if delay < local_delay_only:
-            reward += 12.0 * ((local_delay_only - delay) / local_delay_only)
-
-        reward += 5.0 * (1.0 - energy / max(1e-5, local_energy_pred))
-
-        # Structural incentive: preserve semantically aligned split-edge behaviour.
-        if llm_rec == 'edge':
-            if action in (1, 2, 3):
-                reward += 10.0 * conf_factor * partial_preference
-                if task_success:
-                    reward += 6.0 * partial_preference
-                if action == 3:
-                    reward += 2.5 * conf_factor
-            elif action == 4:
-                reward += 4.0 * conf_factor * (0.4 + 0.6 * priority_score)
-                reward -= 2.0 * size_norm
-
-    if action == 0 and delay <= deadline:
-        reward += 4.0
-        
-    return reward
-
-
+    battery = device.battery if hasattr(device, 'battery') else 10000.0
 
+    recorder = _ACTIVE_RECORDER if record_terms else None
+    stages = [] if recorder is not None else None
+    inputs = {
+        'deadline': float(task.deadline),
+        'size_bits': float(getattr(task, 'size_bits', 0.0)),
+        'cpu_cycles': float(task.cpu_cycles),
+        'semantic_target': SEMANTIC_TARGET_CODES.get(llm_rec, SEMANTIC_TARGET_OTHER),
+        'confidence': float(llm_confidence),
+        'priority_score': float(priority_score),
+        'battery_level': float(battery),
+        'local_energy_pred': float(local_energy_pred),
+        'edge_energy_ratio': None if edge_energy_ratio is None else float(edge_energy_ratio),
+        'edge_energy_cost': float(edge_energy_cost),
+        'success_bonus_input': float(success_bonus),
+    }
+    reward, task_success = _apply_reward_terms(_ScalarOps, int(action), float(delay), float(energy), *inputs.values(), stages)
+    if stages is not None:
+        _record_stages(recorder, action, delay, energy, stages, task_success, inputs)
+    return float(reward)
@@ -0,0 +1,115 @@
+"""
+Offline re-scoring of recorded rollouts under alternative reward weights.
+
+Recordings come from RewardTermRecorder, e.g. evaluate_policy(...,
+reward_terms_path=...). Every recorded decision keeps its action, delay, energy
+and calculate_reward inputs, so the reward can be recomputed for K weight
+settings (overrides of REWARD_WEIGHTS) in a single (K, N) pass of
+calculate_reward_batch, without new rollouts.
+
+Only the calculate_reward part of the env reward is re-scored; adjustments the
+env applies on top of it are not part of the recording.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.core.reward import REWARD_TERM_DTYPE, REWARD_WEIGHTS, calculate_reward_batch
+
+# Semantic alignment and split-incentive coefficients; zeroing them is the
+# offline counterpart of the w_o_reward_shaping ablation.
+REWARD_SHAPING_WEIGHTS = (
+    'semantic_local',
+    'semantic_match',
+    'semantic_mismatch',
+    'cloud_off_target',
+    'cloud_off_target_size',
+    'split_edge_semantic',
+    'split_edge_success',
+    'split_edge_75',
+    'full_edge_semantic',
+    'full_edge_size',
+    'local_bonus',
+)
+
+
+def load_recording(path):
+    """Concatenated records of a RewardTermRecorder .npz and the episode index of every row."""
+    with np.load(path) as data:
+        names = sorted(data.files, key=lambda name: int(name.rsplit('_', 1)[-1]))
+        episodes = [data[name] for name in names]
+    if not episodes:
+        return np.zeros(0, dtype=REWARD_TERM_DTYPE), np.zeros(0, dtype=np.int64)
+    records = np.concatenate(episodes)
+    episode_index = np.repeat(np.arange(len(episodes)), [len(episode) for episode in episodes])
+    return records, episode_index
+
+
+def weight_grid(**axes):
+    """Cartesian product of weight values, e.g. weight_grid(delay=[25, 35], energy=[5, 10])."""
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[name] for name in names))]
+
+
+def without_reward_shaping(settings=None):
+    """`settings` (default: recorded weights) with every REWARD_SHAPING_WEIGHTS entry set to 0."""
+    return dict(settings or {}, **{name: 0.0 for name in REWARD_SHAPING_WEIGHTS})
+
+
+def stack_weight_settings(settings):
+    """Turn K weight dicts into {name: (K, 1) array} for calculate_reward_batch."""
+    names = sorted({name for setting in settings for name in setting})
+    return {
+        name: np.array([float(setting.get(name, REWARD_WEIGHTS[name])) for setting in settings]).reshape(-1, 1)
+        for name in names
+    }
+
+
+def rescore_rewards(records, settings):
+    """(K, N) rewards of the N recorded decisions under each of the K weight settings."""
+    rewards = calculate_reward_batch(
+        records['action'],
+        records['delay_input'],
+        records['energy_input'],
+        records['deadline'],
+        records['size_bits'],
+        records['cpu_cycles'],
+        records['semantic_target'],
+        records['confidence'],
+        records['priority_score'],
+        records['battery_level'],
+        records['local_energy_pred'],
+        edge_energy_ratios=records['edge_energy_ratio'],
+        edge_energy_costs=records['edge_energy_cost'],
+        success_bonus=records['success_bonus_input'],
+        record_terms=False,
+        weights=stack_weight_settings(settings),
+    )
+    return np.broadcast_to(rewards, (len(settings), len(records)))
+
+
+def summarize_rescoring(records, episode_index, settings, rewards=None):
+    """One row per weight setting: its effective value of every swept weight and reward statistics."""
+    if rewards is None:
+        rewards = rescore_rewards(records, settings)
+    episode_starts = np.flatnonzero(np.r_[True, episode_index[1:] != episode_index[:-1]])
+    episode_returns = np.add.reduceat(rewards, episode_starts, axis=1)
+    success = records['delay_input'] <= np.maximum(0.1, records['deadline'])
+
+    weight_names = sorted({name for setting in settings for name in setting})
+    rows = []
+    for index, setting in enumerate(settings):
+        row = {'setting': index}
+        row.update({f'weight_{name}': float(setting.get(name, REWARD_WEIGHTS[name])) for name in weight_names})
+        row.update({
+            'mean_step_reward': float(rewards[index].mean()),
+            'mean_episode_return': float(episode_returns[index].mean()),
+            'std_episode_return': float(episode_returns[index].std()),
+            'mean_success_reward': float(rewards[index][success].mean()) if success.any() else 0.0,
+            'mean_miss_reward': float(rewards[index][~success].mean()) if (~success).any() else 0.0,
+            'mean_delta_vs_recorded': float((rewards[index] - records['reward']).mean()),
+        })
+        rows.append(row)
+    return pd.DataFrame(rows)
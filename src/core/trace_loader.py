@@ -2,7 +2,7 @@
 Trace loading utilities for Phase 6.
 
 Responsibilities:
-- load raw trace CSV files from disk
+- load raw trace CSV files from disk (whole or as bounded chunks)
 - load previously materialized train/val/test episode JSON files
 - keep disk I/O separate from trace preprocessing / episode generation
 """
@@ -11,7 +11,7 @@ from __future__ import annotations
 
 import json
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import pandas as pd
 
@@ -35,6 +35,20 @@ class TraceLoader:
                 continue
         return frames
 
+    def iter_trace_chunks(self, pattern: str = "*.csv", chunksize: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Stream raw trace CSV files as bounded-size chunks instead of whole frames."""
+        if not self.trace_dir.exists():
+            return
+
+        for trace_file in sorted(self.trace_dir.glob(pattern)):
+            try:
+                reader = pd.read_csv(trace_file, chunksize=chunksize)
+            except Exception:
+                continue
+            with reader:
+                for chunk in reader:
+                    yield chunk
+
     def saved_episode_paths(self) -> Dict[str, Path]:
         """Return canonical train/val/test episode JSON paths."""
         return {
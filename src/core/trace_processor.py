@@ -26,6 +26,23 @@ except Exception:
     pass
 
 
+# Google Cluster task_type -> trace priority (0-3) and relative deadline (s).
+# Used only when the task frame does not already carry priority / deadline.
+TASK_TYPE_PRIORITY = {
+    'CRITICAL_HEALTH': 3,
+    'AI_INFERENCE': 2,
+    'VIDEO_TRANSCODE': 1,
+    'IOT_SENSING': 0,
+}
+
+TASK_TYPE_DEADLINE_SLACK = {
+    'CRITICAL_HEALTH': 0.5,
+    'AI_INFERENCE': 1.5,
+    'VIDEO_TRANSCODE': 3.0,
+    'IOT_SENSING': 5.0,
+}
+
+
 @dataclass
 class TraceTask:
     """Single task from a trace"""
@@ -66,14 +83,18 @@ class TraceEpisode:
 class TraceProcessor:
     """Main trace processor for Faz 6"""
     
-    def __init__(self, trace_dir: Optional[str] = None, seed: int = 42):
+    def __init__(self, trace_dir: Optional[str] = None, seed: int = 42,
+                 workload_model_path: Optional[str] = None):
         """
         Args:
             trace_dir: Directory containing trace files (CSV format)
             seed: Random seed for reproducibility
+            workload_model_path: Optional fitted WorkloadModel (.npz) used
+                instead of the hand-picked synthetic distributions
         """
         self.trace_dir = Path(trace_dir) if trace_dir else Path('data/traces')
         self.seed = seed
+        self.workload_model_path = workload_model_path
         np.random.seed(seed)
         self.episodes = []
         self.metadata = {}
@@ -116,6 +137,9 @@ class TraceProcessor:
         - Data sizes: 100KB to 10MB
         - Deadlines: 500ms to 5s
         """
+        if self.workload_model_path:
+            return self._generate_workload_model_traces(n_devices, n_tasks)
+
         print(f"🔄 Generating synthetic traces: {n_devices} devices, ~{n_tasks} tasks")
         
         np.random.seed(self.seed)
@@ -152,7 +176,123 @@ class TraceProcessor:
         
         df = pd.DataFrame(data)
         return [df]
-    
+
+    def _generate_workload_model_traces(self, n_devices: int = 20,
+                                        n_tasks: int = 500) -> List[pd.DataFrame]:
+        """
+        Sample synthetic traces from a fitted WorkloadModel (see
+        src/core/workload_model.py). Task features keep the joint
+        distribution of the real traces the model was fitted on; device
+        placement uses the same simplified grid as the hand-picked generator.
+        """
+        from src.core.workload_model import WorkloadModel
+
+        print(f"🔄 Sampling workload-model traces: {n_devices} devices, {n_tasks} tasks")
+        columns = WorkloadModel.load(self.workload_model_path).sample_arrays(n_tasks, seed=self.seed)
+
+        rng = np.random.default_rng(self.seed)
+        device_id = rng.integers(0, n_devices, size=n_tasks)
+        columns['device_id'] = device_id
+        columns['location_x'] = np.clip((device_id % 5) * 20 + rng.normal(0, 5, size=n_tasks), 0, 100)
+        columns['location_y'] = np.clip((device_id // 5) * 20 + rng.normal(0, 5, size=n_tasks), 0, 100)
+        return [pd.DataFrame(columns)]
+
+    def join_tasks_with_mobility(self, tasks_df: pd.DataFrame,
+                                 mobility_df: pd.DataFrame,
+                                 assignment: str = 'modulo',
+                                 direction: str = 'nearest',
+                                 wrap_time: bool = True) -> pd.DataFrame:
+        """
+        Join Google Cluster task attributes with Didi mobility trajectories.
+
+        Every task is assigned a device (trajectory owner) and gets that
+        device's position at its submit_time through a single merge_asof
+        pass grouped by device, so there is no per-task lookup.
+
+        Args:
+            tasks_df: Output of DataLoader.load_google_cluster_trace
+                (task_id, submit_time, cpu_request, ram_request or the
+                trace's memory_request, task_type)
+            mobility_df: Output of DataLoader.load_didi_gaia_mobility_frame
+                (user_id, timestamp, x, y)
+            assignment: 'modulo' (task_id % n_devices; non-integer task ids
+                are numbered in order of appearance) or 'random' (seeded)
+            direction: merge_asof direction; 'nearest' also covers tasks
+                submitted before a trajectory's first fix
+            wrap_time: Fold submit times into the trajectory time span when
+                the task horizon is longer than the mobility trace
+
+        Returns:
+            Trace-format DataFrame accepted by preprocess_traces:
+            task_id, device_id, arrival_time, deadline, data_size,
+            cpu_cycles, priority, location_x, location_y
+        """
+        device_ids = np.sort(mobility_df['user_id'].unique())
+        if len(device_ids) == 0:
+            raise ValueError("mobility_df has no trajectories to join against")
+
+        task_ids = tasks_df['task_id'].to_numpy()
+        if assignment == 'modulo':
+            numeric_ids = pd.to_numeric(pd.Series(task_ids), errors='coerce').to_numpy(dtype=np.float64)
+            if np.all(np.isfinite(numeric_ids)) and np.all(numeric_ids == np.floor(numeric_ids)):
+                slots = numeric_ids.astype(np.int64) % len(device_ids)
+            else:
+                slots = pd.factorize(task_ids)[0].astype(np.int64) % len(device_ids)
+        elif assignment == 'random':
+            slots = np.random.default_rng(self.seed).integers(0, len(device_ids), size=len(tasks_df))
+        else:
+            raise ValueError(f"Unknown device assignment: {assignment}")
+
+        submit_time = tasks_df['submit_time'].to_numpy(dtype=np.float64)
+        lookup_time = submit_time
+        if wrap_time:
+            span = float(mobility_df['timestamp'].max())
+            if span > 0:
+                lookup_time = np.mod(submit_time, span)
+
+        left = pd.DataFrame({
+            'row': np.arange(len(tasks_df), dtype=np.int64),
+            'device_id': device_ids[slots],
+            'lookup_time': lookup_time,
+        }).sort_values('lookup_time', kind='mergesort')
+        right = pd.DataFrame({
+            'device_id': mobility_df['user_id'].to_numpy(),
+            'lookup_time': mobility_df['timestamp'].to_numpy(dtype=np.float64),
+            'location_x': mobility_df['x'].to_numpy(dtype=np.float64),
+            'location_y': mobility_df['y'].to_numpy(dtype=np.float64),
+        }).sort_values('lookup_time', kind='mergesort')
+
+        joined = pd.merge_asof(left, right, on='lookup_time', by='device_id', direction=direction)
+        joined = joined.sort_values('row', kind='mergesort')
+
+        task_type = tasks_df['task_type'] if 'task_type' in tasks_df.columns else pd.Series('', index=tasks_df.index)
+        if 'priority' in tasks_df.columns:
+            priority = tasks_df['priority'].to_numpy(dtype=np.int64)
+        else:
+            priority = task_type.map(TASK_TYPE_PRIORITY).fillna(1).to_numpy(dtype=np.int64)
+        if 'deadline' in tasks_df.columns:
+            deadline = tasks_df['deadline'].to_numpy(dtype=np.float64)
+        else:
+            deadline = submit_time + task_type.map(TASK_TYPE_DEADLINE_SLACK).fillna(2.0).to_numpy(dtype=np.float64)
+        if 'data_size' in tasks_df.columns:
+            data_size = tasks_df['data_size'].to_numpy(dtype=np.int64)
+        else:
+            # ram_request (MB) is read as the KB payload shipped with the task
+            ram_column = 'ram_request' if 'ram_request' in tasks_df.columns else 'memory_request'
+            data_size = np.maximum(1, tasks_df[ram_column].to_numpy(dtype=np.float64)).astype(np.int64)
+
+        return pd.DataFrame({
+            'task_id': task_ids,
+            'device_id': joined['device_id'].to_numpy(),
+            'arrival_time': submit_time,
+            'deadline': deadline,
+            'data_size': data_size,
+            'cpu_cycles': np.maximum(1, tasks_df['cpu_request'].to_numpy(dtype=np.float64)).astype(np.int64),
+            'priority': priority,
+            'location_x': joined['location_x'].fillna(500.0).to_numpy(),
+            'location_y': joined['location_y'].fillna(500.0).to_numpy(),
+        })
+
     def preprocess_traces(self, traces: List[pd.DataFrame], 
                          normalize: bool = True) -> List[pd.DataFrame]:
         """
@@ -0,0 +1,173 @@
+"""
+Streaming episode construction for traces larger than RAM.
+
+Responsibilities:
+- keep a uniform reservoir sample (Algorithm R) of trace tasks over chunked input
+- optionally stratify the reservoir by task priority
+- turn the reservoir into TraceEpisode objects after a single pass
+
+Memory is bounded by the reservoir capacity, independent of the trace length,
+and the total row count never has to be known up front.
+"""
+
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.core.trace_loader import TraceLoader
+from src.core.trace_processor import TraceEpisode, TraceTask
+
+TRACE_COLUMNS = [
+    "task_id",
+    "device_id",
+    "arrival_time",
+    "deadline",
+    "data_size",
+    "cpu_cycles",
+    "priority",
+    "location_x",
+    "location_y",
+]
+
+PRIORITY_LEVELS = (0, 1, 2, 3)
+
+
+class _Reservoir:
+    """Fixed-capacity Algorithm R reservoir over rows of TRACE_COLUMNS."""
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.rows = np.empty((self.capacity, len(TRACE_COLUMNS)), dtype=np.float64)
+        self.filled = 0
+        self.seen = 0
+
+    def offer(self, values: np.ndarray, rng: np.random.Generator) -> None:
+        n_rows = len(values)
+        if n_rows == 0 or self.capacity == 0:
+            self.seen += n_rows
+            return
+
+        take = min(self.capacity - self.filled, n_rows)
+        if take > 0:
+            self.rows[self.filled:self.filled + take] = values[:take]
+            self.filled += take
+
+        rest = values[take:]
+        if len(rest):
+            # Row i of the stream (0-based) replaces slot r ~ U{0..i} when r < capacity.
+            stream_index = self.seen + take + np.arange(len(rest), dtype=np.int64)
+            slots = rng.integers(0, stream_index + 1)
+            hits = np.flatnonzero(slots < self.capacity)
+            if len(hits):
+                # Later rows overwrite earlier ones on the same slot, as in the sequential algorithm.
+                hit_slots = slots[hits]
+                _, last = np.unique(hit_slots[::-1], return_index=True)
+                keep = hits[len(hits) - 1 - last]
+                self.rows[slots[keep]] = rest[keep]
+        self.seen += n_rows
+
+    def sample(self) -> np.ndarray:
+        return self.rows[:self.filled]
+
+
+class ReservoirEpisodeBuilder:
+    """Builds TraceEpisode objects from an unbounded stream of trace chunks."""
+
+    def __init__(self, capacity: int, tasks_per_episode: int = 50,
+                 stratify_by_priority: bool = False,
+                 priority_weights: Optional[Dict[int, float]] = None,
+                 seed: int = 42):
+        """
+        Args:
+            capacity: Total number of tasks kept in memory (K)
+            tasks_per_episode: Tasks per generated episode
+            stratify_by_priority: Keep one reservoir per priority level
+            priority_weights: Share of K per priority when stratified (default: equal)
+            seed: Random seed for reproducibility
+        """
+        self.capacity = int(capacity)
+        self.tasks_per_episode = int(tasks_per_episode)
+        self.stratify_by_priority = stratify_by_priority
+        self.rng = np.random.default_rng(seed)
+
+        if stratify_by_priority:
+            weights = priority_weights or {level: 1.0 for level in PRIORITY_LEVELS}
+            total_weight = float(sum(weights.get(level, 0.0) for level in PRIORITY_LEVELS)) or 1.0
+            self.reservoirs = {
+                level: _Reservoir(int(self.capacity * weights.get(level, 0.0) / total_weight))
+                for level in PRIORITY_LEVELS
+            }
+        else:
+            self.reservoirs = {None: _Reservoir(self.capacity)}
+
+    @property
+    def rows_seen(self) -> int:
+        return int(sum(reservoir.seen for reservoir in self.reservoirs.values()))
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Offer one chunk of raw trace rows to the reservoir(s)."""
+        chunk = chunk[
+            (chunk["data_size"] > 0)
+            & (chunk["cpu_cycles"] > 0)
+            & (chunk["deadline"] > chunk["arrival_time"])
+            & (chunk["priority"].isin(PRIORITY_LEVELS))
+        ]
+        values = np.empty((len(chunk), len(TRACE_COLUMNS)), dtype=np.float64)
+        for index, column in enumerate(TRACE_COLUMNS):
+            values[:, index] = chunk[column].to_numpy(dtype=np.float64) if column in chunk.columns else 50.0
+
+        if not self.stratify_by_priority:
+            self.reservoirs[None].offer(values, self.rng)
+            return
+
+        priorities = values[:, TRACE_COLUMNS.index("priority")]
+        for level, reservoir in self.reservoirs.items():
+            reservoir.offer(values[priorities == level], self.rng)
+
+    def consume(self, chunks: Iterable[pd.DataFrame]) -> "ReservoirEpisodeBuilder":
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def consume_loader(self, loader: TraceLoader, pattern: str = "*.csv",
+                       chunksize: int = 100_000) -> "ReservoirEpisodeBuilder":
+        return self.consume(loader.iter_trace_chunks(pattern=pattern, chunksize=chunksize))
+
+    def build_episodes(self, trace_name: str = "reservoir_ep") -> List[TraceEpisode]:
+        """Shuffle the reservoir and cut it into arrival-ordered episodes."""
+        sample = np.concatenate([reservoir.sample() for reservoir in self.reservoirs.values()])
+        sample = sample[self.rng.permutation(len(sample))]
+        n_episodes = len(sample) // self.tasks_per_episode
+
+        arrival_col = TRACE_COLUMNS.index("arrival_time")
+        episodes = []
+        for ep_id in range(n_episodes):
+            block = sample[ep_id * self.tasks_per_episode:(ep_id + 1) * self.tasks_per_episode]
+            block = block[np.argsort(block[:, arrival_col], kind="stable")]
+            tasks = [
+                TraceTask(
+                    task_id=int(row[0]),
+                    device_id=int(row[1]),
+                    arrival_time=float(row[2]),
+                    deadline=float(row[3]),
+                    data_size=int(row[4]),
+                    cpu_cycles=int(row[5]),
+                    priority=int(row[6]),
+                    location=(float(row[7]), float(row[8])),
+                )
+                for row in block
+            ]
+            episodes.append(
+                TraceEpisode(
+                    episode_id=ep_id,
+                    tasks=tasks,
+                    trace_name=f"{trace_name}{ep_id}",
+                    device_density=int(len(np.unique(block[:, 1]))),
+                )
+            )
+
+        print(f"✅ Built {len(episodes)} episodes from a reservoir of {len(sample)} tasks ({self.rows_seen} streamed)")
+        return episodes
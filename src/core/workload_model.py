@@ -0,0 +1,146 @@
+"""
+Fitted workload model for fast synthetic task sampling.
+
+Responsibilities:
+- fit the joint distribution of inter-arrival time, data size, cpu cycles and
+  deadline slack once from loaded real traces
+- keep the correlations between those features (joint fit in log space,
+  one component per priority level)
+- save / load the fitted model so sampling never touches the raw trace again
+- sample millions of tasks as NumPy arrays
+
+Two fitting methods are supported:
+- "empirical": smoothed bootstrap (Gaussian KDE) over a capped support sample
+- "lognormal": multivariate normal over the log features
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FEATURES = ["inter_arrival", "data_size", "cpu_cycles", "deadline_slack"]
+PRIORITY_LEVELS = (0, 1, 2, 3)
+_LOG_EPS = 1e-6
+
+
+class WorkloadModel:
+    """Per-priority joint model of task features, fitted in log space."""
+
+    def __init__(self, method: str = "empirical", max_support: int = 100_000, seed: int = 42):
+        if method not in ("empirical", "lognormal"):
+            raise ValueError(f"Unknown workload model method: {method}")
+        self.method = method
+        self.max_support = int(max_support)
+        self.seed = seed
+        self.priority_probs = np.zeros(len(PRIORITY_LEVELS))
+        self.components: Dict[int, Dict[str, np.ndarray]] = {}
+
+    @staticmethod
+    def _log_features(trace_df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        # The first task of a frame has no inter-arrival time and tied arrivals
+        # have a zero one; both would fit as log(_LOG_EPS) outliers, so only
+        # tasks with a positive gap to their predecessor are kept.
+        df = trace_df.sort_values("arrival_time", kind="mergesort")
+        arrival = df["arrival_time"].to_numpy(dtype=np.float64)
+        inter_arrival = np.diff(arrival)
+        keep = np.flatnonzero(inter_arrival > 0) + 1
+        features = np.column_stack([
+            inter_arrival[keep - 1],
+            df["data_size"].to_numpy(dtype=np.float64)[keep],
+            df["cpu_cycles"].to_numpy(dtype=np.float64)[keep],
+            df["deadline"].to_numpy(dtype=np.float64)[keep] - arrival[keep],
+        ])
+        return np.log(np.maximum(features, _LOG_EPS)), df["priority"].to_numpy(dtype=np.int64)[keep]
+
+    def fit(self, traces: List[pd.DataFrame]) -> "WorkloadModel":
+        """Fit the model from trace-format frames (see TraceProcessor)."""
+        rng = np.random.default_rng(self.seed)
+        parts = [self._log_features(df) for df in traces if len(df)]
+        if not parts or not any(len(part[1]) for part in parts):
+            raise ValueError("Cannot fit a workload model on empty traces (no task with a positive inter-arrival time)")
+        log_features = np.concatenate([part[0] for part in parts])
+        priorities = np.concatenate([part[1] for part in parts])
+
+        counts = np.array([(priorities == level).sum() for level in PRIORITY_LEVELS], dtype=np.float64)
+        self.priority_probs = counts / counts.sum()
+        self.components = {}
+
+        for level in PRIORITY_LEVELS:
+            rows = log_features[priorities == level]
+            if len(rows) == 0:
+                continue
+            mean = rows.mean(axis=0)
+            cov = np.cov(rows, rowvar=False) if len(rows) > 1 else np.zeros((len(FEATURES), len(FEATURES)))
+            cov = np.atleast_2d(cov) + np.eye(len(FEATURES)) * 1e-9
+            component = {"mean": mean, "chol": np.linalg.cholesky(cov)}
+
+            if self.method == "empirical":
+                if len(rows) > self.max_support:
+                    rows = rows[rng.choice(len(rows), size=self.max_support, replace=False)]
+                # Silverman's rule per feature; jitter stays within the joint support.
+                std = rows.std(axis=0)
+                bandwidth = std * (4.0 / ((len(FEATURES) + 2.0) * max(len(rows), 1))) ** (1.0 / (len(FEATURES) + 4.0))
+                component["support"] = rows
+                component["bandwidth"] = bandwidth
+            self.components[level] = component
+        return self
+
+    def sample_arrays(self, n_tasks: int, seed: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """Sample n_tasks tasks as trace-format column arrays."""
+        if not self.components:
+            raise RuntimeError("WorkloadModel must be fitted or loaded before sampling")
+        rng = np.random.default_rng(self.seed if seed is None else seed)
+
+        priorities = rng.choice(np.asarray(PRIORITY_LEVELS), size=n_tasks, p=self.priority_probs)
+        log_features = np.empty((n_tasks, len(FEATURES)), dtype=np.float64)
+        for level, component in self.components.items():
+            index = np.flatnonzero(priorities == level)
+            if len(index) == 0:
+                continue
+            noise = rng.standard_normal((len(index), len(FEATURES)))
+            if self.method == "empirical":
+                support = component["support"]
+                log_features[index] = support[rng.integers(0, len(support), size=len(index))] + noise * component["bandwidth"]
+            else:
+                log_features[index] = component["mean"] + noise @ component["chol"].T
+
+        features = np.exp(log_features)
+        arrival_time = np.cumsum(features[:, 0])
+        return {
+            "task_id": np.arange(n_tasks, dtype=np.int64),
+            "arrival_time": arrival_time,
+            "deadline": arrival_time + features[:, 3],
+            "data_size": np.maximum(1, np.rint(features[:, 1])).astype(np.int64),
+            "cpu_cycles": np.maximum(1, np.rint(features[:, 2])).astype(np.int64),
+            "priority": priorities.astype(np.int64),
+        }
+
+    def save(self, path: str) -> None:
+        payload = {
+            "method": np.array(self.method),
+            "seed": np.array(self.seed),
+            "max_support": np.array(self.max_support),
+            "priority_probs": self.priority_probs,
+        }
+        for level, component in self.components.items():
+            for key, value in component.items():
+                payload[f"p{level}_{key}"] = value
+
+        output_file = Path(path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(output_file, **payload)
+
+    @classmethod
+    def load(cls, path: str) -> "WorkloadModel":
+        with np.load(path) as data:
+            model = cls(method=str(data["method"]), max_support=int(data["max_support"]), seed=int(data["seed"]))
+            model.priority_probs = data["priority_probs"]
+            for level in PRIORITY_LEVELS:
+                keys = [key for key in data.files if key.startswith(f"p{level}_")]
+                if keys:
+                    model.components[level] = {key[len(f"p{level}_"):]: data[key] for key in keys}
+        return model
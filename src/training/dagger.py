@@ -0,0 +1,321 @@
+"""
+DAgger-style relabeling of learner-visited states.
+
+Supervised pretraining only sees states the oracle itself visits. Each DAgger
+iteration rolls out the current PPO checkpoint (in parallel workers), labels
+every visited state with the teacher (choose_oracle_action), appends the new
+labels to the columnar oracle store with state deduplication and runs a few
+supervised epochs on the aggregated train split. Iterations stop early once
+the evaluated success rate reaches `dagger.success_threshold`.
+
+The rows go to a copy of the oracle store under the DAgger outputs
+(`output.store_path`), made fresh from the base store at the start of every
+run; the canonical store that supervised pretraining and the staged-training
+anchor loaders read is never modified.
+
+The env steps DAgger needed are compared with the training steps plain staged
+training needed to reach the same threshold (its progress CSV, see
+run_staged_training_comparison), and written to `output.comparison_csv`.
+
+Relabeled rows go to the train split. Their episode ids are
+DAGGER_EPISODE_OFFSET * (iteration + 1) + episode, so they never collide with the
+oracle episodes.
+"""
+
+from __future__ import annotations
+
+import csv
+import math
+import shutil
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+from stable_baselines3 import PPO
+
+from src.agents.semantic_prior import flush_explanation_bank
+from src.core.config import load_config
+from src.core.evaluation import evaluate_policy
+from src.training.oracle_store import append_oracle_store, resolve_oracle_store
+from src.training.pretrain_policy import (
+    STATE_FEATURE_COLUMNS,
+    _build_pretraining_model,
+    _build_train_loader,
+    _choose_teacher_action,
+    _evaluate_supervised,
+    _load_split_datasets,
+    _oracle_row,
+    _oracle_shard_env,
+    _oracle_shard_specs,
+    _reset_oracle_episode,
+    _train_supervised_epoch,
+    build_coverage_tracker,
+    normalize_teacher_policy_name,
+)
+from src.training.train_agent import build_training_env
+
+DAGGER_EPISODE_OFFSET = 100000
+
+
+def _labeling_config(config: Dict[str, object]) -> Dict[str, object]:
+    """Seed/env of the DAgger config plus scoring/lookahead of the oracle labeling config."""
+    labeling_path = config.get("dagger", {}).get("labeling_config", "configs/synthetic/oracle_labeling.yaml")
+    labeling = load_config(labeling_path) if labeling_path else {}
+    return {
+        "seed": config.get("seed", 42),
+        "env": config.get("env", {}),
+        "scoring": labeling.get("scoring", {}),
+        "lookahead": labeling.get("lookahead", {}),
+    }
+
+
+def _collect_dagger_shard(
+    config: Dict[str, object],
+    checkpoint_path: str,
+    iteration: int,
+    episode_start: int,
+    episode_stop: int,
+) -> tuple:
+    """Roll out the learner checkpoint for episodes [episode_start, episode_stop)
+    and label every visited state with the teacher.
+
+    With probability `dagger.teacher_mix` the teacher's action is executed
+    instead of the learner's (beta in the DAgger paper). Returns (rows, env_steps).
+    """
+    dagger_cfg = config.get("dagger", {})
+    label_config = _labeling_config(config)
+    seed = int(config.get("seed", 42))
+    teacher_policy = normalize_teacher_policy_name(str(dagger_cfg.get("teacher_policy", "teacher_contextual_reward_aligned")))
+    teacher_mix = float(dagger_cfg.get("teacher_mix", 0.0))
+    deterministic = bool(dagger_cfg.get("deterministic", True))
+
+    # Every iteration visits fresh episodes, distinct from the oracle seeds.
+    # Episodes are seeded individually, so the rows do not depend on episodes_per_worker.
+    seed_offset = DAGGER_EPISODE_OFFSET * (iteration + 1)
+    env = _oracle_shard_env(label_config, seed_offset)
+    model = PPO.load(checkpoint_path, device=str(config.get("ppo", {}).get("device", "cpu")))
+
+    action_usage_counter: Counter = Counter()
+    coverage_tracker = build_coverage_tracker(teacher_policy, label_config["scoring"])
+    rows: List[Dict[str, object]] = []
+    env_steps = 0
+
+    for episode_idx in range(episode_start, episode_stop):
+        obs, _ = _reset_oracle_episode(env, seed + seed_offset + episode_idx)
+        rng = np.random.default_rng(seed + seed_offset + episode_idx)
+        done = False
+        step_idx = 0
+        while not done:
+            decision = _choose_teacher_action(env, teacher_policy, label_config, action_usage_counter, coverage_tracker)
+            rows.append(_oracle_row(teacher_policy, "train", DAGGER_EPISODE_OFFSET * (iteration + 1) + episode_idx, step_idx, decision, env, obs))
+            action_usage_counter[decision.action] += 1
+            if coverage_tracker is not None:
+                coverage_tracker.record(decision.action)
+
+            if teacher_mix > 0.0 and rng.random() < teacher_mix:
+                action = decision.action
+            else:
+                learner_action, _ = model.predict(obs, deterministic=deterministic)
+                action = int(np.asarray(learner_action).item())
+            obs, _, done, _, _ = env.step(action)
+            step_idx += 1
+            env_steps += 1
+
+    # Pool workers exit without atexit handlers; hand the buffered explanations over now.
+    flush_explanation_bank()
+    return rows, env_steps
+
+
+def _run_dagger_shard(args: tuple) -> tuple:
+    return _collect_dagger_shard(*args)
+
+
+def _fresh_dagger_store(base_store_path: Path, store_path: Path) -> Path:
+    """Replace `store_path` with a copy of the base oracle store."""
+    if store_path.resolve() == Path(base_store_path).resolve():
+        raise ValueError(f"output.store_path must differ from the base oracle store ({base_store_path})")
+    if store_path.exists():
+        shutil.rmtree(store_path)
+    store_path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copytree(base_store_path, store_path)
+    return store_path
+
+
+def _staged_steps_to_threshold(progress_csv: Path, threshold: float) -> List[Dict[str, object]]:
+    """Per init_mode of a staged-training progress CSV: runs (seeds), runs that
+    reached `threshold` and their mean training step at the first hit."""
+    first_hits: Dict[str, Dict[str, float]] = {}
+    with open(progress_csv, "r", encoding="utf-8", newline="") as handle:
+        for row in csv.DictReader(handle):
+            hits = first_hits.setdefault(row["init_mode"], {})
+            hits.setdefault(row["seed"], math.inf)
+            if float(row["metric_success_rate"]) >= threshold:
+                hits[row["seed"]] = min(hits[row["seed"]], float(row["training_step"]))
+
+    rows = []
+    for init_mode, hits in sorted(first_hits.items()):
+        reached = [step for step in hits.values() if math.isfinite(step)]
+        rows.append({
+            "method": f"staged_{init_mode}",
+            "runs": len(hits),
+            "runs_reaching_threshold": len(reached),
+            "env_steps_to_threshold": int(round(float(np.mean(reached)))) if reached else "",
+        })
+    return rows
+
+
+def _write_csv(path: Path, rows: List[Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def run_dagger_relabeling(config_path: str = "configs/synthetic/dagger_relabeling.yaml", workers: int | None = None) -> Dict[str, str]:
+    config = load_config(config_path)
+    dagger_cfg = config.get("dagger", {})
+    dataset_cfg = config.get("dataset", {})
+    training_cfg = config.get("training", {})
+    output_cfg = config.get("output", {})
+    seed = int(config.get("seed", 42))
+
+    teacher_policy = normalize_teacher_policy_name(str(dagger_cfg.get("teacher_policy", "teacher_contextual_reward_aligned")))
+    dataset_path = Path(dataset_cfg.get("csv_path", "results/raw/synthetic/pretraining/oracle_label_dataset.csv"))
+    base_store_path = resolve_oracle_store(dataset_cfg.get("store_path") or dataset_path)
+    if base_store_path is None:
+        raise FileNotFoundError(f"No columnar oracle store found for {dataset_path}; run generate_oracle_labels.py first")
+    store_path = _fresh_dagger_store(base_store_path, Path(output_cfg.get("store_path", "results/raw/synthetic/dagger/oracle_label_dataset")))
+
+    iterations = int(dagger_cfg.get("iterations", 5))
+    episodes_per_iteration = int(dagger_cfg.get("episodes_per_iteration", 20))
+    episodes_per_worker = int(dagger_cfg.get("episodes_per_worker", episodes_per_iteration) or episodes_per_iteration)
+    workers = max(1, int(workers if workers is not None else dagger_cfg.get("workers", 1)))
+    dedupe = bool(dagger_cfg.get("dedupe", True))
+    success_threshold = float(dagger_cfg.get("success_threshold", 0.75))
+    eval_episodes = int(dagger_cfg.get("eval_episodes", 5))
+
+    epochs_per_iteration = int(training_cfg.get("epochs_per_iteration", 3))
+    batch_size = int(training_cfg.get("batch_size", 128))
+    criterion = nn.CrossEntropyLoss()
+
+    model, _ = _build_pretraining_model(config)
+    checkpoint_path = str(dagger_cfg.get("init_checkpoint", "models/ppo/teacher_policy_pretrained/contextual_reward_aligned/ppo_pretrained.zip"))
+    model.set_parameters(PPO.load(checkpoint_path, device=str(config.get("ppo", {}).get("device", "cpu"))).get_parameters(), exact_match=True)
+    optimizer = torch.optim.Adam(model.policy.parameters(), lr=float(training_cfg.get("learning_rate", 3e-4)))
+
+    env_cfg = config.get("env", {})
+    eval_env = build_training_env(
+        seed=seed + 1000,
+        max_steps=int(env_cfg.get("max_steps", 50)),
+        num_edge_servers=int(env_cfg.get("num_edge_servers", 3)),
+        num_devices=int(env_cfg.get("num_devices", 5)),
+    )
+    model_root = Path(output_cfg.get("model_root", "models/ppo/dagger/contextual_reward_aligned"))
+    eval_csv = output_cfg.get("eval_csv", "results/raw/synthetic/dagger/dagger_evaluation.csv")
+
+    metrics_rows: List[Dict[str, object]] = []
+    total_env_steps = 0
+    reached_threshold = False
+    for iteration in range(iterations):
+        specs = _oracle_shard_specs([teacher_policy], episodes_per_iteration, episodes_per_worker)
+        shard_args = [(config, checkpoint_path, iteration, start, stop) for _, _, start, stop in specs]
+        if workers > 1 and len(shard_args) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(shard_args))) as executor:
+                shard_results = list(executor.map(_run_dagger_shard, shard_args))
+        else:
+            shard_results = [_run_dagger_shard(args) for args in shard_args]
+
+        rows = [row for shard_rows, _ in shard_results for row in shard_rows]
+        iteration_env_steps = sum(steps for _, steps in shard_results)
+        total_env_steps += iteration_env_steps
+        append_stats = append_oracle_store(store_path, rows, STATE_FEATURE_COLUMNS, dedupe=dedupe)
+
+        datasets = _load_split_datasets(dataset_path, teacher_policy, store_path=store_path)
+        train_loader = _build_train_loader(
+            datasets["train"],
+            batch_size=batch_size,
+            balance_actions=bool(training_cfg.get("balance_actions", False)),
+            balance_power=float(training_cfg.get("balance_power", 1.0)),
+            samples_per_epoch=training_cfg.get("samples_per_epoch"),
+            margin_sampling=training_cfg.get("margin_sampling"),
+        )
+        train_metrics = {"loss": 0.0, "accuracy": 0.0}
+        for _ in range(epochs_per_iteration):
+            train_metrics = _train_supervised_epoch(model, train_loader, optimizer, criterion)
+        val_metrics = _evaluate_supervised(model, DataLoader(datasets["val"], batch_size=batch_size, shuffle=False), criterion)
+
+        save_path = model_root / f"iter_{iteration + 1:02d}" / "ppo_dagger"
+        save_path.parent.mkdir(parents=True, exist_ok=True)
+        model.save(str(save_path))
+        checkpoint_path = str(save_path) + ".zip"
+
+        eval_result = evaluate_policy(
+            eval_env,
+            model,
+            num_episodes=eval_episodes,
+            run_name=f"PPO_dagger_iter{iteration + 1}",
+            semantic_mode="action_prior",
+            config_seed=seed,
+            csv_path=eval_csv,
+            extra_fields={"config_teacher_policy": teacher_policy, "config_dagger_iteration": iteration + 1},
+        )
+        success_rate = float(eval_result["metric_success_rate"])
+        metrics_rows.append({
+            "iteration": iteration + 1,
+            "env_steps": iteration_env_steps,
+            "cumulative_env_steps": total_env_steps,
+            "labeled_rows": len(rows),
+            "appended_rows": append_stats["appended"],
+            "duplicate_rows": append_stats["duplicates"],
+            "train_rows": len(datasets["train"]),
+            "train_loss": round(train_metrics["loss"], 6),
+            "val_accuracy": round(val_metrics["accuracy"], 6),
+            "success_rate": round(success_rate, 6),
+            "checkpoint_path": checkpoint_path,
+        })
+        print(
+            f"[DAGGER] iter {iteration + 1}: +{append_stats['appended']} rows ({append_stats['duplicates']} duplicates), "
+            f"val acc {val_metrics['accuracy'] * 100:.2f}%, success {success_rate * 100:.2f}%, env steps {total_env_steps}"
+        )
+        if success_rate >= success_threshold:
+            reached_threshold = True
+            break
+
+    metrics_csv = Path(output_cfg.get("metrics_csv", "results/raw/synthetic/dagger/dagger_iterations.csv"))
+    _write_csv(metrics_csv, metrics_rows)
+
+    comparison_rows = [{
+        "method": "dagger",
+        "runs": 1,
+        "runs_reaching_threshold": int(reached_threshold),
+        "env_steps_to_threshold": total_env_steps if reached_threshold else "",
+    }]
+    staged_progress_csv = Path(dagger_cfg.get("staged_progress_csv", "results/raw/synthetic/teacher_policy_sensitivity/contextual_reward_aligned/staged_training_progress.csv"))
+    if staged_progress_csv.exists():
+        comparison_rows.extend(_staged_steps_to_threshold(staged_progress_csv, success_threshold))
+    else:
+        print(f"[DAGGER] No staged-training progress CSV at {staged_progress_csv}; run run_staged_training_comparison.py to compare env steps")
+    for row in comparison_rows:
+        steps = row["env_steps_to_threshold"]
+        print(
+            f"[DAGGER] {row['method']}: success >= {success_threshold:.2f} in {row['runs_reaching_threshold']}/{row['runs']} run(s)"
+            + (f", mean env steps {steps}" if steps != "" else "")
+        )
+    comparison_csv = Path(output_cfg.get("comparison_csv", "results/raw/synthetic/dagger/dagger_vs_staged_env_steps.csv"))
+    _write_csv(comparison_csv, comparison_rows)
+
+    return {
+        "metrics_csv": str(metrics_csv),
+        "comparison_csv": str(comparison_csv),
+        "store_path": str(store_path),
+        "checkpoint_path": checkpoint_path,
+        "iterations": str(len(metrics_rows)),
+        "env_steps": str(total_env_steps),
+        "reached_threshold": "yes" if reached_threshold else "no",
+    }
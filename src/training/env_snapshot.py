@@ -0,0 +1,218 @@
+"""
+Cheap snapshot/restore of the mutable OffloadingEnv state.
+
+Deep-copying the SimPy-backed env is far too slow for multi-step oracle
+lookahead, so only the state that env.step mutates is captured:
+
+    env:           previous_action, current_step, current_task, current_device
+                   (plus `extra_env_fields`, e.g. the task cursor of a trace env)
+    current task:  every instance attribute (env.step may annotate the task)
+    devices:       battery, location (mobility moves devices, and the
+                   closest-edge and datarate calculations depend on it)
+    edge servers:  current_load, remaining_energy
+    cloud server:  current_load, queue_length
+    channel:       every instance attribute (fading state, private RNGs)
+    SimPy clock:   now, the pending event queue and the event id counter
+    random state:  `random`, `np.random` and the env's own np_random generator
+
+Every listed field is required: a missing one raises AttributeError instead
+of being skipped, so a renamed env attribute cannot leak rollout state into
+the real trajectory. The cost is O(devices + edge servers + attributes) and
+does not depend on the SimPy process graph.
+
+SimPy processes cannot be rewound. Events scheduled during a rollout are
+dropped on restore; if the rollout processed an event that was already
+pending at snapshot time, restore_env raises RuntimeError.
+experiments/synthetic/verify_env_snapshot.py checks that step -> restore ->
+step reproduces the observation, reward and info of the real env.
+
+Typical use:
+    with simulated_rollout(env):
+        env.step(action)
+        ...
+"""
+
+from __future__ import annotations
+
+import itertools
+import random
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from src.agents.semantic_prior import suspend_explanation_logging
+from src.core.reward import suspend_reward_recording
+
+ENV_FIELDS = ("previous_action", "current_step", "current_task", "current_device")
+DEVICE_FIELDS = ("battery", "location")
+EDGE_SERVER_FIELDS = ("current_load", "remaining_energy")
+CLOUD_SERVER_FIELDS = ("current_load", "queue_length")
+
+
+@dataclass
+class _RngState:
+    """Saved state of a random.Random / np.random.Generator attribute, restored in place."""
+    state: object
+
+
+@dataclass
+class _SimClock:
+    sim: object
+    now: float
+    queue: list
+    next_eid: int
+
+
+@dataclass
+class EnvSnapshot:
+    env_state: Dict[str, object]
+    task: object
+    task_state: Dict[str, object]
+    channel_state: Dict[str, object]
+    object_states: List[Tuple[object, Dict[str, object]]]
+    sim_clock: _SimClock
+    python_rng: tuple
+    numpy_rng: tuple
+    env_rng: dict | None
+
+
+def _copy_value(value):
+    # Containers are copied one level deep so in-place appends/pops are undone too.
+    if isinstance(value, deque):
+        return deque(value, value.maxlen)
+    if isinstance(value, (list, dict, set)):
+        return type(value)(value)
+    if isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, random.Random):
+        return _RngState(value.getstate())
+    if isinstance(value, np.random.Generator):
+        return _RngState(value.bit_generator.state)
+    return value
+
+
+def _restore_value(obj, name: str, saved) -> None:
+    if isinstance(saved, _RngState):
+        rng = getattr(obj, name)
+        if isinstance(rng, random.Random):
+            rng.setstate(saved.state)
+        else:
+            rng.bit_generator.state = saved.state
+        return
+    setattr(obj, name, _copy_value(saved))
+
+
+def _capture(obj, field_names: Sequence[str], owner: str) -> Dict[str, object]:
+    missing = [name for name in field_names if not hasattr(obj, name)]
+    if missing:
+        raise AttributeError(f"Cannot snapshot {owner}: missing per-step field(s) {missing}")
+    return {name: _copy_value(getattr(obj, name)) for name in field_names}
+
+
+def _capture_instance(obj, owner: str) -> Dict[str, object]:
+    if not hasattr(obj, "__dict__"):
+        raise AttributeError(f"Cannot snapshot {owner}: {type(obj).__name__} has no instance __dict__")
+    return {name: _copy_value(value) for name, value in vars(obj).items()}
+
+
+def _restore_instance(obj, state: Dict[str, object]) -> None:
+    for name in [name for name in vars(obj) if name not in state]:
+        delattr(obj, name)
+    for name, value in state.items():
+        _restore_value(obj, name, value)
+
+
+def _tracked_objects(env) -> List[Tuple[object, Sequence[str], str]]:
+    objects = [(device, DEVICE_FIELDS, f"device {index}") for index, device in enumerate(env.devices)]
+    objects.extend((server, EDGE_SERVER_FIELDS, f"edge server {index}") for index, server in enumerate(env.edge_servers))
+    objects.append((env.cloud_server, CLOUD_SERVER_FIELDS, "cloud server"))
+    return objects
+
+
+def _simpy_env(env):
+    """The SimPy environment the env's servers and devices were built on."""
+    for obj in [env.cloud_server, *env.edge_servers, *env.devices]:
+        sim = getattr(obj, "env", None)
+        if sim is not None and hasattr(sim, "_now") and hasattr(sim, "_queue"):
+            return sim
+    raise AttributeError("Cannot snapshot env: no SimPy environment found on its cloud server, edge servers or devices")
+
+
+def _capture_sim_clock(sim) -> _SimClock:
+    # itertools.count cannot be read without advancing it; put back an equivalent counter.
+    next_eid = next(sim._eid)
+    sim._eid = itertools.count(next_eid)
+    return _SimClock(sim=sim, now=sim._now, queue=list(sim._queue), next_eid=next_eid)
+
+
+def _restore_sim_clock(clock: _SimClock) -> None:
+    sim = clock.sim
+    pending = {id(entry) for entry in sim._queue}
+    if any(id(entry) not in pending for entry in clock.queue):
+        raise RuntimeError(
+            "Cannot restore env: the rollout processed SimPy events that were pending at snapshot time, "
+            "and SimPy processes cannot be rewound"
+        )
+    sim._now = clock.now
+    sim._queue = list(clock.queue)
+    sim._eid = itertools.count(clock.next_eid)
+
+
+def snapshot_env(env, extra_env_fields: Sequence[str] = ()) -> EnvSnapshot:
+    """Capture the mutable per-step state of `env` (see module docstring)."""
+    env = getattr(env, "unwrapped", env)
+    env_rng = getattr(env, "_np_random", None)
+    env_state = _capture(env, tuple(ENV_FIELDS) + tuple(extra_env_fields), "env")
+    return EnvSnapshot(
+        env_state=env_state,
+        task=env.current_task,
+        task_state=_capture_instance(env.current_task, "current task") if env.current_task is not None else {},
+        channel_state=_capture_instance(env.channel, "channel"),
+        object_states=[(obj, _capture(obj, field_names, owner)) for obj, field_names, owner in _tracked_objects(env)],
+        sim_clock=_capture_sim_clock(_simpy_env(env)),
+        python_rng=random.getstate(),
+        numpy_rng=np.random.get_state(),
+        env_rng=env_rng.bit_generator.state if isinstance(env_rng, np.random.Generator) else None,
+    )
+
+
+def restore_env(env, snapshot: EnvSnapshot) -> None:
+    """Put `env` back into the state captured by snapshot_env.
+
+    The snapshot stays valid and can be restored again.
+    """
+    env = getattr(env, "unwrapped", env)
+    _restore_sim_clock(snapshot.sim_clock)
+    for name, value in snapshot.env_state.items():
+        _restore_value(env, name, value)
+    if snapshot.task is not None:
+        _restore_instance(snapshot.task, snapshot.task_state)
+    _restore_instance(env.channel, snapshot.channel_state)
+    for obj, state in snapshot.object_states:
+        for name, value in state.items():
+            _restore_value(obj, name, value)
+    random.setstate(snapshot.python_rng)
+    np.random.set_state(snapshot.numpy_rng)
+    if snapshot.env_rng is not None:
+        env._np_random.bit_generator.state = snapshot.env_rng
+
+
+@contextmanager
+def env_rollback(env, extra_env_fields: Sequence[str] = ()):
+    """Run the block against `env`, then restore the state it started from."""
+    snapshot = snapshot_env(env, extra_env_fields)
+    try:
+        yield snapshot
+    finally:
+        restore_env(env, snapshot)
+
+
+@contextmanager
+def simulated_rollout(env, extra_env_fields: Sequence[str] = ()):
+    """env_rollback for steps that are not real decisions: the explanation bank
+    and an active RewardTermRecorder do not see them."""
+    with suspend_explanation_logging(), suspend_reward_recording(), env_rollback(env, extra_env_fields) as snapshot:
+        yield snapshot
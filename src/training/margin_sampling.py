@@ -0,0 +1,157 @@
+"""
+Margin-indexed hard-example sampling for supervised pretraining.
+
+teacher_margin is the score gap between the teacher's best and second-best
+action, so low-margin rows are the ambiguous states the policy learns last.
+MarginIndex sorts the rows of a dataset by margin once (an argsort of the
+margin column; rows themselves are never copied) and splits the sorted order
+into equal-count buckets, bucket 0 holding the lowest margins.
+
+MarginCurriculumSampler draws row indices with bucket weights
+
+    weight(b) = hard_ratio ** (1 - b / (num_buckets - 1))
+
+so bucket 0 is drawn hard_ratio times as often as the top bucket. hard_ratio
+moves linearly from hard_ratio_start to hard_ratio_end over anneal_epochs
+(one epoch per pass over the sampler); optional per-row base weights, e.g.
+action balancing, are multiplied in. A min_margin cutoff becomes a zero
+weight on the rows below it instead of a filtered copy of the dataset.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterator
+
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+
+DEFAULT_MARGIN_BUCKETS = 10
+
+
+@dataclass
+class MarginIndex:
+    order: np.ndarray
+    offsets: np.ndarray
+    sorted_margins: np.ndarray
+
+    @classmethod
+    def build(cls, margins, num_buckets: int = DEFAULT_MARGIN_BUCKETS) -> "MarginIndex":
+        margins = np.asarray(margins, dtype=np.float64).reshape(-1)
+        order = np.argsort(margins, kind="stable")
+        num_buckets = max(1, min(int(num_buckets), len(margins))) if len(margins) else 1
+        offsets = np.round(np.linspace(0, len(margins), num_buckets + 1)).astype(np.int64)
+        return cls(order=order, offsets=offsets, sorted_margins=margins[order])
+
+    @property
+    def num_buckets(self) -> int:
+        return len(self.offsets) - 1
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def bucket_rows(self, bucket: int) -> np.ndarray:
+        """Row ids of one bucket (a view into the sorted order)."""
+        return self.order[self.offsets[bucket] : self.offsets[bucket + 1]]
+
+    def rows_below(self, margin: float) -> np.ndarray:
+        """Row ids with margin < `margin` (a view into the sorted order)."""
+        return self.order[: np.searchsorted(self.sorted_margins, float(margin), side="left")]
+
+    def row_buckets(self) -> np.ndarray:
+        """Bucket id of every row, in dataset order."""
+        buckets = np.empty(len(self.order), dtype=np.int64)
+        buckets[self.order] = np.repeat(np.arange(self.num_buckets), np.diff(self.offsets))
+        return buckets
+
+    def bucket_bounds(self) -> np.ndarray:
+        """(num_buckets, 2) lowest/highest margin of every non-empty bucket."""
+        starts, stops = self.offsets[:-1], np.maximum(self.offsets[1:] - 1, self.offsets[:-1])
+        return np.stack([self.sorted_margins[starts], self.sorted_margins[stops]], axis=1) if len(self.order) else np.zeros((0, 2))
+
+
+def action_balance_weights(labels, balance_power: float = 1.0, sample_weights=None) -> torch.Tensor:
+    """Per-row weight sample_weight / count(label) ** balance_power.
+
+    With stored sample weights, count(label) is the weighted count, i.e. the
+    label's size in the mix the sample weights already describe.
+    """
+    label_list = torch.as_tensor(labels).cpu().tolist()
+    if sample_weights is None:
+        label_counts = Counter(label_list)
+        return torch.tensor(
+            [1.0 / (max(1, int(label_counts.get(label, 1))) ** float(balance_power)) for label in label_list],
+            dtype=torch.double,
+        )
+    weights = torch.as_tensor(np.asarray(sample_weights, dtype=np.float64))
+    label_counts = Counter()
+    for label, weight in zip(label_list, weights.tolist()):
+        label_counts[label] += weight
+    counts = torch.tensor([max(1.0, label_counts[label]) for label in label_list], dtype=torch.double)
+    return weights / counts ** float(balance_power)
+
+
+class MarginCurriculumSampler(Sampler[int]):
+    def __init__(
+        self,
+        margin_index: MarginIndex,
+        num_samples: int | None = None,
+        hard_ratio_start: float = 8.0,
+        hard_ratio_end: float = 2.0,
+        anneal_epochs: int = 20,
+        base_weights: torch.Tensor | None = None,
+        min_margin: float | None = None,
+        generator: torch.Generator | None = None,
+    ):
+        self.margin_index = margin_index
+        self.num_samples = int(num_samples or len(margin_index))
+        self.hard_ratio_start = float(hard_ratio_start)
+        self.hard_ratio_end = float(hard_ratio_end)
+        self.anneal_epochs = max(1, int(anneal_epochs))
+        self.generator = generator
+        self.epoch = 0
+
+        self._row_buckets = torch.from_numpy(margin_index.row_buckets())
+        self._base_weights = torch.ones(len(margin_index), dtype=torch.double) if base_weights is None else base_weights.double().clone()
+        if min_margin is not None:
+            self._base_weights[torch.from_numpy(margin_index.rows_below(min_margin))] = 0.0
+        if len(margin_index) and float(self._base_weights.sum()) <= 0.0:
+            raise ValueError(f"No rows left to sample with min_margin={min_margin}")
+
+    def hard_ratio(self, epoch: int) -> float:
+        progress = min(1.0, epoch / self.anneal_epochs)
+        return self.hard_ratio_start + (self.hard_ratio_end - self.hard_ratio_start) * progress
+
+    def bucket_weights(self, epoch: int) -> torch.Tensor:
+        num_buckets = self.margin_index.num_buckets
+        position = torch.arange(num_buckets, dtype=torch.double) / max(1, num_buckets - 1)
+        return self.hard_ratio(epoch) ** (1.0 - position)
+
+    def row_weights(self, epoch: int) -> torch.Tensor:
+        return self._base_weights * self.bucket_weights(epoch)[self._row_buckets]
+
+    def __iter__(self) -> Iterator[int]:
+        weights = self.row_weights(self.epoch)
+        self.epoch += 1
+        if len(weights) == 0:
+            return iter(())
+        return iter(torch.multinomial(weights, self.num_samples, replacement=True, generator=self.generator).tolist())
+
+    def __len__(self) -> int:
+        return self.num_samples
+
+
+def build_margin_sampler(margins, sampling_cfg: Dict[str, object], num_samples: int | None = None, base_weights: torch.Tensor | None = None) -> MarginCurriculumSampler:
+    """MarginCurriculumSampler from a `margin_sampling` config section."""
+    min_margin = sampling_cfg.get("min_margin")
+    return MarginCurriculumSampler(
+        MarginIndex.build(margins, int(sampling_cfg.get("num_buckets", DEFAULT_MARGIN_BUCKETS))),
+        num_samples=num_samples,
+        hard_ratio_start=float(sampling_cfg.get("hard_ratio_start", 8.0)),
+        hard_ratio_end=float(sampling_cfg.get("hard_ratio_end", 2.0)),
+        anneal_epochs=int(sampling_cfg.get("anneal_epochs", 20)),
+        base_weights=base_weights,
+        min_margin=float(min_margin) if min_margin is not None else None,
+    )
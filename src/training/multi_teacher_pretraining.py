@@ -0,0 +1,284 @@
+"""
+Supervised pretraining of every teacher policy in one run.
+
+run_supervised_pretraining trains one teacher per call: it re-reads the
+dataset, builds its own PPO model and runs its own training loop. Here the
+dataset is read once for all K teachers and their K policy networks are
+trained side by side as one batched network:
+
+    logits (K, B, A) = action_net(act(... act(x (K, B, D) @ W1 (K, D, H) + b1) ...))
+
+with torch.baddbmm per layer, one batch per teacher drawn from that teacher's
+own training sampler (weighting, action balancing and margin curriculum as in
+the single-teacher loader). The K networks share no parameters and the loss
+is the sum of the per-teacher mean cross-entropies, so each slice receives
+exactly the gradient it would get when trained alone.
+
+The stacked weights are initialized from, and exported back into, the
+pi-branch (mlp_extractor.policy_net + action_net) of one SB3 PPO MlpPolicy per
+teacher; the value branch is left as built, as in run_supervised_pretraining.
+Early stopping is tracked per teacher and every teacher's best weights are
+saved as a standard PPO checkpoint.
+"""
+
+from __future__ import annotations
+
+import csv
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import torch
+from torch import nn
+from torch.utils.data import DataLoader
+
+from src.core.config import load_config
+from src.training.oracle_store import resolve_oracle_store
+from src.training.pretrain_policy import (
+    OracleLabelDataset,
+    _build_pretraining_model,
+    _build_train_loader,
+    _evaluate_supervised,
+    _load_split_datasets,
+    _row_margin,
+    _row_teacher_policy,
+    _split_rows,
+    normalize_teacher_policy_name,
+)
+
+
+def teacher_slug(teacher_policy: str) -> str:
+    return teacher_policy.replace("teacher_", "")
+
+
+def _policy_linear_layers(policy) -> List[nn.Linear]:
+    """Linear layers of the pi-branch of an SB3 ActorCriticPolicy, input to logits."""
+    layers = []
+    for module in policy.mlp_extractor.policy_net:
+        if isinstance(module, nn.Linear):
+            layers.append(module)
+        elif not isinstance(module, policy.activation_fn):
+            raise ValueError(f"Unsupported layer in policy_net: {type(module).__name__}")
+    return layers + [policy.action_net]
+
+
+class StackedPolicyNets(nn.Module):
+    """K independent MLP policy networks evaluated with one batched matmul per layer."""
+
+    def __init__(self, policies: Sequence[object]):
+        super().__init__()
+        layer_lists = [_policy_linear_layers(policy) for policy in policies]
+        if len({tuple(tuple(layer.weight.shape) for layer in layers) for layers in layer_lists}) != 1:
+            raise ValueError("All teacher policies must share one network architecture")
+        self.num_nets = len(policies)
+        self.activation = policies[0].activation_fn()
+        self.weights = nn.ParameterList(
+            nn.Parameter(torch.stack([layers[depth].weight.detach().t() for layers in layer_lists]).clone())
+            for depth in range(len(layer_lists[0]))
+        )
+        self.biases = nn.ParameterList(
+            nn.Parameter(torch.stack([layers[depth].bias.detach().unsqueeze(0) for layers in layer_lists]).clone())
+            for depth in range(len(layer_lists[0]))
+        )
+
+    def forward(self, observations: torch.Tensor) -> torch.Tensor:
+        """(K, B, obs_dim) -> (K, B, num_actions) logits."""
+        hidden = observations
+        last = len(self.weights) - 1
+        for depth, (weight, bias) in enumerate(zip(self.weights, self.biases)):
+            hidden = torch.baddbmm(bias, hidden, weight)
+            if depth < last:
+                hidden = self.activation(hidden)
+        return hidden
+
+    def snapshot(self, index: int) -> List[torch.Tensor]:
+        return [param[index].detach().clone() for param in (*self.weights, *self.biases)]
+
+    def export(self, snapshot: List[torch.Tensor], policy) -> None:
+        """Copy one network's (snapshotted) weights into an SB3 policy."""
+        layers = _policy_linear_layers(policy)
+        weights, biases = snapshot[: len(layers)], snapshot[len(layers) :]
+        with torch.no_grad():
+            for layer, weight, bias in zip(layers, weights, biases):
+                layer.weight.copy_(weight.t())
+                layer.bias.copy_(bias.reshape(-1))
+
+
+def _load_teacher_datasets(
+    dataset_path: Path,
+    teacher_policies: Sequence[str],
+    min_margin: float = 0.0,
+    store_path: Path | None = None,
+) -> Dict[str, Dict[str, OracleLabelDataset]]:
+    """train/val/test datasets of every teacher; the CSV is read once for all of them."""
+    store = resolve_oracle_store(store_path) if store_path is not None else resolve_oracle_store(dataset_path)
+    if store is not None:
+        return {teacher: _load_split_datasets(dataset_path, teacher, min_margin=min_margin, store_path=store) for teacher in teacher_policies}
+
+    rows_by_teacher: Dict[str, List[Dict[str, object]]] = defaultdict(list)
+    requested = set(teacher_policies)
+    with open(dataset_path, "r", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            teacher = _row_teacher_policy(row)
+            if teacher in requested and (min_margin <= 0.0 or _row_margin(row) >= min_margin):
+                rows_by_teacher[teacher].append(row)
+    datasets = {}
+    for teacher in teacher_policies:
+        split_rows = _split_rows(rows_by_teacher[teacher])
+        datasets[teacher] = {split: OracleLabelDataset(split_rows.get(split, [])) for split in ("train", "val", "test")}
+    return datasets
+
+
+def _epoch_indices(loader: DataLoader, num_samples: int) -> torch.Tensor:
+    """One epoch of row ids from a loader's sampler, cycled up to num_samples."""
+    dataset_size = len(loader.dataset)
+    chunks = [torch.as_tensor(list(iter(loader.sampler)), dtype=torch.long)]
+    total = len(chunks[0])
+    while total < num_samples:
+        chunks.append(torch.randperm(dataset_size))
+        total += dataset_size
+    return torch.cat(chunks)[:num_samples]
+
+
+def _write_metrics(path: Path, metrics_rows: List[Dict[str, object]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(metrics_rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(metrics_rows)
+
+
+def run_multi_teacher_pretraining(
+    config_path: str = "configs/synthetic/supervised_pretraining.yaml",
+    teacher_policies: Sequence[str] | None = None,
+) -> Dict[str, Dict[str, str]]:
+    """Pretrain one PPO policy per teacher in a single batched run.
+
+    Teachers come from `teacher_policies` or multi_teacher.teacher_policies;
+    multi_teacher.checkpoint_path / metrics_csv are templates with a `{slug}`
+    field (teacher name without the `teacher_` prefix). Returns, per teacher,
+    the same result dict as run_supervised_pretraining.
+    """
+    config = load_config(config_path)
+    dataset_cfg = config.get("dataset", {})
+    training_cfg = config.get("training", {})
+    multi_cfg = config.get("multi_teacher", {}) or {}
+    teachers = [normalize_teacher_policy_name(str(name)) for name in (teacher_policies or multi_cfg.get("teacher_policies", []))]
+    if not teachers:
+        raise ValueError("Multi-teacher pretraining needs at least one teacher policy")
+
+    dataset_path = Path(dataset_cfg.get("csv_path", "results/raw/synthetic/pretraining/oracle_label_dataset.csv"))
+    min_margin = float(dataset_cfg.get("min_margin", 0.0))
+    batch_size = int(training_cfg.get("batch_size", 128))
+    balance_actions = bool(dataset_cfg.get("balance_actions", False))
+    balance_power = float(dataset_cfg.get("balance_power", 1.0))
+    margin_sampling = dataset_cfg.get("margin_sampling") or {}
+    epochs = int(training_cfg.get("epochs", 15))
+    learning_rate = float(training_cfg.get("learning_rate", 1e-3))
+    patience = int(training_cfg.get("early_stopping_patience", 5))
+    min_delta = float(training_cfg.get("early_stopping_min_delta", 1e-4))
+    checkpoint_template = str(multi_cfg.get("checkpoint_path", "models/ppo/teacher_policy_pretrained/{slug}/ppo_pretrained"))
+    metrics_template = str(multi_cfg.get("metrics_csv", "results/raw/synthetic/teacher_policy_sensitivity/{slug}/supervised_pretraining_metrics.csv"))
+
+    store_path = dataset_cfg.get("store_path")
+    datasets = _load_teacher_datasets(dataset_path, teachers, min_margin=min_margin, store_path=Path(store_path) if store_path else None)
+    for teacher in teachers:
+        if len(datasets[teacher]["train"]) == 0:
+            raise ValueError(f"No training rows for teacher policy: {teacher}")
+    num_samples = int(dataset_cfg.get("samples_per_epoch") or max(len(datasets[teacher]["train"]) for teacher in teachers))
+
+    train_loaders = [
+        _build_train_loader(
+            datasets[teacher]["train"],
+            batch_size=batch_size,
+            balance_actions=balance_actions,
+            balance_power=balance_power,
+            samples_per_epoch=num_samples,
+            margin_sampling=margin_sampling,
+        )
+        for teacher in teachers
+    ]
+    val_loaders = [DataLoader(datasets[teacher]["val"], batch_size=batch_size, shuffle=False) for teacher in teachers]
+    test_loaders = [DataLoader(datasets[teacher]["test"], batch_size=batch_size, shuffle=False) for teacher in teachers]
+
+    model, env = _build_pretraining_model(config)
+    models = [model] + [_build_pretraining_model(config, env=env)[0] for _ in teachers[1:]]
+    device = model.device
+    nets = StackedPolicyNets([member.policy for member in models]).to(device)
+    criterion = nn.CrossEntropyLoss()
+    optimizer = torch.optim.Adam(nets.parameters(), lr=learning_rate)
+
+    num_teachers = len(teachers)
+    metrics_rows: List[List[Dict[str, object]]] = [[] for _ in teachers]
+    best_val_acc = [-1.0] * num_teachers
+    best_epoch = [-1] * num_teachers
+    best_state = [nets.snapshot(index) for index in range(num_teachers)]
+    epochs_without_improvement = [0] * num_teachers
+    active = torch.ones(num_teachers, dtype=torch.bool)
+
+    for epoch in range(1, epochs + 1):
+        indices = torch.stack([_epoch_indices(loader, num_samples) for loader in train_loaders])
+        total_loss = torch.zeros(num_teachers, dtype=torch.float64)
+        correct = torch.zeros(num_teachers, dtype=torch.long)
+        for start in range(0, num_samples, batch_size):
+            batch = indices[:, start : start + batch_size]
+            observations = torch.stack([datasets[teacher]["train"].observations[batch[index]] for index, teacher in enumerate(teachers)]).to(device)
+            labels = torch.stack([datasets[teacher]["train"].labels[batch[index]] for index, teacher in enumerate(teachers)]).to(device)
+
+            optimizer.zero_grad()
+            logits = nets(observations)
+            losses = nn.functional.cross_entropy(logits.flatten(0, 1), labels.flatten(), reduction="none").view(num_teachers, -1).mean(dim=1)
+            (losses * active.to(device)).sum().backward()
+            optimizer.step()
+
+            total_loss += losses.detach().cpu().double() * batch.shape[1]
+            correct += (torch.argmax(logits.detach(), dim=-1) == labels).sum(dim=1).cpu()
+
+        for index, teacher in enumerate(teachers):
+            if not active[index]:
+                continue
+            nets.export(nets.snapshot(index), models[index].policy)
+            val_metrics = _evaluate_supervised(models[index], val_loaders[index], criterion)
+            metrics_rows[index].append(
+                {
+                    "epoch": epoch,
+                    "train_loss": round(float(total_loss[index]) / num_samples, 6),
+                    "train_accuracy": round(float(correct[index]) / num_samples, 6),
+                    "val_loss": round(val_metrics["loss"], 6),
+                    "val_accuracy": round(val_metrics["accuracy"], 6),
+                }
+            )
+            if val_metrics["accuracy"] > (best_val_acc[index] + min_delta):
+                best_val_acc[index] = val_metrics["accuracy"]
+                best_epoch[index] = epoch
+                best_state[index] = nets.snapshot(index)
+                epochs_without_improvement[index] = 0
+            else:
+                epochs_without_improvement[index] += 1
+            if epochs_without_improvement[index] >= patience:
+                active[index] = False
+        if not active.any():
+            break
+
+    results: Dict[str, Dict[str, str]] = {}
+    for index, teacher in enumerate(teachers):
+        slug = teacher_slug(teacher)
+        checkpoint_path = Path(checkpoint_template.format(slug=slug))
+        checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        nets.export(best_state[index], models[index].policy)
+        models[index].save(str(checkpoint_path))
+        final_test = _evaluate_supervised(models[index], test_loaders[index], criterion)
+
+        metrics_csv = Path(metrics_template.format(slug=slug))
+        _write_metrics(metrics_csv, metrics_rows[index])
+        results[teacher] = {
+            "metrics_csv": str(metrics_csv),
+            "report_path": "",
+            "checkpoint_path": str(checkpoint_path) + ".zip",
+            "best_epoch": str(best_epoch[index]),
+            "best_val_accuracy": f"{best_val_acc[index] * 100:.2f}",
+            "test_accuracy": f"{final_test['accuracy'] * 100:.2f}",
+            "executed_epochs": str(len(metrics_rows[index])),
+            "early_stopping_triggered": "yes" if not active[index] else "no",
+        }
+    return results
@@ -0,0 +1,368 @@
+"""
+Batched NumPy oracle engine.
+
+Scores every offloading action for many states at once. The arithmetic mirrors
+`_predict_action_outcome` / `_score_outcome` in pretrain_policy.py operation
+by operation, so greedy labels and margins match the scalar path exactly
+(see experiments/synthetic/verify_batched_oracle.py).
+
+Typical use:
+    states = stack_oracle_states([oracle_state_from_env(env) for ...])
+    outcomes = predict_action_outcomes(states)
+    scores = score_all_modes(outcomes, states, scoring_cfg)
+    actions, margins = select_greedy_actions(scores["reward_aligned_oracle"], outcomes)
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, fields
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from src.core.reward import SEMANTIC_TARGET_CODES, SEMANTIC_TARGET_OTHER, calculate_reward_batch
+
+ALL_ACTIONS = (0, 1, 2, 3, 4, 5)
+EDGE_RATIOS = (0.0, 0.25, 0.5, 0.75, 1.0, 1.0)
+SCORING_MODES = ("latency_oracle", "energy_oracle", "weighted_objective_oracle", "reward_aligned_oracle")
+
+
+def encode_semantic_target(target) -> int:
+    return SEMANTIC_TARGET_CODES.get(target, SEMANTIC_TARGET_OTHER)
+
+
+@dataclass
+class OracleStateBatch:
+    """Per-state inputs of the oracle, one array entry per state."""
+
+    size_bits: np.ndarray
+    cpu_cycles: np.ndarray
+    deadline: np.ndarray
+    datarate: np.ndarray
+    snr: np.ndarray
+    battery: np.ndarray
+    edge_energy_ratio: np.ndarray
+    semantic_target: np.ndarray
+    semantic_confidence: np.ndarray
+    priority_score: np.ndarray
+    previous_action: np.ndarray
+    has_edge: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.size_bits.shape[0])
+
+    @property
+    def link_quality(self) -> np.ndarray:
+        return np.where(self.has_edge, np.minimum(1.0, self.snr / 20.0), 0.5)
+
+    @property
+    def battery_ratio(self) -> np.ndarray:
+        return np.minimum(1.0, np.maximum(0.0, self.battery / 10000.0))
+
+
+@dataclass
+class OracleOutcomeBatch:
+    """Predicted outcome of every evaluated action, shape (N, A)."""
+
+    actions: np.ndarray
+    delay: np.ndarray
+    energy: np.ndarray
+    reward: np.ndarray
+    deadline_met: np.ndarray
+    semantic_match: np.ndarray
+    edge_energy_cost: np.ndarray
+    edge_energy_ratio: np.ndarray
+    switching_overhead: np.ndarray
+    local_energy_reference: np.ndarray
+
+
+def oracle_state_from_env(env) -> OracleStateBatch:
+    """Extract a single-state batch from the env; the channel is queried once."""
+    device = env.current_device
+    task = env.current_task
+    semantic = getattr(task, "semantic_analysis", {}) or {}
+
+    datarate, snr, has_edge, edge_energy_ratio = 10e6, 0.0, False, 1.0
+    if env.edge_servers:
+        closest_edge = min(
+            env.edge_servers,
+            key=lambda e: math.dist(getattr(device, "location", (0, 0)), e.location),
+        )
+        datarate, snr = env.channel.calculate_datarate(device, closest_edge)
+        has_edge = True
+        edge_energy_budget = max(1e-6, float(getattr(closest_edge, "energy_budget", 5000.0)))
+        edge_remaining = float(getattr(closest_edge, "remaining_energy", edge_energy_budget))
+        edge_energy_ratio = max(0.0, min(1.0, edge_remaining / edge_energy_budget))
+
+    previous_action = getattr(env, "previous_action", None)
+    return OracleStateBatch(
+        size_bits=np.array([float(task.size_bits)]),
+        cpu_cycles=np.array([float(task.cpu_cycles)]),
+        deadline=np.array([float(getattr(task, "deadline", 1.0))]),
+        datarate=np.array([float(datarate)]),
+        snr=np.array([float(snr)]),
+        battery=np.array([float(getattr(device, "battery", 10000.0))]),
+        edge_energy_ratio=np.array([edge_energy_ratio]),
+        semantic_target=np.array([encode_semantic_target(semantic.get("recommended_target", "edge"))], dtype=np.int8),
+        semantic_confidence=np.array([float(semantic.get("confidence", 0.5))]),
+        priority_score=np.array([float(semantic.get("priority_score", 0.5))]),
+        previous_action=np.array([-1 if previous_action is None else int(previous_action)], dtype=np.int64),
+        has_edge=np.array([has_edge]),
+    )
+
+
+def stack_oracle_states(states: Sequence[OracleStateBatch]) -> OracleStateBatch:
+    return OracleStateBatch(**{f.name: np.concatenate([getattr(s, f.name) for s in states]) for f in fields(OracleStateBatch)})
+
+
+def effective_actions(env) -> List[int]:
+    """Actions the scalar oracle evaluates for this env, after ablation remapping."""
+    valid_actions = list(getattr(env, "valid_actions", ALL_ACTIONS))
+    if env.ablation_flags.get("disable_partial_offloading", False):
+        return [valid_actions[min(action // 2, len(valid_actions) - 1)] for action in valid_actions]
+    return valid_actions
+
+
+def predict_action_outcomes(
+    states: OracleStateBatch,
+    actions: Sequence[int] = ALL_ACTIONS,
+    success_bonus: float = 0.0,
+    disable_mobility_features: bool = False,
+) -> OracleOutcomeBatch:
+    """Predict delay/energy/reward of each action in `actions` for every state."""
+    n_states, n_actions = len(states), len(actions)
+    out = {name: np.empty((n_states, n_actions)) for name in (
+        "delay", "energy", "reward", "edge_energy_cost", "edge_energy_ratio", "switching_overhead", "local_energy_reference",
+    )}
+    deadline_met = np.empty((n_states, n_actions), dtype=bool)
+    semantic_match = np.empty((n_states, n_actions), dtype=bool)
+
+    size_bits = states.size_bits
+    cpu_cycles = states.cpu_cycles
+    datarate = np.where(states.has_edge, states.datarate, 10e6)
+    link_quality = states.link_quality
+    safe_rate = np.maximum(datarate, 1e-6)
+
+    transmission_time_full = size_bits / safe_rate
+    tx_energy_pred_full = 0.5 * transmission_time_full
+    local_comp_energy_pred_full = 1e-28 * (1e9 ** 2) * cpu_cycles
+    size_factor = np.minimum(1.0, size_bits / 10e6)
+    mobility_penalty = (1.0 - link_quality) * 0.03
+    zeros = np.zeros(n_states)
+    ones = np.ones(n_states)
+
+    for column, action in enumerate(actions):
+        action = int(action)
+        ratio = EDGE_RATIOS[action]
+        edge_energy_cost = zeros
+        edge_energy_ratio = ones
+        overhead = zeros
+
+        if action == 0:
+            delay = cpu_cycles / 1e9
+            energy = local_comp_energy_pred_full
+        elif action == 5:
+            delay = transmission_time_full + 0.1 + (cpu_cycles / 5e9)
+            energy = tx_energy_pred_full
+        else:
+            coordination_factor = 1.0 if action in (1, 2, 3) else 0.35
+            transition_penalty = np.where((states.previous_action >= 0) & (states.previous_action != action), 0.015, 0.0)
+            overhead = coordination_factor * (0.01 + 0.02 * size_factor + mobility_penalty + transition_penalty)
+
+            local_part_lat = ((1 - ratio) * cpu_cycles) / 1e9
+            local_part_en = (1 - ratio) * local_comp_energy_pred_full
+            edge_tx_lat = (ratio * size_bits) / safe_rate
+            edge_comp_lat = (ratio * cpu_cycles) / 2e9
+            edge_tx_en = 0.5 * edge_tx_lat
+
+            delay = np.maximum(local_part_lat, edge_tx_lat + edge_comp_lat) + overhead
+            energy = local_part_en + edge_tx_en
+            edge_energy_cost = np.where(states.has_edge, 1e-28 * (2e9 ** 2) * (ratio * cpu_cycles), 0.0)
+            edge_energy_ratio = np.where(states.has_edge, states.edge_energy_ratio, 1.0)
+
+        reward = calculate_reward_batch(
+            np.full(n_states, action),
+            delay,
+            energy,
+            states.deadline,
+            size_bits,
+            cpu_cycles,
+            states.semantic_target,
+            states.semantic_confidence,
+            states.priority_score,
+            states.battery,
+            local_comp_energy_pred_full,
+            edge_energy_ratios=edge_energy_ratio,
+            edge_energy_costs=edge_energy_cost,
+            success_bonus=success_bonus,
+            record_terms=False,
+        )
+        if not disable_mobility_features and action != 0:
+            reward = reward - (1.0 - link_quality) * 10.0
+
+        target = states.semantic_target
+        if action == 0:
+            match = target == 0
+        elif action == 5:
+            match = target == 2
+        else:
+            match = target == 1
+
+        out["delay"][:, column] = delay
+        out["energy"][:, column] = energy
+        out["reward"][:, column] = reward
+        out["edge_energy_cost"][:, column] = edge_energy_cost
+        out["edge_energy_ratio"][:, column] = edge_energy_ratio
+        out["switching_overhead"][:, column] = overhead
+        out["local_energy_reference"][:, column] = local_comp_energy_pred_full
+        deadline_met[:, column] = delay <= np.maximum(0.1, states.deadline)
+        semantic_match[:, column] = match
+
+    return OracleOutcomeBatch(
+        actions=np.asarray(actions, dtype=np.int64),
+        deadline_met=deadline_met,
+        semantic_match=semantic_match,
+        **out,
+    )
+
+
+def score_outcomes(
+    outcomes: OracleOutcomeBatch,
+    states: OracleStateBatch,
+    objective: str,
+    scoring_cfg: Dict[str, float] | None = None,
+) -> np.ndarray:
+    """(N, A) teacher scores (lower is better), mirroring `_score_outcome`."""
+    scoring_cfg = scoring_cfg or {}
+    actions = outcomes.actions[np.newaxis, :]
+    delay = outcomes.delay
+    energy = outcomes.energy
+    deadline = np.maximum(0.1, states.deadline)[:, np.newaxis]
+    deadline_penalty = np.where(outcomes.deadline_met, 0.0, 2.0)
+    energy_ref = np.maximum(1e-6, outcomes.local_energy_reference)
+    delay_norm = delay / deadline
+    energy_norm = energy / energy_ref
+
+    if objective == "latency_oracle":
+        return delay + (deadline_penalty * deadline) + (0.15 * energy_norm)
+    if objective == "energy_oracle":
+        return energy + (0.20 * delay_norm) + (deadline_penalty * 0.5)
+
+    battery_ratio = states.battery_ratio[:, np.newaxis]
+    size_norm = np.minimum(1.0, states.size_bits / 1e7)[:, np.newaxis]
+    cpu_norm = np.minimum(1.0, states.cpu_cycles / 1e10)[:, np.newaxis]
+    priority_score = states.priority_score[:, np.newaxis]
+    target = states.semantic_target[:, np.newaxis]
+    is_partial = (actions >= 1) & (actions <= 4)
+
+    if objective == "reward_aligned_oracle":
+        semantic_confidence = states.semantic_confidence[:, np.newaxis]
+        link_quality = states.link_quality[:, np.newaxis]
+        suitability = [
+            0.45 * (1.0 - size_norm) + 0.35 * (1.0 - cpu_norm) + 0.20 * (1.0 - link_quality),
+            0.40 * (1.0 - size_norm) + 0.25 * battery_ratio + 0.20 * priority_score + 0.15 * link_quality,
+            0.45 * (1.0 - np.abs(size_norm - 0.45)) + 0.20 * (1.0 - np.abs(cpu_norm - 0.45)) + 0.20 * priority_score + 0.15 * link_quality,
+            0.40 * size_norm + 0.25 * priority_score + 0.20 * semantic_confidence + 0.15 * link_quality,
+            0.35 * cpu_norm + 0.25 * size_norm + 0.20 * battery_ratio + 0.20 * link_quality,
+            None,
+        ]
+        bonus_keys = [
+            ("reward_aligned_local_bonus", 0.26),
+            ("reward_aligned_edge25_bonus", 0.22),
+            ("reward_aligned_edge50_bonus", 0.20),
+            ("reward_aligned_edge75_bonus", 0.18),
+            ("reward_aligned_edge100_bonus", 0.20),
+            ("reward_aligned_cloud_bonus", 0.16),
+        ]
+        action_context_bonus = np.zeros_like(delay)
+        for action in range(6):
+            column_mask = actions == action
+            if not column_mask.any():
+                continue
+            if action == 5:
+                value = 0.45 * cpu_norm + 0.30 * size_norm + 0.15 * np.maximum(0.0, 1.0 - outcomes.edge_energy_ratio) + 0.10 * (1.0 - link_quality)
+            else:
+                value = suitability[action]
+            key, default = bonus_keys[action]
+            action_context_bonus = np.where(column_mask, scoring_cfg.get(key, default) * value, action_context_bonus)
+
+        semantic_weight = scoring_cfg.get("reward_aligned_semantic_bonus", 0.22)
+        semantic_alignment_bonus = np.where(
+            (target == 0) & (actions == 0),
+            semantic_weight * (0.5 + 0.5 * semantic_confidence),
+            np.where(
+                (target == 1) & is_partial,
+                semantic_weight * (0.45 + 0.55 * semantic_confidence),
+                np.where((target == 2) & (actions == 5), semantic_weight * (0.4 + 0.6 * semantic_confidence), 0.0),
+            ),
+        )
+        cloud_off_target_penalty = np.where(
+            (actions == 5) & (target != 2),
+            scoring_cfg.get("reward_aligned_cloud_penalty", 0.18) * (0.35 + 0.65 * priority_score),
+            0.0,
+        )
+
+        reward_score = -outcomes.reward
+        reward_score = reward_score + 0.10 * delay_norm
+        reward_score = reward_score + 0.05 * energy_norm
+        reward_score = reward_score + cloud_off_target_penalty
+        reward_score = reward_score - action_context_bonus
+        reward_score = reward_score - semantic_alignment_bonus
+        return reward_score
+
+    cloud_penalty = np.where(actions == 5, scoring_cfg.get("cloud_penalty", 0.85), 0.0)
+    semantic_bonus = np.where(
+        outcomes.semantic_match,
+        -scoring_cfg.get("semantic_match_bonus", 0.12),
+        scoring_cfg.get("semantic_mismatch_penalty", 0.08),
+    )
+    battery_risk = np.where((battery_ratio < 0.25) & (actions != 0), (0.25 - battery_ratio) / 0.25, 0.0)
+    edge_risk = np.where(is_partial & (outcomes.edge_energy_ratio < 0.25), (0.25 - outcomes.edge_energy_ratio) / 0.25, 0.0)
+    partial_bonus = np.where(
+        (actions >= 1) & (actions <= 3),
+        scoring_cfg.get("partial_bonus", 0.22) * (0.35 + 0.35 * size_norm + 0.30 * priority_score),
+        0.0,
+    )
+    edge_bonus = np.where(is_partial & (target == 1), scoring_cfg.get("edge_semantic_bonus", 0.18) * (0.4 + 0.6 * priority_score), 0.0)
+    local_bonus = np.where((actions == 0) & (target == 0), scoring_cfg.get("local_semantic_bonus", 0.12) * (0.4 + 0.6 * (1.0 - size_norm)), 0.0)
+    local_penalty = np.where(actions == 0, scoring_cfg.get("local_large_task_penalty", 0.22) * (0.55 * size_norm + 0.45 * cpu_norm), 0.0)
+    full_edge_penalty = np.where(actions == 4, scoring_cfg.get("full_edge_penalty", 0.05), 0.0)
+
+    return (
+        scoring_cfg.get("delay_weight", 0.46) * delay_norm
+        + scoring_cfg.get("energy_weight", 0.14) * energy_norm
+        + scoring_cfg.get("deadline_weight", 0.16) * deadline_penalty
+        + scoring_cfg.get("cloud_weight", 0.18) * cloud_penalty
+        + scoring_cfg.get("battery_weight", 0.04) * battery_risk
+        + scoring_cfg.get("edge_risk_weight", 0.02) * edge_risk
+        + local_penalty
+        + full_edge_penalty
+        + semantic_bonus
+        - partial_bonus
+        - edge_bonus
+        - local_bonus
+    )
+
+
+def score_all_modes(
+    outcomes: OracleOutcomeBatch,
+    states: OracleStateBatch,
+    scoring_cfg: Dict[str, float] | None = None,
+    modes: Sequence[str] = SCORING_MODES,
+) -> Dict[str, np.ndarray]:
+    return {mode: score_outcomes(outcomes, states, mode, scoring_cfg) for mode in modes}
+
+
+def rank_candidates(scores: np.ndarray, outcomes: OracleOutcomeBatch) -> np.ndarray:
+    """Column order per row by (score, delay, energy), as the scalar sort does."""
+    return np.lexsort((outcomes.energy, outcomes.delay, scores), axis=-1)
+
+
+def select_greedy_actions(scores: np.ndarray, outcomes: OracleOutcomeBatch):
+    """Greedy labels and score margins (second best - best) for every state."""
+    order = rank_candidates(scores, outcomes)
+    rows = np.arange(scores.shape[0])
+    best_scores = scores[rows, order[:, 0]]
+    second_scores = scores[rows, order[:, 1]] if scores.shape[1] > 1 else best_scores
+    return outcomes.actions[order[:, 0]], second_scores - best_scores
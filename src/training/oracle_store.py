@@ -0,0 +1,214 @@
+"""
+Columnar, partitioned storage for the oracle label dataset.
+
+Layout (one directory per dataset):
+    <root>/manifest.json
+    <root>/teacher_policy=<name>/split=<split>/states.npy    float32 (n, len(state_columns))
+    <root>/teacher_policy=<name>/split=<split>/labels.npy    int8    (n,)
+    <root>/teacher_policy=<name>/split=<split>/margins.npy   float64 (n,)
+    <root>/teacher_policy=<name>/split=<split>/sample_weights.npy  float64 (n,)
+    <root>/teacher_policy=<name>/split=<split>/episode_id.npy, step_id.npy  int32 (n,)
+
+Rows keep their dataset order inside a partition, so reading a teacher/split
+partition yields the same samples in the same order as filtering the CSV.
+sample_weights holds the rebalancing weight of each row (1 when the store
+predates it).
+"""
+
+from __future__ import annotations
+
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORE_FORMAT = "oracle_columnar_v1"
+MANIFEST_NAME = "manifest.json"
+
+
+def default_store_path(csv_path) -> Path:
+    """Store directory written next to the CSV: <csv stem> without the suffix."""
+    csv_path = Path(csv_path)
+    return csv_path.with_suffix("")
+
+
+def resolve_oracle_store(dataset_path) -> Optional[Path]:
+    """Return the store directory for a dataset path (store dir or its CSV), if one exists."""
+    dataset_path = Path(dataset_path)
+    for candidate in (dataset_path, default_store_path(dataset_path)):
+        if candidate.is_dir() and (candidate / MANIFEST_NAME).exists():
+            return candidate
+    return None
+
+
+def _partition_dir(root: Path, teacher_policy: str, split: str) -> Path:
+    return root / f"teacher_policy={teacher_policy}" / f"split={split}"
+
+
+def _partition_arrays(rows: List[Dict[str, object]], state_columns: Sequence[str]) -> Dict[str, np.ndarray]:
+    states = np.array([[row[column] for column in state_columns] for row in rows], dtype=np.float32)
+    return {
+        "states": states.reshape(len(rows), len(state_columns)),
+        "labels": np.array([row["selected_action_id"] for row in rows], dtype=np.int8),
+        "margins": np.array([row.get("teacher_margin", 0.0) for row in rows], dtype=np.float64),
+        "sample_weights": np.array([row.get("sample_weight", 1.0) for row in rows], dtype=np.float64),
+        "episode_id": np.array([row.get("episode_id", -1) for row in rows], dtype=np.int32),
+        "step_id": np.array([row.get("step_id", -1) for row in rows], dtype=np.int32),
+    }
+
+
+def _load_column(part_dir: Path, name: str) -> np.ndarray:
+    path = part_dir / f"{name}.npy"
+    if name == "sample_weights" and not path.exists():
+        return np.ones(np.load(part_dir / "labels.npy", mmap_mode="r").shape[0], dtype=np.float64)
+    return np.load(path)
+
+
+def _group_rows(rows: List[Dict[str, object]]) -> Dict[Tuple[str, str], List[Dict[str, object]]]:
+    grouped: Dict[Tuple[str, str], List[Dict[str, object]]] = defaultdict(list)
+    for row in rows:
+        grouped[(str(row["teacher_policy"]), str(row.get("split", "train")))].append(row)
+    return grouped
+
+
+def _save_partition(root: Path, teacher_policy: str, split: str, arrays: Dict[str, np.ndarray]) -> Dict[str, object]:
+    part_dir = _partition_dir(root, teacher_policy, split)
+    part_dir.mkdir(parents=True, exist_ok=True)
+    for name, values in arrays.items():
+        np.save(part_dir / f"{name}.npy", values)
+    return {
+        "teacher_policy": teacher_policy,
+        "split": split,
+        "path": part_dir.relative_to(root).as_posix(),
+        "rows": int(arrays["labels"].shape[0]),
+    }
+
+
+def _write_manifest(root: Path, state_columns: Sequence[str], partitions: List[Dict[str, object]]) -> None:
+    manifest = {"format": STORE_FORMAT, "state_columns": list(state_columns), "partitions": partitions}
+    (root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+
+
+def write_oracle_store(root, rows: List[Dict[str, object]], state_columns: Sequence[str]) -> Path:
+    """Write oracle label rows (as produced by generate_oracle_dataset) as a columnar store."""
+    root = Path(root)
+    partitions = [
+        _save_partition(root, teacher_policy, split, _partition_arrays(part_rows, state_columns))
+        for (teacher_policy, split), part_rows in _group_rows(rows).items()
+    ]
+    _write_manifest(root, state_columns, partitions)
+    return root
+
+
+def _state_keys(states: np.ndarray) -> List[bytes]:
+    return [row.tobytes() for row in np.ascontiguousarray(states, dtype=np.float32)]
+
+
+def append_oracle_store(root, rows: List[Dict[str, object]], state_columns: Sequence[str], dedupe: bool = True) -> Dict[str, int]:
+    """Append label rows to a store, creating it when it does not exist yet.
+
+    With dedupe, a row is dropped when its (float32) state vector is already
+    stored in its teacher/split partition or appeared earlier in `rows`.
+    Returns {"appended": ..., "duplicates": ...}.
+    """
+    root = Path(root)
+    if resolve_oracle_store(root) is not None:
+        manifest = read_manifest(root)
+        if list(manifest["state_columns"]) != list(state_columns):
+            raise ValueError("State columns do not match the existing oracle store")
+        partitions = {(part["teacher_policy"], part["split"]): part for part in manifest["partitions"]}
+    else:
+        root.mkdir(parents=True, exist_ok=True)
+        partitions = {}
+
+    appended = 0
+    duplicates = 0
+    for (teacher_policy, split), part_rows in _group_rows(rows).items():
+        new_arrays = _partition_arrays(part_rows, state_columns)
+        part = partitions.get((teacher_policy, split))
+        existing = None
+        if part is not None:
+            part_dir = root / part["path"]
+            existing = {name: _load_column(part_dir, name) for name in new_arrays}
+
+        if dedupe:
+            seen = set(_state_keys(existing["states"])) if existing is not None else set()
+            keep = np.zeros(len(part_rows), dtype=bool)
+            for index, key in enumerate(_state_keys(new_arrays["states"])):
+                if key not in seen:
+                    seen.add(key)
+                    keep[index] = True
+            duplicates += int(len(part_rows) - keep.sum())
+            new_arrays = {name: values[keep] for name, values in new_arrays.items()}
+
+        appended += int(new_arrays["labels"].shape[0])
+        if existing is not None:
+            new_arrays = {name: np.concatenate([existing[name], new_arrays[name]]) for name in new_arrays}
+        partitions[(teacher_policy, split)] = _save_partition(root, teacher_policy, split, new_arrays)
+
+    _write_manifest(root, state_columns, list(partitions.values()))
+    return {"appended": appended, "duplicates": duplicates}
+
+
+def read_manifest(root) -> Dict[str, object]:
+    manifest = json.loads((Path(root) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    if manifest.get("format") != STORE_FORMAT:
+        raise ValueError(f"Unsupported oracle store format: {manifest.get('format')!r}")
+    return manifest
+
+
+def load_oracle_arrays(
+    root,
+    teacher_policy: str,
+    splits: Iterable[str] = ("train",),
+    min_margin: Optional[float] = None,
+    allowed_actions: Optional[Iterable[int]] = None,
+    columns: Sequence[str] = ("states", "labels"),
+) -> Dict[str, np.ndarray]:
+    """Load the requested columns of one teacher, concatenated over `splits` in order.
+
+    Rows with margin < min_margin (when given) or a label outside
+    allowed_actions (when given) are dropped with a vectorized mask.
+    """
+    root = Path(root)
+    manifest = read_manifest(root)
+    n_states = len(manifest["state_columns"])
+    available = {(part["teacher_policy"], part["split"]): part for part in manifest["partitions"]}
+
+    need = set(columns)
+    if min_margin is not None:
+        need.add("margins")
+    if allowed_actions is not None:
+        need.add("labels")
+
+    parts: Dict[str, List[np.ndarray]] = defaultdict(list)
+    for split in splits:
+        part = available.get((teacher_policy, split))
+        if part is None:
+            continue
+        part_dir = root / part["path"]
+        arrays = {name: _load_column(part_dir, name) for name in need}
+
+        mask = None
+        if min_margin is not None:
+            mask = arrays["margins"] >= float(min_margin)
+        if allowed_actions is not None:
+            action_mask = np.isin(arrays["labels"], np.fromiter((int(a) for a in allowed_actions), dtype=np.int64))
+            mask = action_mask if mask is None else mask & action_mask
+        for name in columns:
+            parts[name].append(arrays[name] if mask is None or mask.all() else arrays[name][mask])
+
+    empty = {
+        "states": np.empty((0, n_states), dtype=np.float32),
+        "labels": np.empty(0, dtype=np.int8),
+        "margins": np.empty(0, dtype=np.float64),
+        "sample_weights": np.empty(0, dtype=np.float64),
+        "episode_id": np.empty(0, dtype=np.int32),
+        "step_id": np.empty(0, dtype=np.int32),
+    }
+    return {
+        name: (parts[name][0] if len(parts[name]) == 1 else np.concatenate(parts[name])) if parts[name] else empty[name]
+        for name in columns
+    }
@@ -0,0 +1,283 @@
+"""
+Vectorized sweep over oracle scoring configurations.
+
+Instead of one generate_oracle_dataset run per scoring configuration, the
+states of one trajectory are collected once, their action outcomes are
+predicted once (oracle_engine, (N, A)) and all K configurations are scored
+from that shared outcome tensor as one (K, N, A) array: overridden scoring
+keys are stacked into (K, 1, 1) arrays that broadcast through score_outcomes.
+
+Greedy labels come from a batched lexsort. Coverage-aware teachers (and
+`contextual_*` overrides) depend on their own label history, so their
+selection runs as one CoverageTracker per configuration over the shared
+scores; this is the only per-state loop. Labels are those of a shared
+trajectory (see dataset.shared_trajectory), driven by `behavior_teacher`.
+
+Per configuration the sweep reports the label distribution, margin
+statistics and the agreement with every other configuration.
+"""
+
+from __future__ import annotations
+
+import itertools
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.core.config import load_config
+from src.training.oracle_engine import (
+    OracleOutcomeBatch,
+    OracleStateBatch,
+    effective_actions,
+    oracle_state_from_env,
+    predict_action_outcomes,
+    score_outcomes,
+    stack_oracle_states,
+)
+from src.training.pretrain_policy import (
+    ACTION_LABELS,
+    LOOKAHEAD_TEACHER_POLICIES,
+    CoverageTracker,
+    _oracle_shard_env,
+    _reset_oracle_episode,
+    _resolve_coverage_selection_cfg,
+    normalize_teacher_policy_name,
+    resolve_teacher_policy_mode,
+)
+
+CONTEXTUAL_KEY_PREFIX = "contextual_"
+
+
+def sweep_configurations(sweep_cfg: Dict[str, object]) -> List[Dict[str, object]]:
+    """Explicit `configurations` plus the cartesian `grid` (teacher_policies x scoring values).
+
+    Every configuration is {"name", "teacher_policy", "overrides"}.
+    """
+    configurations = []
+    for entry in sweep_cfg.get("configurations", []) or []:
+        teacher = normalize_teacher_policy_name(str(entry["teacher_policy"]))
+        configurations.append({
+            "name": str(entry.get("name", teacher)),
+            "teacher_policy": teacher,
+            "overrides": dict(entry.get("scoring", {}) or {}),
+        })
+
+    grid = sweep_cfg.get("grid", {}) or {}
+    axes = grid.get("scoring", {}) or {}
+    names = list(axes)
+    for teacher_name in grid.get("teacher_policies", []) or []:
+        teacher = normalize_teacher_policy_name(str(teacher_name))
+        for values in itertools.product(*(axes[name] for name in names)):
+            overrides = dict(zip(names, values))
+            label = ",".join(f"{name}={value}" for name, value in overrides.items())
+            configurations.append({"name": f"{teacher}[{label}]", "teacher_policy": teacher, "overrides": overrides})
+
+    for configuration in configurations:
+        if configuration["teacher_policy"] in LOOKAHEAD_TEACHER_POLICIES:
+            raise ValueError(f"Lookahead teachers cannot be swept: {configuration['teacher_policy']}")
+    if not configurations:
+        raise ValueError("Scoring sweep has no configurations")
+    return configurations
+
+
+def contextual_target_actions(states: OracleStateBatch) -> np.ndarray:
+    """Vectorized _contextual_target_action: the preferred action of every state."""
+    size_norm = np.minimum(1.0, states.size_bits / 1e7)
+    cpu_norm = np.minimum(1.0, states.cpu_cycles / 1e10)
+    intensity = 0.55 * size_norm + 0.45 * cpu_norm
+    battery_ratio = states.battery_ratio
+
+    edge_action = np.select(
+        [(battery_ratio < 0.18) & (intensity < 0.22), intensity < 0.18, intensity < 0.40, intensity < 0.72],
+        [1, 1, 2, 3],
+        default=4,
+    )
+    cloud_action = np.where((intensity < 0.35) & (battery_ratio > 0.35), 2, 5)
+    return np.select([states.semantic_target == 0, states.semantic_target == 2], [0, cloud_action], default=edge_action)
+
+
+def stack_scoring_overrides(base_scoring: Dict[str, object], overrides: Sequence[Dict[str, object]]) -> Dict[str, object]:
+    """Base scoring config with every overridden (non-contextual) key as a (K, 1, 1) array."""
+    keys = sorted({key for override in overrides for key in override if not key.startswith(CONTEXTUAL_KEY_PREFIX)})
+    stacked = {key: value for key, value in base_scoring.items() if key != "coverage_aware_selection"}
+    for key in keys:
+        if key not in base_scoring and not all(key in override for override in overrides):
+            raise ValueError(f"Scoring key {key!r} must be set in the base scoring config or in every configuration")
+        stacked[key] = np.array([float(override.get(key, base_scoring.get(key))) for override in overrides]).reshape(-1, 1, 1)
+    return stacked
+
+
+def score_configurations(
+    outcomes: OracleOutcomeBatch,
+    states: OracleStateBatch,
+    configurations: Sequence[Dict[str, object]],
+    base_scoring: Dict[str, object],
+) -> np.ndarray:
+    """(K, N, A) scores of every configuration, one broadcast pass per scoring mode."""
+    scores = np.empty((len(configurations), len(states), len(outcomes.actions)))
+    modes: Dict[str, List[int]] = {}
+    for index, configuration in enumerate(configurations):
+        modes.setdefault(resolve_teacher_policy_mode(configuration["teacher_policy"]), []).append(index)
+    for mode, indices in modes.items():
+        stacked = stack_scoring_overrides(base_scoring, [configurations[index]["overrides"] for index in indices])
+        scores[indices] = np.broadcast_to(score_outcomes(outcomes, states, mode, stacked), (len(indices),) + scores.shape[1:])
+    return scores
+
+
+def _selection_cfg(configuration: Dict[str, object], base_scoring: Dict[str, object]) -> Dict[str, object] | None:
+    selection_cfg = _resolve_coverage_selection_cfg(configuration["teacher_policy"], base_scoring)
+    contextual = {key: value for key, value in configuration["overrides"].items() if key.startswith(CONTEXTUAL_KEY_PREFIX)}
+    if contextual:
+        selection_cfg = dict(selection_cfg or {}, **contextual)
+    return selection_cfg
+
+
+def select_configuration_labels(
+    scores: np.ndarray,
+    outcomes: OracleOutcomeBatch,
+    states: OracleStateBatch,
+    configurations: Sequence[Dict[str, object]],
+    base_scoring: Dict[str, object],
+):
+    """(K, N) labels and margins (second best score - selected score)."""
+    num_configs, num_states, num_actions = scores.shape
+    order = np.lexsort(
+        (
+            np.broadcast_to(outcomes.energy, scores.shape),
+            np.broadcast_to(outcomes.delay, scores.shape),
+            scores,
+        ),
+        axis=-1,
+    )
+    best = np.take_along_axis(scores, order[..., :1], axis=-1)[..., 0]
+    second = np.take_along_axis(scores, order[..., 1:2], axis=-1)[..., 0] if num_actions > 1 else best
+    columns = order[..., 0].copy()
+
+    preferred = contextual_target_actions(states)
+    for index, configuration in enumerate(configurations):
+        selection_cfg = _selection_cfg(configuration, base_scoring)
+        if selection_cfg is None:
+            continue
+        tracker = CoverageTracker(selection_cfg)
+        for row in range(num_states):
+            column = tracker.select(
+                outcomes.actions,
+                scores[index, row],
+                outcomes.delay[row],
+                outcomes.energy[row],
+                outcomes.semantic_match[row],
+                int(preferred[row]),
+            )
+            columns[index, row] = column
+            tracker.record(int(outcomes.actions[column]))
+
+    selected = np.take_along_axis(scores, columns[..., np.newaxis], axis=-1)[..., 0]
+    return outcomes.actions[columns], second - selected
+
+
+def agreement_matrix(labels: np.ndarray, num_actions: int = len(ACTION_LABELS)) -> np.ndarray:
+    """(K, K) share of states on which two configurations pick the same action."""
+    one_hot = np.eye(num_actions, dtype=np.float32)[labels]
+    return np.einsum("kna,jna->kj", one_hot, one_hot) / max(1, labels.shape[1])
+
+
+def collect_sweep_states(config: Dict[str, object], n_episodes: int, behavior_teacher: str):
+    """Roll out `behavior_teacher` (through the batched engine) and return
+    (states, outcomes, episode_index) of every visited state."""
+    seed = int(config.get("seed", 42))
+    base_scoring = config.get("scoring", {}) or {}
+    behavior = {"name": behavior_teacher, "teacher_policy": normalize_teacher_policy_name(behavior_teacher), "overrides": {}}
+    selection_cfg = _selection_cfg(behavior, base_scoring)
+    tracker = CoverageTracker(selection_cfg) if selection_cfg is not None else None
+    mode = resolve_teacher_policy_mode(behavior["teacher_policy"])
+    scoring = {key: value for key, value in base_scoring.items() if key != "coverage_aware_selection"}
+
+    env = _oracle_shard_env(config, 0)
+    actions = effective_actions(env)
+    state_list, episode_index = [], []
+    for episode_idx in range(n_episodes):
+        _reset_oracle_episode(env, seed + episode_idx)
+        done = False
+        while not done:
+            state = oracle_state_from_env(env)
+            outcome = predict_action_outcomes(
+                state,
+                actions,
+                success_bonus=getattr(env, "success_bonus", 0.0),
+                disable_mobility_features=env.ablation_flags.get("disable_mobility_features", False),
+            )
+            scores = score_outcomes(outcome, state, mode, scoring)[0]
+            if tracker is not None:
+                column = tracker.select(outcome.actions, scores, outcome.delay[0], outcome.energy[0], outcome.semantic_match[0], int(contextual_target_actions(state)[0]))
+                tracker.record(int(outcome.actions[column]))
+            else:
+                column = int(np.lexsort((outcome.energy[0], outcome.delay[0], scores))[0])
+            state_list.append(state)
+            episode_index.append(episode_idx)
+            _, _, done, _, _ = env.step(int(outcome.actions[column]))
+
+    states = stack_oracle_states(state_list)
+    outcomes = predict_action_outcomes(
+        states,
+        actions,
+        success_bonus=getattr(env, "success_bonus", 0.0),
+        disable_mobility_features=env.ablation_flags.get("disable_mobility_features", False),
+    )
+    return states, outcomes, np.asarray(episode_index, dtype=np.int64)
+
+
+def summarize_sweep(configurations: Sequence[Dict[str, object]], labels: np.ndarray, margins: np.ndarray, low_margin: float = 0.05):
+    """(summary DataFrame, agreement DataFrame) of a sweep."""
+    agreement = agreement_matrix(labels)
+    names = [configuration["name"] for configuration in configurations]
+    num_configs = len(configurations)
+    rows = []
+    for index, configuration in enumerate(configurations):
+        counts = np.bincount(labels[index], minlength=len(ACTION_LABELS))
+        row = {"configuration": configuration["name"], "teacher_policy": configuration["teacher_policy"]}
+        row.update({f"override_{key}": value for key, value in configuration["overrides"].items()})
+        row.update({f"label_{ACTION_LABELS[action]}_rate": round(float(counts[action] / max(1, labels.shape[1])), 6) for action in range(len(ACTION_LABELS))})
+        row["unique_labels"] = int((counts > 0).sum())
+        row["mean_margin"] = round(float(margins[index].mean()), 6)
+        row["low_margin_rate"] = round(float((margins[index] < low_margin).mean()), 6)
+        row["agreement_with_first"] = round(float(agreement[index, 0]), 6)
+        others = np.delete(agreement[index], index)
+        row["mean_agreement_with_others"] = round(float(others.mean()), 6) if num_configs > 1 else 1.0
+        rows.append(row)
+    return pd.DataFrame(rows), pd.DataFrame(agreement, index=names, columns=names)
+
+
+def run_scoring_sweep(config_path: str = "configs/synthetic/oracle_scoring_sweep.yaml") -> Dict[str, str]:
+    sweep_config = load_config(config_path)
+    labeling = load_config(sweep_config.get("labeling_config", "configs/synthetic/oracle_labeling.yaml"))
+    config = {
+        "seed": sweep_config.get("seed", labeling.get("seed", 42)),
+        "env": labeling.get("env", {}),
+        "scoring": labeling.get("scoring", {}),
+    }
+    base_scoring = config["scoring"]
+    configurations = sweep_configurations(sweep_config)
+    behavior_teacher = str(sweep_config.get("behavior_teacher") or configurations[0]["teacher_policy"])
+
+    states, outcomes, episode_index = collect_sweep_states(config, int(sweep_config.get("n_episodes", 20)), behavior_teacher)
+    scores = score_configurations(outcomes, states, configurations, base_scoring)
+    labels, margins = select_configuration_labels(scores, outcomes, states, configurations, base_scoring)
+    summary, agreement = summarize_sweep(configurations, labels, margins, float(sweep_config.get("low_margin", 0.05)))
+
+    output_cfg = sweep_config.get("output", {})
+    csv_path = Path(output_cfg.get("csv_path", "results/raw/synthetic/oracle_scoring_sweep/scoring_sweep_summary.csv"))
+    agreement_path = Path(output_cfg.get("agreement_csv", csv_path.with_name("scoring_sweep_agreement.csv")))
+    csv_path.parent.mkdir(parents=True, exist_ok=True)
+    agreement_path.parent.mkdir(parents=True, exist_ok=True)
+    summary.to_csv(csv_path, index=False)
+    agreement.to_csv(agreement_path)
+
+    return {
+        "csv_path": str(csv_path),
+        "agreement_csv": str(agreement_path),
+        "configurations": str(len(configurations)),
+        "states": str(len(states)),
+        "episodes": str(int(episode_index.max()) + 1 if len(episode_index) else 0),
+    }
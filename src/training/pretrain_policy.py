@@ -2,8 +2,9 @@
 
 import csv
 import math
-from collections import Counter, defaultdict
 import random
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Dict, Iterable, List
@@ -14,8 +15,12 @@ from torch import nn
 from torch.utils.data import DataLoader, Dataset, WeightedRandomSampler
 from stable_baselines3 import PPO
 
+from src.agents.semantic_prior import flush_explanation_bank
 from src.core.config import load_config
 from src.core.reward import calculate_reward
+from src.training.env_snapshot import simulated_rollout
+from src.training.margin_sampling import action_balance_weights, build_margin_sampler
+from src.training.oracle_store import default_store_path, load_oracle_arrays, resolve_oracle_store, write_oracle_store
 from src.training.train_agent import build_training_env
 
 ACTION_LABELS = {
@@ -52,6 +57,7 @@ TEACHER_POLICY_LABELS = {
     "teacher_reward_aligned": "teacher_reward_aligned",
     "reward_aligned_oracle": "teacher_reward_aligned",
     "teacher_contextual_reward_aligned": "teacher_contextual_reward_aligned",
+    "teacher_lookahead_reward_aligned": "teacher_lookahead_reward_aligned",
 }
 
 TEACHER_POLICY_SCORING_MODE = {
@@ -60,8 +66,12 @@ TEACHER_POLICY_SCORING_MODE = {
     "teacher_balanced_semantic": "weighted_objective_oracle",
     "teacher_reward_aligned": "reward_aligned_oracle",
     "teacher_contextual_reward_aligned": "reward_aligned_oracle",
+    "teacher_lookahead_reward_aligned": "reward_aligned_oracle",
 }
 
+# Teachers labelled with choose_lookahead_action (configured by the `lookahead` config section).
+LOOKAHEAD_TEACHER_POLICIES = {"teacher_lookahead_reward_aligned"}
+
 
 def normalize_teacher_policy_name(name: str) -> str:
     return TEACHER_POLICY_LABELS.get(name, name)
@@ -84,6 +94,20 @@ def _row_action_id(row: Dict[str, object]) -> int:
         return -1
 
 
+def _row_margin(row: Dict[str, object]) -> float:
+    try:
+        return float(row.get("teacher_margin", row.get("oracle_margin", 0.0)))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _row_sample_weight(row: Dict[str, object]) -> float:
+    try:
+        return float(row.get("sample_weight", 1.0))
+    except (TypeError, ValueError):
+        return 1.0
+
+
 def _row_state_vector(row: Dict[str, object]) -> List[float]:
     if all(column in row for column in STATE_FEATURE_COLUMNS):
         return [float(row[column]) for column in STATE_FEATURE_COLUMNS]
@@ -182,6 +206,7 @@ def _predict_action_outcome(env, action: int) -> Dict[str, float]:
         edge_energy_ratio=edge_energy_ratio,
         edge_energy_cost=edge_energy_cost,
         success_bonus=getattr(env, "success_bonus", 0.0),
+        record_terms=False,
     )
     if not env.ablation_flags.get("disable_mobility_features", False) and action != 0:
         reward -= (1.0 - link_quality_factor) * 10.0
@@ -384,67 +409,102 @@ def _resolve_coverage_selection_cfg(teacher_policy: str, scoring_cfg: Dict[str,
     return resolved_cfg
 
 
-def _select_contextual_candidate(candidates: List[OracleDecision], task, battery_ratio: float, scoring_cfg: Dict[str, float] | None, action_usage_counter: Counter | None = None) -> OracleDecision:
-    selection_cfg = scoring_cfg or {}
-    ranked = sorted(candidates, key=lambda x: (x.score, x.predicted_delay, x.predicted_energy))
-    best = ranked[0]
-    preferred_action = _contextual_target_action(task, battery_ratio, ranked)
-    coverage_counter = action_usage_counter or Counter()
-    total_seen = sum(coverage_counter.values())
-    target_ratios = selection_cfg.get(
-        "contextual_target_ratios",
-        {"local": 0.12, "edge_25": 0.14, "edge_50": 0.18, "edge_75": 0.20, "edge_100": 0.12, "cloud": 0.24},
+DEFAULT_CONTEXTUAL_TARGET_RATIOS = {"local": 0.12, "edge_25": 0.14, "edge_50": 0.18, "edge_75": 0.20, "edge_100": 0.12, "cloud": 0.24}
+DEFAULT_CONTEXTUAL_ACTION_SLACK = {"local": 0.90, "edge_25": 1.00, "edge_50": 0.90, "edge_75": 0.60, "edge_100": 1.10, "cloud": 0.55}
+
+
+class CoverageTracker:
+    """Running action usage plus the contextual-selection config, resolved once into arrays.
+
+    `select` reproduces the original per-candidate selection rules (feasibility
+    slack, bootstrap minimum counts, coverage-deficit utility) and their
+    tie-breaking with a few vector operations over the candidate arrays.
+    """
+
+    def __init__(self, selection_cfg: Dict[str, object] | None = None):
+        selection_cfg = selection_cfg or {}
+        actions = range(len(ACTION_LABELS))
+        target_ratios = selection_cfg.get("contextual_target_ratios", DEFAULT_CONTEXTUAL_TARGET_RATIOS)
+        per_action_slack = selection_cfg.get("contextual_action_slack", DEFAULT_CONTEXTUAL_ACTION_SLACK)
+        bootstrap_min_counts = selection_cfg.get("contextual_bootstrap_min_counts", {})
+        bootstrap_action_slack = selection_cfg.get("contextual_bootstrap_action_slack", per_action_slack)
+
+        self.target_ratios = np.array([_coverage_lookup(target_ratios, action, 0.0) for action in actions])
+        self.action_slack = np.array([_coverage_lookup(per_action_slack, action, 0.5) for action in actions])
+        self.bootstrap_min_counts = np.array([int(round(_coverage_lookup(bootstrap_min_counts, action, 0.0))) for action in actions], dtype=np.int64)
+        self.bootstrap_slack = np.array([_coverage_lookup(bootstrap_action_slack, action, 0.0) for action in actions])
+        self.coverage_weight = float(selection_cfg.get("contextual_coverage_weight", 1.4))
+        self.preference_bonus = float(selection_cfg.get("contextual_preference_bonus", 0.30))
+        self.semantic_bonus = float(selection_cfg.get("contextual_semantic_bonus", 0.18))
+        self.gap_penalty = float(selection_cfg.get("contextual_gap_penalty", 0.85))
+        self.counts = np.zeros(len(ACTION_LABELS), dtype=np.int64)
+        self.total = 0
+
+    @classmethod
+    def from_counter(cls, selection_cfg: Dict[str, object] | None, action_usage_counter: Counter | None) -> "CoverageTracker":
+        tracker = cls(selection_cfg)
+        for action, count in (action_usage_counter or {}).items():
+            tracker.counts[int(action)] += int(count)
+        tracker.total = int(tracker.counts.sum())
+        return tracker
+
+    def record(self, action: int) -> None:
+        self.counts[action] += 1
+        self.total += 1
+
+    def as_counter(self) -> Counter:
+        return Counter({action: int(count) for action, count in enumerate(self.counts) if count})
+
+    def select(self, actions: np.ndarray, scores: np.ndarray, delays: np.ndarray, energies: np.ndarray, semantic_match: np.ndarray, preferred_action: int) -> int:
+        """Index of the selected candidate."""
+        order = np.lexsort((energies, delays, scores))
+        actions, scores, delays, semantic_match = actions[order], scores[order], delays[order], semantic_match[order]
+        best_score = scores[0]
+
+        feasible = scores <= best_score + self.action_slack[actions]
+        if not feasible.any():
+            return int(order[0])
+
+        required = self.bootstrap_min_counts[actions]
+        deficit_counts = required - self.counts[actions]
+        bootstrap = feasible & (required > 0) & (deficit_counts > 0) & (scores <= best_score + self.bootstrap_slack[actions])
+        if bootstrap.any():
+            index = np.flatnonzero(bootstrap)
+            pick = index[np.lexsort((delays[index], scores[index], -deficit_counts[index]))[0]]
+            return int(order[pick])
+
+        current_ratio = self.counts[actions] / self.total if self.total else np.zeros(len(actions))
+        coverage_deficit = np.maximum(0.0, self.target_ratios[actions] - current_ratio)
+        utility = np.zeros(len(actions))
+        utility = utility + np.where(actions == preferred_action, self.preference_bonus, 0.0)
+        utility = utility + np.where(semantic_match, self.semantic_bonus, 0.0)
+        utility = utility + self.coverage_weight * coverage_deficit
+        utility = utility - self.gap_penalty * np.maximum(0.0, scores - best_score)
+        utility = utility - 0.02 * delays
+        utility = np.where(feasible, utility, -np.inf)
+        pick = int(np.argmax(utility))
+        if utility[pick] <= -1e9:
+            return int(order[0])
+        return int(order[pick])
+
+
+def build_coverage_tracker(teacher_policy: str, scoring_cfg: Dict[str, float] | None) -> CoverageTracker | None:
+    """Tracker for a teacher with coverage-aware selection enabled, else None."""
+    selection_cfg = _resolve_coverage_selection_cfg(normalize_teacher_policy_name(teacher_policy), scoring_cfg)
+    return CoverageTracker(selection_cfg) if selection_cfg is not None else None
+
+
+def _select_contextual_candidate(candidates: List[OracleDecision], task, battery_ratio: float, scoring_cfg: Dict[str, float] | None, action_usage_counter: Counter | None = None, coverage_tracker: CoverageTracker | None = None) -> OracleDecision:
+    tracker = coverage_tracker or CoverageTracker.from_counter(scoring_cfg, action_usage_counter)
+    index = tracker.select(
+        np.array([cand.action for cand in candidates], dtype=np.int64),
+        np.array([cand.score for cand in candidates]),
+        np.array([cand.predicted_delay for cand in candidates]),
+        np.array([cand.predicted_energy for cand in candidates]),
+        np.array([cand.semantic_match for cand in candidates], dtype=bool),
+        _contextual_target_action(task, battery_ratio, candidates),
     )
-    per_action_slack = selection_cfg.get(
-        "contextual_action_slack",
-        {"local": 0.90, "edge_25": 1.00, "edge_50": 0.90, "edge_75": 0.60, "edge_100": 1.10, "cloud": 0.55},
-    )
-    coverage_weight = float(selection_cfg.get("contextual_coverage_weight", 1.4))
-    preference_bonus = float(selection_cfg.get("contextual_preference_bonus", 0.30))
-    semantic_bonus = float(selection_cfg.get("contextual_semantic_bonus", 0.18))
-    gap_penalty = float(selection_cfg.get("contextual_gap_penalty", 0.85))
-
-    feasible = []
-    for cand in ranked:
-        allowed_gap = _coverage_lookup(per_action_slack, cand.action, 0.5)
-        if cand.score <= best.score + allowed_gap:
-            feasible.append(cand)
-    if not feasible:
-        return best
-
-    bootstrap_min_counts = selection_cfg.get("contextual_bootstrap_min_counts", {})
-    bootstrap_action_slack = selection_cfg.get("contextual_bootstrap_action_slack", per_action_slack)
-    bootstrap_candidates = []
-    for cand in feasible:
-        required_count = int(round(_coverage_lookup(bootstrap_min_counts, cand.action, 0.0)))
-        current_count = int(coverage_counter.get(cand.action, 0))
-        if required_count <= 0 or current_count >= required_count:
-            continue
-        bootstrap_gap = _coverage_lookup(bootstrap_action_slack, cand.action, 0.0)
-        if cand.score <= best.score + bootstrap_gap:
-            bootstrap_candidates.append((required_count - current_count, cand.score, cand.predicted_delay, cand))
-    if bootstrap_candidates:
-        bootstrap_candidates.sort(key=lambda item: (-item[0], item[1], item[2]))
-        return bootstrap_candidates[0][3]
-
-    best_candidate = best
-    best_utility = -1e9
-    for cand in feasible:
-        current_ratio = (coverage_counter.get(cand.action, 0) / total_seen) if total_seen else 0.0
-        target_ratio = _coverage_lookup(target_ratios, cand.action, 0.0)
-        coverage_deficit = max(0.0, target_ratio - current_ratio)
-        utility = 0.0
-        if cand.action == preferred_action:
-            utility += preference_bonus
-        if cand.semantic_match:
-            utility += semantic_bonus
-        utility += coverage_weight * coverage_deficit
-        utility -= gap_penalty * max(0.0, cand.score - best.score)
-        utility -= 0.02 * cand.predicted_delay
-        if utility > best_utility:
-            best_utility = utility
-            best_candidate = cand
-    return best_candidate
+    return candidates[index]
 
 
 def choose_oracle_action(
@@ -452,14 +512,44 @@ def choose_oracle_action(
     teacher_policy: str = "teacher_balanced_semantic",
     scoring_cfg: Dict[str, float] | None = None,
     action_usage_counter: Counter | None = None,
+    coverage_tracker: CoverageTracker | None = None,
+    outcomes: List[Dict[str, float]] | None = None,
 ) -> OracleDecision:
+    """Teacher decision for the current env state.
+
+    Coverage-aware teachers use `coverage_tracker` (see build_coverage_tracker)
+    when given; otherwise a tracker is rebuilt from `action_usage_counter`.
+    `outcomes` (from predict_state_outcomes) lets several teachers share one
+    outcome prediction of the same state.
+    """
     teacher_policy = normalize_teacher_policy_name(teacher_policy)
+    ranked, battery_ratio = _rank_oracle_candidates(env, teacher_policy, scoring_cfg, outcomes)
+    selected = ranked[0]
+    selection_cfg = _resolve_coverage_selection_cfg(teacher_policy, scoring_cfg)
+    if selection_cfg is not None:
+        selected = _select_contextual_candidate(ranked, env.current_task, battery_ratio, selection_cfg, action_usage_counter, coverage_tracker)
+    second_best_score = ranked[1].score if len(ranked) > 1 else ranked[0].score
+    selected.score_margin = float(second_best_score - selected.score)
+    return selected
+
+
+def predict_state_outcomes(env) -> List[Dict[str, float]]:
+    """Predicted outcome of every valid action in the current env state."""
+    return [_predict_action_outcome(env, action) for action in getattr(env, "valid_actions", [0, 1, 2, 3, 4, 5])]
+
+
+def _rank_oracle_candidates(
+    env,
+    teacher_policy: str,
+    scoring_cfg: Dict[str, float] | None = None,
+    outcomes: List[Dict[str, float]] | None = None,
+) -> tuple:
+    """All candidate decisions for the current env state, best first, and the battery ratio."""
     scoring_mode = resolve_teacher_policy_mode(teacher_policy)
     battery_ratio = min(1.0, max(0.0, getattr(env.current_device, "battery", 10000.0) / 10000.0))
     candidates: List[OracleDecision] = []
 
-    for action in getattr(env, "valid_actions", [0, 1, 2, 3, 4, 5]):
-        outcome = _predict_action_outcome(env, action)
+    for outcome in outcomes if outcomes is not None else predict_state_outcomes(env):
         score = _score_outcome(outcome, scoring_mode, battery_ratio, env.current_task, scoring_cfg)
         candidates.append(
             OracleDecision(
@@ -480,12 +570,52 @@ def choose_oracle_action(
         )
 
     ranked = sorted(candidates, key=lambda x: (x.score, x.predicted_delay, x.predicted_energy))
-    selected = ranked[0]
-    selection_cfg = _resolve_coverage_selection_cfg(teacher_policy, scoring_cfg)
-    if selection_cfg is not None:
-        selected = _select_contextual_candidate(ranked, env.current_task, battery_ratio, selection_cfg, action_usage_counter)
-    second_best_score = ranked[1].score if len(ranked) > 1 else ranked[0].score
-    selected.score_margin = float(second_best_score - selected.score)
+    return ranked, battery_ratio
+
+
+def choose_lookahead_action(
+    env,
+    teacher_policy: str = "teacher_lookahead_reward_aligned",
+    scoring_cfg: Dict[str, float] | None = None,
+    horizon: int = 3,
+    beam_width: int = 3,
+    discount: float = 0.9,
+    extra_env_fields: Iterable[str] = (),
+) -> OracleDecision:
+    """Multi-step teacher decision: greedy rollouts from the best first actions.
+
+    The `beam_width` best one-step candidates (by the teacher's scoring mode)
+    are each stepped through the env and followed greedily for `horizon - 1`
+    more steps; a candidate's value is its own score plus the discounted best
+    scores along its rollout (lower is better). The env is rolled back with
+    env_snapshot after every rollout, so the cost is beam_width * horizon env
+    steps rather than a copy of the env per candidate. Rollout steps are not
+    logged to the explanation bank or seen by an active RewardTermRecorder.
+    """
+    teacher_policy = normalize_teacher_policy_name(teacher_policy)
+    extra_env_fields = tuple(extra_env_fields)
+    ranked, _ = _rank_oracle_candidates(env, teacher_policy, scoring_cfg)
+    beam = ranked[:max(1, int(beam_width))]
+
+    values = []
+    for candidate in beam:
+        value = candidate.score
+        with simulated_rollout(env, extra_env_fields):
+            action = candidate.action
+            for depth in range(1, max(1, int(horizon))):
+                _, _, terminated, truncated, _ = env.step(action)
+                if terminated or truncated:
+                    break
+                step_ranked, _ = _rank_oracle_candidates(env, teacher_policy, scoring_cfg)
+                value += (discount ** depth) * step_ranked[0].score
+                action = step_ranked[0].action
+        values.append(float(value))
+
+    order = sorted(range(len(beam)), key=lambda index: (values[index], index))
+    selected = beam[order[0]]
+    second_best_value = values[order[1]] if len(order) > 1 else values[order[0]]
+    selected.score = values[order[0]]
+    selected.score_margin = float(second_best_value - values[order[0]])
     return selected
 
 
@@ -510,7 +640,15 @@ def _write_dataset(csv_path: Path, rows: List[Dict[str, object]]) -> None:
         writer.writerows(rows)
 
 
-def _rebalance_teacher_train_rows(rows: List[Dict[str, object]], teacher_policy: str, config: Dict[str, object]) -> List[Dict[str, object]]:
+def _assign_teacher_train_sample_weights(rows: List[Dict[str, object]], teacher_policy: str, config: Dict[str, object]) -> List[Dict[str, object]]:
+    """Set `sample_weight` on the train rows of a rebalanced teacher.
+
+    Every train row of action a gets target_count(a) / count(a), so drawing
+    rows proportionally to sample_weight reproduces `target_ratios` while each
+    state is stored once; the mix is applied by the training sampler
+    (_build_train_loader). Actions with a zero target get weight 0; val/test
+    rows and other teachers keep weight 1.
+    """
     rebalance_cfg = (config.get("dataset", {}) or {}).get("teacher_train_rebalance", {})
     enabled = bool(rebalance_cfg.get("enabled", False))
     normalized_teacher = normalize_teacher_policy_name(teacher_policy)
@@ -522,7 +660,6 @@ def _rebalance_teacher_train_rows(rows: List[Dict[str, object]], teacher_policy:
         return rows
 
     train_rows = [row for row in rows if row.get("split") == "train"]
-    other_rows = [row for row in rows if row.get("split") != "train"]
     if not train_rows:
         return rows
 
@@ -532,7 +669,6 @@ def _rebalance_teacher_train_rows(rows: List[Dict[str, object]], teacher_policy:
     )
     action_order = ["local", "edge_25", "edge_50", "edge_75", "edge_100", "cloud"]
     total_count = len(train_rows)
-    rng = random.Random(int(config.get("seed", 42)) + 997)
 
     target_counts = {}
     running_total = 0
@@ -542,33 +678,21 @@ def _rebalance_teacher_train_rows(rows: List[Dict[str, object]], teacher_policy:
         running_total += count
     target_counts[action_order[-1]] = max(0, total_count - running_total)
 
-    grouped = defaultdict(list)
+    source_counts = Counter(str(row.get("selected_action_name", "")) for row in train_rows)
     for row in train_rows:
-        grouped[str(row.get("selected_action_name", ""))].append(row)
-
-    balanced_rows = []
-    for action_name in action_order:
-        source_rows = grouped.get(action_name, [])
-        target_count = int(target_counts.get(action_name, 0))
-        if target_count <= 0 or not source_rows:
-            continue
-        if len(source_rows) >= target_count:
-            balanced_rows.extend(rng.sample(source_rows, target_count))
-        else:
-            balanced_rows.extend(source_rows)
-            extra_needed = target_count - len(source_rows)
-            balanced_rows.extend(rng.choices(source_rows, k=extra_needed))
-
-    rng.shuffle(balanced_rows)
-    return balanced_rows + other_rows
+        action_name = str(row.get("selected_action_name", ""))
+        row["sample_weight"] = round(target_counts.get(action_name, 0) / source_counts[action_name], 6)
+    return rows
 
 
 def _write_summary(report_path: Path, rows: List[Dict[str, object]], config: Dict[str, object]) -> None:
     report_path.parent.mkdir(parents=True, exist_ok=True)
     teacher_counters = defaultdict(Counter)
+    teacher_weights = defaultdict(Counter)
     split_counters = Counter()
     for row in rows:
         teacher_counters[row["teacher_policy"]][row["selected_action_name"]] += 1
+        teacher_weights[row["teacher_policy"]][row["selected_action_name"]] += float(row.get("sample_weight", 1.0))
         split_counters[row["split"]] += 1
 
     lines = [
@@ -601,26 +725,250 @@ def _write_summary(report_path: Path, rows: List[Dict[str, object]], config: Dic
 
     for teacher_policy, counter in teacher_counters.items():
         total = sum(counter.values())
+        weight_total = sum(teacher_weights[teacher_policy].values())
         lines.extend([
             f"### {teacher_policy}",
             "",
-            "| Action | Count | Ratio |",
-            "|---|---:|---:|",
+            "| Action | Count | Ratio | Sampled Ratio |",
+            "|---|---:|---:|---:|",
         ])
         for action_name, count in sorted(counter.items()):
             ratio = (count / total) if total else 0.0
-            lines.append(f"| {action_name} | {count} | {ratio:.2%} |")
+            sampled_ratio = (teacher_weights[teacher_policy][action_name] / weight_total) if weight_total else 0.0
+            lines.append(f"| {action_name} | {count} | {ratio:.2%} | {sampled_ratio:.2%} |")
         lines.append("")
 
     report_path.write_text("\n".join(lines), encoding="utf-8")
 
 
-def generate_oracle_dataset(config_path: str = "configs/synthetic/oracle_labeling.yaml") -> Dict[str, str]:
-    config = load_config(config_path)
-    dataset_cfg = config.get("dataset", {})
+def _oracle_shard_specs(teacher_policies: List[str], n_episodes: int, episodes_per_shard: int) -> List[tuple]:
+    """(objective_index, teacher_policy_name, episode_start, episode_stop) in merge order."""
+    episodes_per_shard = max(1, int(episodes_per_shard))
+    return [
+        (objective_index, teacher_policy_name, start, min(n_episodes, start + episodes_per_shard))
+        for objective_index, teacher_policy_name in enumerate(teacher_policies)
+        for start in range(0, n_episodes, episodes_per_shard)
+    ]
+
+
+def _oracle_shard_env(config: Dict[str, object], seed_offset: int):
+    """Env of the serial labeling loop for `seed_offset` (the objective index).
+
+    The seed fixes the edge-server layout, so every shard of one teacher must
+    build its env with the same offset; episodes differ only through
+    _reset_oracle_episode.
+    """
     env_cfg = config.get("env", {})
+    seed = int(config.get("seed", 42))
+    np.random.seed(seed + seed_offset)
+    return build_training_env(
+        seed=seed + seed_offset,
+        max_steps=int(env_cfg.get("max_steps", 50)),
+        num_edge_servers=int(env_cfg.get("num_edge_servers", 3)),
+        num_devices=int(env_cfg.get("num_devices", 5)),
+    )
+
+
+def _reset_oracle_episode(env, episode_seed: int):
+    """Reset for one labeled episode with the global RNGs reseeded too, so the
+    episode does not depend on the episodes labeled before it in the same shard."""
+    random.seed(episode_seed)
+    np.random.seed(episode_seed)
+    return env.reset(seed=episode_seed)
+
+
+def _choose_teacher_action(
+    env,
+    teacher_policy: str,
+    config: Dict[str, object],
+    action_usage_counter: Counter,
+    coverage_tracker: CoverageTracker | None,
+    outcomes: List[Dict[str, float]] | None = None,
+) -> OracleDecision:
     scoring_cfg = config.get("scoring", {})
-    teacher_policies: Iterable[str] = config.get(
+    if teacher_policy in LOOKAHEAD_TEACHER_POLICIES:
+        lookahead_cfg = config.get("lookahead", {}) or {}
+        return choose_lookahead_action(
+            env,
+            teacher_policy,
+            scoring_cfg,
+            horizon=int(lookahead_cfg.get("horizon", 3)),
+            beam_width=int(lookahead_cfg.get("beam_width", 3)),
+            discount=float(lookahead_cfg.get("discount", 0.9)),
+            extra_env_fields=lookahead_cfg.get("extra_env_fields", ()) or (),
+        )
+    return choose_oracle_action(
+        env,
+        teacher_policy,
+        scoring_cfg,
+        action_usage_counter=action_usage_counter,
+        coverage_tracker=coverage_tracker,
+        outcomes=outcomes,
+    )
+
+
+def _oracle_row(teacher_policy: str, split: str, episode_idx: int, step_idx: int, decision: OracleDecision, env, obs) -> Dict[str, object]:
+    semantic = getattr(env.current_task, "semantic_analysis", {}) or {}
+    row = {
+        "teacher_policy": teacher_policy,
+        "split": split,
+        "episode_id": episode_idx,
+        "step_id": step_idx,
+        "selected_action_id": decision.action,
+        "selected_action_name": ACTION_LABELS[decision.action],
+        "teacher_score": round(decision.score, 6),
+        "teacher_margin": round(decision.score_margin, 6),
+        "predicted_delay": round(decision.predicted_delay, 6),
+        "predicted_energy": round(decision.predicted_energy, 6),
+        "predicted_reward": round(decision.predicted_reward, 6),
+        "deadline_met": int(decision.deadline_met),
+        "semantic_target": decision.semantic_target,
+        "semantic_match": int(decision.semantic_match),
+        "priority_score": round(float(semantic.get("priority_score", 0.0)), 6),
+        "semantic_confidence": round(float(semantic.get("confidence", 0.0)), 6),
+        "sample_weight": 1.0,
+    }
+    state_values = np.asarray(obs, dtype=np.float32).tolist()
+    for index, column in enumerate(STATE_FEATURE_COLUMNS):
+        row[column] = round(float(state_values[index]), 6)
+    return row
+
+
+def _generate_oracle_shard(
+    config: Dict[str, object],
+    objective_index: int,
+    teacher_policy_name: str,
+    episode_start: int,
+    episode_stop: int,
+) -> tuple:
+    """Label episodes [episode_start, episode_stop) of one teacher with a private env.
+
+    Each shard builds the teacher's serial env (same edge-server layout for
+    every shard), reseeds the env and global RNGs per episode and starts from
+    an empty action_usage_counter, so its rows do not depend on which process
+    runs it or on the other shards. Returns (rows, action_usage_counter).
+    """
+    dataset_cfg = config.get("dataset", {})
+    seed = int(config.get("seed", 42))
+    n_episodes = int(dataset_cfg.get("n_episodes", 60))
+    train_ratio = float(dataset_cfg.get("train_ratio", 0.7))
+    val_ratio = float(dataset_cfg.get("val_ratio", 0.15))
+
+    env = _oracle_shard_env(config, objective_index)
+    teacher_policy = normalize_teacher_policy_name(teacher_policy_name)
+    action_usage_counter: Counter = Counter()
+    coverage_tracker = build_coverage_tracker(teacher_policy, config.get("scoring", {}))
+    rows: List[Dict[str, object]] = []
+
+    for episode_idx in range(episode_start, episode_stop):
+        obs, _ = _reset_oracle_episode(env, seed + objective_index + episode_idx)
+        done = False
+        step_idx = 0
+        split = _split_name(episode_idx, n_episodes, train_ratio, val_ratio)
+
+        while not done:
+            decision = _choose_teacher_action(env, teacher_policy, config, action_usage_counter, coverage_tracker)
+            rows.append(_oracle_row(teacher_policy, split, episode_idx, step_idx, decision, env, obs))
+            action_usage_counter[decision.action] += 1
+            if coverage_tracker is not None:
+                coverage_tracker.record(decision.action)
+
+            obs, _, done, _, _ = env.step(decision.action)
+            step_idx += 1
+
+    # Pool workers exit without atexit handlers; hand the buffered explanations over now.
+    flush_explanation_bank()
+    return rows, action_usage_counter
+
+
+def _run_oracle_shard(args: tuple) -> tuple:
+    return _generate_oracle_shard(*args)
+
+
+def _generate_shared_oracle_shard(
+    config: Dict[str, object],
+    teacher_policies: List[str],
+    episode_start: int,
+    episode_stop: int,
+) -> tuple:
+    """Label episodes [episode_start, episode_stop) for every teacher on one shared trajectory.
+
+    The env follows the behavior teacher (`dataset.shared_trajectory.behavior_teacher`,
+    default: the first teacher). At every state the action outcomes are
+    predicted once and scored by all teachers, so all teachers are labelled on
+    identical states. Seeding matches the per-teacher shard of objective 0.
+    Returns (rows per teacher, action_usage_counter per teacher), both in
+    teacher_policies order.
+    """
+    dataset_cfg = config.get("dataset", {})
+    shared_cfg = dataset_cfg.get("shared_trajectory", {}) or {}
+    seed = int(config.get("seed", 42))
+    n_episodes = int(dataset_cfg.get("n_episodes", 60))
+    train_ratio = float(dataset_cfg.get("train_ratio", 0.7))
+    val_ratio = float(dataset_cfg.get("val_ratio", 0.15))
+
+    teachers = [normalize_teacher_policy_name(name) for name in teacher_policies]
+    behavior_teacher = normalize_teacher_policy_name(shared_cfg.get("behavior_teacher") or teachers[0])
+    if behavior_teacher not in teachers:
+        raise ValueError(f"behavior_teacher {behavior_teacher!r} is not one of the configured teacher policies")
+    behavior_index = teachers.index(behavior_teacher)
+
+    env = _oracle_shard_env(config, 0)
+    counters = [Counter() for _ in teachers]
+    trackers = [build_coverage_tracker(teacher, config.get("scoring", {})) for teacher in teachers]
+    rows: List[List[Dict[str, object]]] = [[] for _ in teachers]
+
+    for episode_idx in range(episode_start, episode_stop):
+        obs, _ = _reset_oracle_episode(env, seed + episode_idx)
+        done = False
+        step_idx = 0
+        split = _split_name(episode_idx, n_episodes, train_ratio, val_ratio)
+
+        while not done:
+            outcomes = predict_state_outcomes(env)
+            decisions = []
+            for index, teacher in enumerate(teachers):
+                decision = _choose_teacher_action(env, teacher, config, counters[index], trackers[index], outcomes)
+                rows[index].append(_oracle_row(teacher, split, episode_idx, step_idx, decision, env, obs))
+                counters[index][decision.action] += 1
+                if trackers[index] is not None:
+                    trackers[index].record(decision.action)
+                decisions.append(decision)
+
+            obs, _, done, _, _ = env.step(decisions[behavior_index].action)
+            step_idx += 1
+
+    flush_explanation_bank()
+    return rows, counters
+
+
+def _run_shared_oracle_shard(args: tuple) -> tuple:
+    return _generate_shared_oracle_shard(*args)
+
+
+def generate_oracle_dataset(config_path: str = "configs/synthetic/oracle_labeling.yaml", workers: int | None = None) -> Dict[str, str]:
+    """Generate the oracle label dataset.
+
+    Work is split into (teacher, episode-range) shards of
+    `dataset.episodes_per_shard` episodes (default: all episodes of a teacher)
+    and run on `workers` processes (argument, else `dataset.workers`, default 1).
+    Shards are merged in teacher/episode order and every episode is seeded on
+    its own (see _reset_oracle_episode), so the output never depends on the
+    worker count and, apart from coverage-aware selection, not on the shard
+    layout either.
+
+    Coverage-aware selection: every shard starts from an empty
+    action_usage_counter and balances coverage within its own episodes; a
+    teacher's total usage is the sum of its shard counters. With one shard per
+    teacher this is exactly the sequential per-teacher counter.
+
+    With `dataset.shared_trajectory.enabled`, shards are episode ranges instead:
+    all teachers label one shared trajectory and share the outcome prediction
+    of every state (see _generate_shared_oracle_shard).
+    """
+    config = load_config(config_path)
+    dataset_cfg = config.get("dataset", {})
+    teacher_policies: List[str] = list(config.get(
         "teacher_policies",
         config.get(
             "objectives",
@@ -631,78 +979,58 @@ def generate_oracle_dataset(config_path: str = "configs/synthetic/oracle_labelin
                 "teacher_reward_aligned",
             ],
         ),
-    )
+    ))
 
-    seed = int(config.get("seed", 42))
     n_episodes = int(dataset_cfg.get("n_episodes", 60))
-    train_ratio = float(dataset_cfg.get("train_ratio", 0.7))
-    val_ratio = float(dataset_cfg.get("val_ratio", 0.15))
-    max_steps = int(env_cfg.get("max_steps", 50))
-    num_edge_servers = int(env_cfg.get("num_edge_servers", 3))
-    num_devices = int(env_cfg.get("num_devices", 5))
+    episodes_per_shard = int(dataset_cfg.get("episodes_per_shard", n_episodes) or n_episodes)
+    workers = max(1, int(workers if workers is not None else dataset_cfg.get("workers", 1)))
 
-    all_rows: List[Dict[str, object]] = []
+    shared_trajectory = bool((dataset_cfg.get("shared_trajectory", {}) or {}).get("enabled", False))
+
+    if shared_trajectory:
+        shard_specs = [(start, stop) for _, _, start, stop in _oracle_shard_specs(teacher_policies[:1], n_episodes, episodes_per_shard)]
+        shard_args = [(config, teacher_policies, start, stop) for start, stop in shard_specs]
+        run_shard = _run_shared_oracle_shard
+    else:
+        shard_specs = _oracle_shard_specs(teacher_policies, n_episodes, episodes_per_shard)
+        shard_args = [(config, *spec) for spec in shard_specs]
+        run_shard = _run_oracle_shard
+    if workers > 1 and len(shard_args) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(shard_args))) as executor:
+            shard_results = list(executor.map(run_shard, shard_args))
+    else:
+        shard_results = [run_shard(args) for args in shard_args]
+
+    teacher_rows = defaultdict(list)
     action_usage_counters = defaultdict(Counter)
+    if shared_trajectory:
+        for rows_per_teacher, counters in shard_results:
+            for objective_index, teacher_policy_name in enumerate(teacher_policies):
+                teacher_rows[objective_index].extend(rows_per_teacher[objective_index])
+                action_usage_counters[normalize_teacher_policy_name(teacher_policy_name)].update(counters[objective_index])
+    else:
+        for (objective_index, teacher_policy_name, _, _), (rows, counter) in zip(shard_specs, shard_results):
+            teacher_rows[objective_index].extend(rows)
+            action_usage_counters[normalize_teacher_policy_name(teacher_policy_name)].update(counter)
 
+    all_rows: List[Dict[str, object]] = []
     for objective_index, teacher_policy_name in enumerate(teacher_policies):
-        env = build_training_env(
-            seed=seed + objective_index,
-            max_steps=max_steps,
-            num_edge_servers=num_edge_servers,
-            num_devices=num_devices,
-        )
-
-        teacher_rows: List[Dict[str, object]] = []
-
-        for episode_idx in range(n_episodes):
-            obs, _ = env.reset(seed=seed + objective_index + episode_idx)
-            done = False
-            step_idx = 0
-            split = _split_name(episode_idx, n_episodes, train_ratio, val_ratio)
-
-            while not done:
-                teacher_policy = normalize_teacher_policy_name(teacher_policy_name)
-                decision = choose_oracle_action(env, teacher_policy, scoring_cfg, action_usage_counter=action_usage_counters[teacher_policy])
-                semantic = getattr(env.current_task, "semantic_analysis", {}) or {}
-                row = {
-                    "teacher_policy": teacher_policy,
-                    "split": split,
-                    "episode_id": episode_idx,
-                    "step_id": step_idx,
-                    "selected_action_id": decision.action,
-                    "selected_action_name": ACTION_LABELS[decision.action],
-                    "teacher_score": round(decision.score, 6),
-                    "teacher_margin": round(decision.score_margin, 6),
-                    "predicted_delay": round(decision.predicted_delay, 6),
-                    "predicted_energy": round(decision.predicted_energy, 6),
-                    "predicted_reward": round(decision.predicted_reward, 6),
-                    "deadline_met": int(decision.deadline_met),
-                    "semantic_target": decision.semantic_target,
-                    "semantic_match": int(decision.semantic_match),
-                    "priority_score": round(float(semantic.get("priority_score", 0.0)), 6),
-                    "semantic_confidence": round(float(semantic.get("confidence", 0.0)), 6),
-                }
-                state_values = np.asarray(obs, dtype=np.float32).tolist()
-                for index, column in enumerate(STATE_FEATURE_COLUMNS):
-                    row[column] = round(float(state_values[index]), 6)
-                teacher_rows.append(row)
-                action_usage_counters[teacher_policy][decision.action] += 1
-
-                obs, _, done, _, _ = env.step(decision.action)
-                step_idx += 1
-
-        teacher_rows = _rebalance_teacher_train_rows(teacher_rows, teacher_policy_name, config)
-        all_rows.extend(teacher_rows)
+        all_rows.extend(_assign_teacher_train_sample_weights(teacher_rows[objective_index], teacher_policy_name, config))
 
     csv_path = Path(config.get("output", {}).get("csv_path", "results/raw/synthetic/pretraining/oracle_label_dataset.csv"))
     report_path = Path(config.get("output", {}).get("report_path", "v2_docs/phase_7/synthetic_oracle_label_summary.md"))
+    store_path = Path(config.get("output", {}).get("store_path", default_store_path(csv_path)))
     _write_dataset(csv_path, all_rows)
+    if all_rows:
+        write_oracle_store(store_path, all_rows, STATE_FEATURE_COLUMNS)
     _write_summary(report_path, all_rows, config)
 
     return {
         "csv_path": str(csv_path),
+        "store_path": str(store_path),
         "report_path": str(report_path),
         "num_rows": str(len(all_rows)),
+        "num_shards": str(len(shard_specs)),
     }
 
 
@@ -714,6 +1042,24 @@ class OracleLabelDataset(Dataset):
             dtype=torch.float32,
         )
         self.labels = torch.tensor([_row_action_id(row) for row in rows], dtype=torch.long)
+        self.margins = np.array([_row_margin(row) for row in rows], dtype=np.float64)
+        self.sample_weights = np.array([_row_sample_weight(row) for row in rows], dtype=np.float64)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        observations: np.ndarray,
+        labels: np.ndarray,
+        margins: np.ndarray | None = None,
+        sample_weights: np.ndarray | None = None,
+    ) -> "OracleLabelDataset":
+        """Wrap columnar store arrays; observations are shared with NumPy, not copied."""
+        dataset = cls.__new__(cls)
+        dataset.observations = torch.from_numpy(observations)
+        dataset.labels = torch.from_numpy(labels).long()
+        dataset.margins = margins if margins is not None else np.zeros(len(labels), dtype=np.float64)
+        dataset.sample_weights = sample_weights if sample_weights is not None else np.ones(len(labels), dtype=np.float64)
+        return dataset
 
     def __len__(self) -> int:
         return int(self.labels.shape[0])
@@ -728,18 +1074,31 @@ def _read_oracle_rows(csv_path: Path, teacher_policy: str, min_margin: float = 0
         reader = csv.DictReader(handle)
         rows = [row for row in reader if _row_teacher_policy(row) == requested_teacher]
     if min_margin > 0.0:
-        filtered = []
-        for row in rows:
-            try:
-                margin = float(row.get("teacher_margin", row.get("oracle_margin", 0.0)))
-            except (TypeError, ValueError):
-                margin = 0.0
-            if margin >= min_margin:
-                filtered.append(row)
-        return filtered
+        return [row for row in rows if _row_margin(row) >= min_margin]
     return rows
 
 
+def _load_split_datasets(dataset_path: Path, teacher_policy: str, min_margin: float = 0.0, store_path: Path | None = None) -> Dict[str, OracleLabelDataset]:
+    """train/val/test datasets from the columnar store when present, else from the CSV."""
+    requested_teacher = normalize_teacher_policy_name(teacher_policy)
+    store = resolve_oracle_store(store_path) if store_path is not None else resolve_oracle_store(dataset_path)
+    if store is None:
+        split_rows = _split_rows(_read_oracle_rows(dataset_path, requested_teacher, min_margin=min_margin))
+        return {split: OracleLabelDataset(split_rows.get(split, [])) for split in ("train", "val", "test")}
+
+    datasets = {}
+    for split in ("train", "val", "test"):
+        arrays = load_oracle_arrays(
+            store,
+            requested_teacher,
+            splits=(split,),
+            min_margin=min_margin if min_margin > 0.0 else None,
+            columns=("states", "labels", "margins", "sample_weights"),
+        )
+        datasets[split] = OracleLabelDataset.from_arrays(arrays["states"], arrays["labels"], arrays["margins"], arrays["sample_weights"])
+    return datasets
+
+
 def _split_rows(rows: List[Dict[str, object]]) -> Dict[str, List[Dict[str, object]]]:
     grouped: Dict[str, List[Dict[str, object]]] = {"train": [], "val": [], "test": []}
     for row in rows:
@@ -748,30 +1107,51 @@ def _split_rows(rows: List[Dict[str, object]]) -> Dict[str, List[Dict[str, objec
     return grouped
 
 
-def _build_train_loader(dataset: Dataset, batch_size: int, balance_actions: bool = False, balance_power: float = 1.0, samples_per_epoch: int | None = None) -> DataLoader:
+def _build_train_loader(
+    dataset: Dataset,
+    batch_size: int,
+    balance_actions: bool = False,
+    balance_power: float = 1.0,
+    samples_per_epoch: int | None = None,
+    margin_sampling: Dict[str, object] | None = None,
+) -> DataLoader:
+    """Training loader: shuffled, weighted, action-balanced and/or margin-curriculum sampled.
+
+    Stored per-row sample weights (teacher_train_rebalance) set the action mix
+    batches are drawn with; action balancing, when enabled, is computed on that
+    weighted mix, so rebalanced rows are not reweighted twice. With
+    margin_sampling.enabled, low-margin rows are oversampled on top by
+    MarginCurriculumSampler (see src.training.margin_sampling).
+    """
     if len(dataset) == 0:
         return DataLoader(dataset, batch_size=batch_size, shuffle=False)
-    if not balance_actions:
+    num_samples = int(samples_per_epoch or len(dataset))
+    sample_weights = getattr(dataset, "sample_weights", None)
+    if sample_weights is not None and np.all(sample_weights == 1.0):
+        sample_weights = None
+
+    if balance_actions:
+        base_weights = action_balance_weights(dataset.labels, balance_power, sample_weights)
+    else:
+        base_weights = torch.from_numpy(np.asarray(sample_weights, dtype=np.float64)) if sample_weights is not None else None
+    if margin_sampling and margin_sampling.get("enabled", False):
+        sampler = build_margin_sampler(dataset.margins, margin_sampling, num_samples=num_samples, base_weights=base_weights)
+        return DataLoader(dataset, batch_size=batch_size, sampler=sampler)
+    if base_weights is None:
         return DataLoader(dataset, batch_size=batch_size, shuffle=True)
 
-    labels = dataset.labels.cpu().tolist()
-    label_counts = Counter(labels)
-    weights = []
-    for label in labels:
-        count = max(1, int(label_counts.get(label, 1)))
-        weights.append(1.0 / (count ** float(balance_power)))
-    num_samples = int(samples_per_epoch or len(labels))
-    sampler = WeightedRandomSampler(torch.tensor(weights, dtype=torch.double), num_samples=num_samples, replacement=True)
+    sampler = WeightedRandomSampler(base_weights, num_samples=num_samples, replacement=True)
     return DataLoader(dataset, batch_size=batch_size, sampler=sampler)
 
 
-def _build_pretraining_model(config: Dict[str, object]):
-    env = build_training_env(
-        seed=int(config.get("seed", 42)),
-        max_steps=int(config.get("env", {}).get("max_steps", 50)),
-        num_edge_servers=int(config.get("env", {}).get("num_edge_servers", 3)),
-        num_devices=int(config.get("env", {}).get("num_devices", 5)),
-    )
+def _build_pretraining_model(config: Dict[str, object], env=None):
+    if env is None:
+        env = build_training_env(
+            seed=int(config.get("seed", 42)),
+            max_steps=int(config.get("env", {}).get("max_steps", 50)),
+            num_edge_servers=int(config.get("env", {}).get("num_edge_servers", 3)),
+            num_devices=int(config.get("env", {}).get("num_devices", 5)),
+        )
     ppo_cfg = config.get("ppo", {})
     model = PPO(
         "MlpPolicy",
@@ -812,6 +1192,30 @@ def _evaluate_supervised(model, loader: DataLoader, criterion: nn.Module) -> Dic
     }
 
 
+def _train_supervised_epoch(model, loader: DataLoader, optimizer: torch.optim.Optimizer, criterion: nn.Module) -> Dict[str, float]:
+    """One pass of cross-entropy updates of the policy logits over `loader`."""
+    model.policy.train()
+    total_loss = 0.0
+    correct = 0
+    total = 0
+    for observations, labels in loader:
+        labels = labels.to(model.device)
+        optimizer.zero_grad()
+        logits = _policy_logits(model, observations)
+        loss = criterion(logits, labels)
+        loss.backward()
+        optimizer.step()
+
+        total_loss += float(loss.item()) * int(labels.shape[0])
+        preds = torch.argmax(logits, dim=1)
+        correct += int((preds == labels).sum().item())
+        total += int(labels.shape[0])
+    return {
+        "loss": (total_loss / total) if total else 0.0,
+        "accuracy": (correct / total) if total else 0.0,
+    }
+
+
 def run_supervised_pretraining(config_path: str = "configs/synthetic/supervised_pretraining.yaml") -> Dict[str, str]:
     config = load_config(config_path)
     dataset_path = Path(config.get("dataset", {}).get("csv_path", "results/raw/synthetic/pretraining/oracle_label_dataset.csv"))
@@ -824,18 +1228,26 @@ def run_supervised_pretraining(config_path: str = "configs/synthetic/supervised_
     balance_actions = bool(dataset_cfg.get("balance_actions", False))
     balance_power = float(dataset_cfg.get("balance_power", 1.0))
     samples_per_epoch = dataset_cfg.get("samples_per_epoch")
+    margin_sampling = dataset_cfg.get("margin_sampling") or {}
     epochs = int(config.get("training", {}).get("epochs", 15))
     learning_rate = float(config.get("training", {}).get("learning_rate", 1e-3))
     patience = int(config.get("training", {}).get("early_stopping_patience", 5))
     min_delta = float(config.get("training", {}).get("early_stopping_min_delta", 1e-4))
 
-    rows = _read_oracle_rows(dataset_path, teacher_policy, min_margin=min_margin)
-    split_rows = _split_rows(rows)
-    train_ds = OracleLabelDataset(split_rows.get("train", []))
-    val_ds = OracleLabelDataset(split_rows.get("val", []))
-    test_ds = OracleLabelDataset(split_rows.get("test", []))
-
-    train_loader = _build_train_loader(train_ds, batch_size=batch_size, balance_actions=balance_actions, balance_power=balance_power, samples_per_epoch=samples_per_epoch)
+    store_path = dataset_cfg.get("store_path")
+    datasets = _load_split_datasets(dataset_path, teacher_policy, min_margin=min_margin, store_path=Path(store_path) if store_path else None)
+    train_ds = datasets["train"]
+    val_ds = datasets["val"]
+    test_ds = datasets["test"]
+
+    train_loader = _build_train_loader(
+        train_ds,
+        batch_size=batch_size,
+        balance_actions=balance_actions,
+        balance_power=balance_power,
+        samples_per_epoch=samples_per_epoch,
+        margin_sampling=margin_sampling,
+    )
     val_loader = DataLoader(val_ds, batch_size=batch_size, shuffle=False)
     test_loader = DataLoader(test_ds, batch_size=batch_size, shuffle=False)
 
@@ -850,26 +1262,9 @@ def run_supervised_pretraining(config_path: str = "configs/synthetic/supervised_
     stopped_early = False
 
     for epoch in range(1, epochs + 1):
-        model.policy.train()
-        train_loss_sum = 0.0
-        train_correct = 0
-        train_total = 0
-
-        for observations, labels in train_loader:
-            labels = labels.to(model.device)
-            optimizer.zero_grad()
-            logits = _policy_logits(model, observations)
-            loss = criterion(logits, labels)
-            loss.backward()
-            optimizer.step()
-
-            train_loss_sum += float(loss.item()) * int(labels.shape[0])
-            preds = torch.argmax(logits, dim=1)
-            train_correct += int((preds == labels).sum().item())
-            train_total += int(labels.shape[0])
-
-        train_loss = (train_loss_sum / train_total) if train_total else 0.0
-        train_acc = (train_correct / train_total) if train_total else 0.0
+        train_metrics = _train_supervised_epoch(model, train_loader, optimizer, criterion)
+        train_loss = train_metrics["loss"]
+        train_acc = train_metrics["accuracy"]
         val_metrics = _evaluate_supervised(model, val_loader, criterion)
 
         metrics_rows.append(
@@ -922,6 +1317,7 @@ def run_supervised_pretraining(config_path: str = "configs/synthetic/supervised_
         f"- Min margin filter: `{min_margin}`",
         f"- Action-balanced sampling: `{'yes' if balance_actions else 'no'}`",
         f"- Balance power: `{balance_power}`",
+        f"- Margin curriculum sampling: `{'yes' if margin_sampling.get('enabled', False) else 'no'}`",
         f"- Configured epoch count: `{epochs}`",
         f"- Executed epoch count: `{len(metrics_rows)}`",
         f"- Early stopping patience: `{patience}`",
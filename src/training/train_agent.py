@@ -3,7 +3,6 @@ import csv
 import os
 import random
 import time
-from collections import Counter
 from datetime import datetime
 
 import numpy as np
@@ -17,6 +16,8 @@ from src.core.config import load_config
 from src.core.evaluation import evaluate_policy
 from src.env.rl_env import OffloadingEnv
 from src.env.simulation_env import CloudServer, EdgeServer, IoTDevice, WirelessChannel
+from src.training.margin_sampling import action_balance_weights, build_margin_sampler
+from src.training.oracle_store import load_oracle_arrays, resolve_oracle_store
 from src.utils.reproducibility import set_seed
 
 
@@ -47,6 +48,7 @@ def _normalize_teacher_policy_name(name):
         "teacher_reward_aligned": "teacher_reward_aligned",
         "reward_aligned_oracle": "teacher_reward_aligned",
         "teacher_contextual_reward_aligned": "teacher_contextual_reward_aligned",
+        "teacher_lookahead_reward_aligned": "teacher_lookahead_reward_aligned",
     }
     return mapping.get(name, name)
 
@@ -192,11 +194,10 @@ def create_model(algorithm, env, hyperparams):
     return model_class("MlpPolicy", env, verbose=0, **model_kwargs)
 
 
-def _load_anchor_dataloader(dataset_path, teacher_policy, min_margin=0.0, batch_size=128, allowed_actions=None, allowed_splits=None, balance_actions=False, balance_power=1.0, samples_per_epoch=None):
-    requested_teacher_policy = _normalize_teacher_policy_name(teacher_policy)
-    allowed_action_set = None if allowed_actions is None else {int(action) for action in allowed_actions}
-    allowed_splits = set(allowed_splits or ["train"])
+def _read_anchor_csv(dataset_path, requested_teacher_policy, teacher_policy, min_margin, allowed_action_set, allowed_splits):
     rows = []
+    margins = []
+    sample_weights = []
     with open(dataset_path, "r", encoding="utf-8") as handle:
         reader = csv.DictReader(handle)
         for row in reader:
@@ -217,6 +218,11 @@ def _load_anchor_dataloader(dataset_path, teacher_policy, min_margin=0.0, batch_
             if allowed_action_set is not None and oracle_action not in allowed_action_set:
                 continue
             rows.append(row)
+            margins.append(margin)
+            try:
+                sample_weights.append(float(row.get("sample_weight", 1.0)))
+            except (TypeError, ValueError):
+                sample_weights.append(1.0)
 
     if not rows:
         raise ValueError(f"No anchor samples found for teacher_policy={teacher_policy!r} min_margin={min_margin}")
@@ -226,17 +232,47 @@ def _load_anchor_dataloader(dataset_path, teacher_policy, min_margin=0.0, batch_
         dtype=torch.float32,
     )
     labels = torch.tensor([_anchor_row_action_id(row) for row in rows], dtype=torch.long)
+    return observations, labels, np.asarray(margins, dtype=np.float64), np.asarray(sample_weights, dtype=np.float64)
+
+
+def _load_anchor_dataloader(dataset_path, teacher_policy, min_margin=0.0, batch_size=128, allowed_actions=None, allowed_splits=None, balance_actions=False, balance_power=1.0, samples_per_epoch=None, margin_sampling=None):
+    requested_teacher_policy = _normalize_teacher_policy_name(teacher_policy)
+    allowed_action_set = None if allowed_actions is None else {int(action) for action in allowed_actions}
+    allowed_splits = set(allowed_splits or ["train"])
+    store = resolve_oracle_store(dataset_path)
+    if store is not None:
+        arrays = load_oracle_arrays(
+            store,
+            requested_teacher_policy,
+            splits=[split for split in ("train", "val", "test") if split in allowed_splits] + sorted(allowed_splits - {"train", "val", "test"}),
+            min_margin=float(min_margin),
+            allowed_actions=allowed_action_set,
+            columns=("states", "labels", "margins", "sample_weights"),
+        )
+        if len(arrays["labels"]) == 0:
+            raise ValueError(f"No anchor samples found for teacher_policy={teacher_policy!r} min_margin={min_margin}")
+        observations = torch.from_numpy(arrays["states"])
+        labels = torch.from_numpy(arrays["labels"]).long()
+        margins = arrays["margins"]
+        sample_weights = arrays["sample_weights"]
+    else:
+        observations, labels, margins, sample_weights = _read_anchor_csv(dataset_path, requested_teacher_policy, teacher_policy, min_margin, allowed_action_set, allowed_splits)
+
+    # Stored rebalancing weights set the drawn action mix; see pretrain_policy._build_train_loader.
     dataset = TensorDataset(observations, labels)
-    if not balance_actions:
+    num_samples = int(samples_per_epoch or len(labels))
+    if np.all(sample_weights == 1.0):
+        sample_weights = None
+    if balance_actions:
+        base_weights = action_balance_weights(labels, balance_power, sample_weights)
+    else:
+        base_weights = torch.from_numpy(sample_weights) if sample_weights is not None else None
+    if margin_sampling and margin_sampling.get("enabled", False):
+        sampler = build_margin_sampler(margins, margin_sampling, num_samples=num_samples, base_weights=base_weights)
+        return DataLoader(dataset, batch_size=batch_size, sampler=sampler)
+    if base_weights is None:
         return DataLoader(dataset, batch_size=batch_size, shuffle=True)
-    label_list = labels.cpu().tolist()
-    label_counts = Counter(label_list)
-    weights = []
-    for label in label_list:
-        count = max(1, int(label_counts.get(label, 1)))
-        weights.append(1.0 / (count ** float(balance_power)))
-    num_samples = int(samples_per_epoch or len(label_list))
-    sampler = WeightedRandomSampler(torch.tensor(weights, dtype=torch.double), num_samples=num_samples, replacement=True)
+    sampler = WeightedRandomSampler(base_weights, num_samples=num_samples, replacement=True)
     return DataLoader(dataset, batch_size=batch_size, sampler=sampler)
 
 
@@ -460,6 +496,7 @@ def train_single_agent(
             balance_actions=anchor_config.get("balance_actions", False),
             balance_power=float(anchor_config.get("balance_power", 1.0)),
             samples_per_epoch=anchor_config.get("samples_per_epoch"),
+            margin_sampling=anchor_config.get("margin_sampling"),
         )
         callbacks.append(
             PolicyAnchoringCallback(
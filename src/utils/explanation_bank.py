@@ -0,0 +1,191 @@
+import gzip
+import json
+import os
+import random
+import shutil
+import threading
+import time
+from datetime import datetime
+from multiprocessing import util as mp_util
+
+class ExplanationBankWriter:
+    """
+    Buffered JSONL writer for the semantic explanation bank.
+    Entries are sampled, kept in memory and appended in one write per flush.
+    The live file is rotated (and gzip-compressed) once it exceeds max_bytes.
+    Several processes may share the same file: appends, rotation, compression
+    and pruning happen under a lock file created with O_EXCL, which works on
+    every platform.
+    """
+
+    def __init__(self, log_dir="phase_reports/semantic_logs", filename="explanation_bank.jsonl",
+                 buffer_size=256, flush_interval=5.0, sample_rate=1.0,
+                 max_bytes=50 * 1024 * 1024, backup_count=5, compress=True,
+                 background_flush=False, seed=None):
+        """
+        Args:
+            buffer_size: Flush once this many entries are buffered
+            flush_interval: Flush once the oldest buffered entry is this many seconds old
+            sample_rate: Fraction of entries kept (0-1)
+            max_bytes: Rotate the live file once it grows past this size (0 disables rotation)
+            backup_count: Rotated files kept; older ones are deleted
+            compress: gzip rotated files
+            background_flush: Run a daemon thread that flushes every flush_interval seconds
+            seed: Seed of the private sampling RNG (global random state is never touched)
+        """
+        self.log_dir = log_dir
+        self.log_path = os.path.join(log_dir, filename)
+        self.lock_path = self.log_path + ".lock"
+        self.buffer_size = max(1, int(buffer_size))
+        self.flush_interval = float(flush_interval)
+        self.sample_rate = float(sample_rate)
+        self.max_bytes = int(max_bytes)
+        self.backup_count = int(backup_count)
+        self.compress = compress
+        self._rng = random.Random(seed)
+        self._buffer = []
+        self._buffer_started = None
+        self._lock = threading.Lock()
+        self._closed = False
+        self._dir_ready = False
+        self._stop_event = threading.Event()
+        self._thread = None
+        if background_flush and self.flush_interval > 0:
+            self._thread = threading.Thread(target=self._flush_loop, name="explanation-bank-flush", daemon=True)
+            self._thread.start()
+        # Unlike atexit, multiprocessing finalizers also run when a pool worker exits.
+        self._finalizer = mp_util.Finalize(self, self.close, exitpriority=10)
+
+    def write(self, entry):
+        """Buffers one entry (subject to sampling); flushes when a threshold is hit."""
+        if self._closed:
+            return
+        if self.sample_rate < 1.0 and self._rng.random() >= self.sample_rate:
+            return
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if not self._buffer:
+                self._buffer_started = time.monotonic()
+            self._buffer.append(line)
+            due = len(self._buffer) >= self.buffer_size or (
+                self._thread is None and time.monotonic() - self._buffer_started >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Appends all buffered entries to the live file in a single write.
+
+        I/O errors (including lock timeouts) are logged and the batch is
+        dropped, so logging never interrupts the caller.
+        """
+        with self._lock:
+            if not self._buffer:
+                return
+            payload = "".join(self._buffer).encode("utf-8")
+            self._buffer = []
+            self._buffer_started = None
+
+        try:
+            self._append(payload)
+        except (OSError, TimeoutError) as e:
+            print(f"Explanation bank flush failed: {e}")
+
+    def _append(self, payload):
+        if not self._dir_ready:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._dir_ready = True
+
+        with _FileLock(self.lock_path):
+            fd = os.open(self.log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                os.write(fd, payload)
+                size = os.fstat(fd).st_size
+            finally:
+                os.close(fd)
+            if self.max_bytes > 0 and size >= self.max_bytes:
+                self._finish_rotation(self._rotate_locked())
+
+    def close(self):
+        """Flushes and stops the background thread. Safe to call more than once."""
+        if self._closed:
+            return
+        self._finalizer.cancel()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 1.0)
+        self.flush()
+        self._closed = True
+
+    def _flush_loop(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def _rotate_locked(self):
+        # Unique names, so concurrent rotations never clobber each other.
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        base, ext = os.path.splitext(self.log_path)
+        rotated_path = f"{base}.{stamp}-{os.getpid()}{ext}"
+        os.replace(self.log_path, rotated_path)
+        return rotated_path
+
+    def _finish_rotation(self, rotated_path):
+        # Runs under the file lock, so no other process prunes a backup that
+        # is still being compressed.
+        if self.compress:
+            final_path = rotated_path + ".gz"
+            partial_path = final_path + ".partial"
+            with open(rotated_path, "rb") as src, gzip.open(partial_path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.replace(partial_path, final_path)
+            os.remove(rotated_path)
+
+        # Only completed backups are pruned: <base>.<stamp>-<pid><ext>[.gz]
+        base, ext = os.path.splitext(os.path.basename(self.log_path))
+        suffix = ext + ".gz" if self.compress else ext
+        backups = sorted(
+            name for name in os.listdir(self.log_dir)
+            if name.startswith(base + ".") and name.endswith(suffix)
+            and name != os.path.basename(self.log_path)
+        )
+        for name in backups[:max(0, len(backups) - self.backup_count)]:
+            try:
+                os.remove(os.path.join(self.log_dir, name))
+            except FileNotFoundError:
+                pass
+
+
+class _FileLock:
+    """Inter-process lock via an O_EXCL lock file; stale locks are broken after `stale_after` seconds."""
+
+    def __init__(self, path, timeout=10.0, stale_after=30.0, poll=0.005):
+        self.path = path
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.poll = poll
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode("ascii"))
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(self.path) > self.stale_after:
+                        os.remove(self.path)
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"Could not acquire explanation bank lock: {self.path}")
+                time.sleep(self.poll)
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        return False